@@ -0,0 +1,159 @@
+"""
+Frame handoff throughput from render worker processes to one consumer:
+pickled multiprocessing queues vs. the shared-memory FrameRing.
+
+Each worker "renders" every n-th frame (a freshly filled array of the frame
+size, standing in for a composited frame) and hands it over; the consumer
+takes the frames in order and writes each one to /dev/null, as it would
+into the encoder's stdin. The queue is bounded to as many frames as the
+ring has slots, so both hold the same number of frames in flight.
+
+Run from the repository root:
+
+    python -m benchmarks.frame_ring_bench
+    python -m benchmarks.frame_ring_bench --workers 1 2 4 --frames 480
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import time
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from benchmarks.pipeline_bench import RESULTS_DIR, git_revision
+from slop_gen.generators.story_gen.streaming import RING_SLOTS_PER_WORKER
+from slop_gen.utils.frame_ring import FrameRing
+
+DEFAULT_WORKERS = [1, 2, 4]
+MODES = ["queue", "ring"]
+
+
+def _render(shape: Tuple[int, ...], k: int) -> np.ndarray:
+    return np.full(shape, k % 256, dtype=np.uint8)
+
+
+def _queue_worker(queue, shape, frames: int, worker: int, workers: int) -> None:
+    for k in range(worker, frames, workers):
+        queue.put((k, _render(shape, k)))
+
+
+def _ring_worker(ring: FrameRing, frames: int, worker: int, workers: int) -> None:
+    for k in range(worker, frames, workers):
+        frame = _render(ring.shape, k)
+        with ring.writing(k) as slot:
+            slot[...] = frame
+
+
+def run_queue(shape, frames: int, workers: int, slots: int, sink) -> None:
+    ctx = multiprocessing.get_context("fork")
+    queue = ctx.Queue(maxsize=slots)
+    procs = [
+        ctx.Process(target=_queue_worker, args=(queue, shape, frames, w, workers))
+        for w in range(workers)
+    ]
+    for proc in procs:
+        proc.start()
+    pending: Dict[int, np.ndarray] = {}
+    for k in range(frames):
+        while k not in pending:
+            index, frame = queue.get()
+            pending[index] = frame
+        sink.write(pending.pop(k).data)
+    for proc in procs:
+        proc.join()
+
+
+def run_ring(shape, frames: int, workers: int, slots: int, sink) -> None:
+    ring = FrameRing(shape, slots=slots, workers=workers)
+    ctx = multiprocessing.get_context("fork")
+    procs = [
+        ctx.Process(target=_ring_worker, args=(ring, frames, w, workers))
+        for w in range(workers)
+    ]
+    for proc in procs:
+        proc.start()
+    try:
+        for k in range(frames):
+            ring.acquire_read(k)
+            sink.write(ring.slot(k).data)
+            ring.release(k)
+        for proc in procs:
+            proc.join()
+    finally:
+        ring.close()
+
+
+def run(args: argparse.Namespace, workers: int) -> List[Dict[str, Any]]:
+    width = int(round(args.height * 9 / 16))
+    shape = (args.height, width + width % 2, 3)
+    slots = RING_SLOTS_PER_WORKER * workers
+    results = []
+    with open(os.devnull, "wb") as sink:
+        for mode in args.modes:
+            handoff = run_queue if mode == "queue" else run_ring
+            t0 = time.perf_counter()
+            handoff(shape, args.frames, workers, slots, sink)
+            wall_s = time.perf_counter() - t0
+            results.append(
+                {
+                    "workers": workers,
+                    "mode": mode,
+                    "frame_shape": list(shape),
+                    "frames": args.frames,
+                    "wall_s": round(wall_s, 3),
+                    "fps": round(args.frames / wall_s, 1),
+                    "mb_per_s": round(args.frames * np.prod(shape) / wall_s / 1e6, 1),
+                }
+            )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark frame handoff to the encoder.")
+    parser.add_argument("--workers", type=int, nargs="+", default=DEFAULT_WORKERS)
+    parser.add_argument("--modes", choices=MODES, nargs="+", default=MODES)
+    parser.add_argument("--frames", type=int, default=240)
+    parser.add_argument("--height", type=int, default=1920)
+    parser.add_argument("--output", type=str, default=None, help="Results JSON path")
+    args = parser.parse_args()
+
+    results: List[Dict[str, Any]] = []
+    for workers in args.workers:
+        print(f"\n⏱️ Frame handoff benchmark: {workers} worker(s)")
+        for result in run(args, workers):
+            results.append(result)
+            print(
+                f"  {result['mode']}: {result['frames']} frames in {result['wall_s']}s "
+                f"({result['fps']} fps, {result['mb_per_s']} MB/s)"
+            )
+
+    report = {
+        "benchmark": "frame_ring",
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "git": git_revision(),
+        "host": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "config": {
+            k: v for k, v in vars(args).items() if k not in ("output", "workers", "modes")
+        },
+        "results": results,
+    }
+    output = args.output or os.path.join(
+        RESULTS_DIR,
+        f"frame_ring-{time.strftime('%Y%m%d-%H%M%S')}-{report['git']['commit'][:8]}.json",
+    )
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n📄 Benchmark results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
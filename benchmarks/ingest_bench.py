@@ -0,0 +1,227 @@
+"""
+Peak memory of ingesting concurrent image responses, buffered vs streamed.
+
+Starts the mock proxy (serving the checked-in multi-megabyte scene PNGs) and,
+for each (ingest mode, response format) pair, runs a fresh subprocess that
+fetches --concurrency images at once and writes them to disk:
+
+    buffered   generate_openai_images_via_proxy -> BytesIO -> getvalue() -> file
+               (the ingest path before streaming)
+    streaming  generate_openai_images_via_proxy_to_files, which decodes
+               b64_json / downloads urls in chunks straight into the files
+
+Peak Python heap comes from tracemalloc. Peak RSS growth (the highest
+sampled RSS minus the RSS before the requests start; Linux only) comes from
+a second subprocess run without tracemalloc, whose own bookkeeping would
+inflate RSS. getrusage's ru_maxrss is no use here: the peak while importing
+the API clients is higher than anything ingest reaches.
+
+Run from the repository root:
+
+    python -m benchmarks.ingest_bench
+    python -m benchmarks.ingest_bench --concurrency 40 --formats b64_json
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from typing import Any, Dict, List
+
+from benchmarks.pipeline_bench import RESULTS_DIR, git_revision
+
+MODES = ["buffered", "streaming"]
+FORMATS = ["b64_json", "url"]
+RSS_SAMPLE_INTERVAL_S = 0.002
+
+
+def _current_rss() -> int:
+    with open("/proc/self/statm", "r", encoding="utf-8") as f:
+        return int(f.read().split()[1]) * resource.getpagesize()
+
+
+def _ingest_child(args: argparse.Namespace) -> Dict[str, Any]:
+    from slop_gen.utils import api_utils
+
+    api_utils.set_base_url(args.base_url)
+    mode, response_format = args.modes[0], args.formats[0]
+
+    def fetch(workdir: str, i: int) -> int:
+        if mode == "buffered":
+            images = api_utils.generate_openai_images_via_proxy(
+                prompt=f"scene {i}", response_format=response_format
+            )
+            data = images[0].getvalue()
+            with open(os.path.join(workdir, f"image_{i}.png"), "wb") as f:
+                f.write(data)
+            return len(data)
+        paths = api_utils.generate_openai_images_via_proxy_to_files(
+            prompt=f"scene {i}",
+            path_for=lambda n: os.path.join(workdir, f"image_{i}_{n}.png"),
+            response_format=response_format,
+        )
+        return os.path.getsize(paths[0])
+
+    sizes: List[int] = []
+    errors: List[str] = []
+    baseline_rss = peak_rss = _current_rss()
+    done = threading.Event()
+
+    def sample_rss() -> None:
+        nonlocal peak_rss
+        while not done.is_set():
+            peak_rss = max(peak_rss, _current_rss())
+            done.wait(RSS_SAMPLE_INTERVAL_S)
+
+    sampler = threading.Thread(target=sample_rss, daemon=True)
+    if args.measure == "heap":
+        tracemalloc.start()
+    else:
+        sampler.start()
+    with tempfile.TemporaryDirectory(prefix="slop_ingestbench_") as workdir:
+
+        def run(i: int) -> None:
+            try:
+                sizes.append(fetch(workdir, i))
+            except Exception as e:  # counted in the results rather than raised
+                errors.append(str(e))
+
+        t0 = time.perf_counter()
+        threads = [
+            threading.Thread(target=run, args=(i,)) for i in range(args.concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        wall_s = time.perf_counter() - t0
+    done.set()
+    result: Dict[str, Any] = {
+        "images_mb": round(sum(sizes) / 2**20, 1),
+        "errors": len(errors),
+        "wall_s": round(wall_s, 3),
+    }
+    if args.measure == "heap":
+        _, peak_heap = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        result["peak_heap_mb"] = round(peak_heap / 2**20, 1)
+    else:
+        sampler.join()
+        result["peak_rss_growth_mb"] = round((peak_rss - baseline_rss) / 2**20, 1)
+    return result
+
+
+def _run_child(
+    args: argparse.Namespace, base_url: str, mode: str, fmt: str, measure: str
+) -> Dict[str, Any]:
+    cmd = [
+        sys.executable,
+        "-m",
+        "benchmarks.ingest_bench",
+        "--child",
+        "--base-url",
+        base_url,
+        "--modes",
+        mode,
+        "--formats",
+        fmt,
+        "--concurrency",
+        str(args.concurrency),
+        "--measure",
+        measure,
+    ]
+    proc = subprocess.run(cmd, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"Ingest subprocess failed:\n{proc.stderr[-2000:]}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def _run_one(
+    args: argparse.Namespace, base_url: str, mode: str, fmt: str
+) -> Dict[str, Any]:
+    heap = _run_child(args, base_url, mode, fmt, "heap")
+    rss = _run_child(args, base_url, mode, fmt, "rss")
+    return {
+        "mode": mode,
+        "format": fmt,
+        "concurrency": args.concurrency,
+        "images_mb": rss["images_mb"],
+        "errors": heap["errors"] + rss["errors"],
+        "wall_s": rss["wall_s"],
+        "peak_heap_mb": heap["peak_heap_mb"],
+        "peak_rss_growth_mb": rss["peak_rss_growth_mb"],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark image ingest memory.")
+    parser.add_argument("--modes", choices=MODES, nargs="+", default=MODES)
+    parser.add_argument("--formats", choices=FORMATS, nargs="+", default=FORMATS)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--output", type=str, default=None, help="Results JSON path")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--base-url", type=str, default=None, help=argparse.SUPPRESS)
+    parser.add_argument(
+        "--measure", choices=["heap", "rss"], default="heap", help=argparse.SUPPRESS
+    )
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(_ingest_child(args)))
+        return
+
+    from slop_gen.utils.mock_proxy import start_mock_proxy
+
+    server = start_mock_proxy(latency=args.latency)
+    results: List[Dict[str, Any]] = []
+    try:
+        for fmt in args.formats:
+            for mode in args.modes:
+                print(f"\n⏱️ Ingest benchmark: {args.concurrency} x {fmt}, {mode}")
+                result = _run_one(args, server.base_url, mode, fmt)
+                results.append(result)
+                print(
+                    f"  peak heap {result['peak_heap_mb']} MB, "
+                    f"peak RSS growth {result['peak_rss_growth_mb']} MB "
+                    f"for {result['images_mb']} MB of images, {result['wall_s']}s"
+                    + (f", {result['errors']} errors" if result["errors"] else "")
+                )
+    finally:
+        server.shutdown()
+
+    report = {
+        "benchmark": "ingest",
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "git": git_revision(),
+        "host": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "config": {
+            k: v
+            for k, v in vars(args).items()
+            if k not in ("output", "modes", "formats", "child", "base_url", "measure")
+        },
+        "results": results,
+    }
+    output = args.output or os.path.join(
+        RESULTS_DIR,
+        f"ingest-{time.strftime('%Y%m%d-%H%M%S')}-{report['git']['commit'][:8]}.json",
+    )
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n📄 Benchmark results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""
+Peak memory and open file handles of a render, by story length.
+
+Each (scene count, render mode) pair renders the checked-in scene assets,
+cycled to the requested length, in a fresh subprocess, so peak RSS is not
+polluted by earlier runs. "compose" is the default single concatenated clip,
+"streaming" is create_video_from_assets(streaming=True). Peak RSS comes from
+getrusage of the render process; open file descriptors and live child
+processes (ffmpeg readers/writers) are sampled while rendering.
+
+The image pyramid cache and audio metadata index live in temporary
+directories, not assets/cache. With --cache cold (the default) each render
+starts from empty ones; with --cache warm an untimed render first fills them,
+so the measured render only reads cached levels and probes.
+
+Run from the repository root:
+
+    python -m benchmarks.memory_bench
+    python -m benchmarks.memory_bench --scenes 10 50 --modes streaming --height 720
+    python -m benchmarks.memory_bench --cache warm
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from benchmarks.pipeline_bench import CACHE_MODES, RESULTS_DIR, git_revision
+
+DEFAULT_SCENE_COUNTS = [10, 50, 200]
+MODES = ["compose", "streaming"]
+SAMPLE_INTERVAL_S = 0.2
+
+
+def _count_entries(path: str) -> int:
+    try:
+        return len(os.listdir(path))
+    except OSError:
+        return -1
+
+
+def _child_pids() -> int:
+    """Live direct children of this process (ffmpeg readers/writers), Linux only."""
+    path = f"/proc/{os.getpid()}/task/{os.getpid()}/children"
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return len(f.read().split())
+    except OSError:
+        return -1
+
+
+def _render_child(args: argparse.Namespace) -> Dict[str, Any]:
+    from benchmarks.pipeline_bench import MUSIC_FILE, bench_caches, canned_scene_assets
+    from slop_gen.generators.story_gen.video import create_video_from_assets
+
+    peaks = {"open_fds": 0, "child_processes": 0}
+    done = threading.Event()
+
+    def sample() -> None:
+        while not done.is_set():
+            peaks["open_fds"] = max(peaks["open_fds"], _count_entries("/proc/self/fd"))
+            peaks["child_processes"] = max(peaks["child_processes"], _child_pids())
+            done.wait(SAMPLE_INTERVAL_S)
+
+    image_paths, audio_paths, texts = canned_scene_assets(args.scenes[0])
+    random.seed(args.seed)
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    with tempfile.TemporaryDirectory(prefix="slop_membench_") as workdir:
+        with bench_caches(args.cache_dir or os.path.join(workdir, "cache")):
+            t0 = time.perf_counter()
+            create_video_from_assets(
+                image_paths=image_paths,
+                audio_paths=audio_paths,
+                scene_texts=texts,
+                output_path=os.path.join(workdir, "bench.mp4"),
+                fps=args.fps,
+                height=args.height,
+                music_path=None if args.no_music else MUSIC_FILE,
+                streaming=args.modes[0] == "streaming",
+            )
+            wall_s = time.perf_counter() - t0
+    done.set()
+    sampler.join()
+
+    # ru_maxrss is in KiB on Linux and bytes on macOS.
+    unit = 1 if sys.platform == "darwin" else 1024
+    return {
+        "scenes": args.scenes[0],
+        "mode": args.modes[0],
+        "wall_s": round(wall_s, 3),
+        "peak_rss_mb": round(
+            resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * unit / 2**20, 1
+        ),
+        **peaks,
+    }
+
+
+def _run_one(
+    args: argparse.Namespace, num_scenes: int, mode: str, cache_dir: Optional[str]
+) -> Dict[str, Any]:
+    cmd = [
+        sys.executable,
+        "-m",
+        "benchmarks.memory_bench",
+        "--child",
+        "--scenes",
+        str(num_scenes),
+        "--modes",
+        mode,
+        "--height",
+        str(args.height),
+        "--fps",
+        str(args.fps),
+        "--seed",
+        str(args.seed),
+    ]
+    if args.no_music:
+        cmd.append("--no-music")
+    if cache_dir:
+        cmd += ["--cache-dir", cache_dir]
+    proc = subprocess.run(cmd, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"Render subprocess failed:\n{proc.stderr[-2000:]}")
+    # The child prints render progress too; its result is the last line.
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark render memory by story length.")
+    parser.add_argument("--scenes", type=int, nargs="+", default=DEFAULT_SCENE_COUNTS)
+    parser.add_argument("--modes", choices=MODES, nargs="+", default=MODES)
+    parser.add_argument("--height", type=int, default=480)
+    parser.add_argument("--fps", type=int, default=12)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-music", action="store_true")
+    parser.add_argument("--output", type=str, default=None, help="Results JSON path")
+    parser.add_argument(
+        "--cache",
+        choices=CACHE_MODES,
+        default="cold",
+        help="cold: empty image/audio caches per render; warm: measure a second render",
+    )
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--cache-dir", type=str, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(_render_child(args)))
+        return
+
+    results: List[Dict[str, Any]] = []
+    for num_scenes in args.scenes:
+        for mode in args.modes:
+            print(
+                f"\n⏱️ Memory benchmark: {num_scenes} scenes, {mode} render "
+                f"({args.cache} cache)"
+            )
+            with tempfile.TemporaryDirectory(prefix="slop_membench_cache_") as shared:
+                cache_dir = shared if args.cache == "warm" else None
+                if cache_dir:
+                    _run_one(args, num_scenes, mode, cache_dir)  # warm-up, not reported
+                result = _run_one(args, num_scenes, mode, cache_dir)
+            results.append(result)
+            print(
+                f"  peak RSS {result['peak_rss_mb']} MB, {result['open_fds']} fds, "
+                f"{result['child_processes']} child processes, {result['wall_s']}s"
+            )
+
+    report = {
+        "benchmark": "memory",
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "git": git_revision(),
+        "host": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "config": {
+            k: v
+            for k, v in vars(args).items()
+            if k not in ("output", "scenes", "modes", "child", "cache_dir")
+        },
+        "results": results,
+    }
+    output = args.output or os.path.join(
+        RESULTS_DIR,
+        f"memory-{time.strftime('%Y%m%d-%H%M%S')}-{report['git']['commit'][:8]}.json",
+    )
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n📄 Benchmark results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,393 @@
+"""
+Reproducible end-to-end and per-stage benchmark of the story pipeline.
+
+Generation stages run against the in-process stand-in proxy (canned images,
+audio and chat responses with configurable latency), or with --proxy server
+against the local HTTP mock in slop_gen.utils.mock_proxy, which also exercises
+the real request code and can inject 5xx/429 responses. Rendering uses the
+real create_video_from_assets. Every run writes into a temporary directory, so the
+checked-in assets are never touched. Results are written as JSON so runs from
+different commits can be diffed.
+
+The image pyramid cache and the audio metadata index are kept out of
+assets/cache too. With --cache cold (the default) every run starts from empty
+ones in its temporary directory and pays for decoding, scaling and probing;
+with --cache warm each configuration is first run once, untimed, to fill a
+cache shared by this invocation, and only the second run is measured.
+
+Run from the repository root:
+
+    python -m benchmarks.pipeline_bench
+    python -m benchmarks.pipeline_bench --scenes 5 20 --heights 720 --image-latency 2
+    python -m benchmarks.pipeline_bench --mode render --scenes 5
+    python -m benchmarks.pipeline_bench --proxy server --rate-limit-rate 0.1
+    python -m benchmarks.pipeline_bench --mode render --cache warm
+"""
+
+import argparse
+import asyncio
+import glob
+import json
+import os
+import platform
+import random
+import subprocess
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Any, ContextManager, Dict, Iterator, List, Optional, Tuple
+
+from benchmarks.stand_in import (
+    CANNED_AUDIO_GLOB,
+    CANNED_IMAGE_GLOB,
+    StandInProxy,
+    asset_sort_key,
+    ensure_dummy_api_key,
+)
+
+ensure_dummy_api_key()
+
+from moviepy.editor import VideoFileClip  # noqa: E402
+
+from slop_gen.generators.story_gen.audio import generate_audio_for_scenes  # noqa: E402
+from slop_gen.generators.story_gen.images import (  # noqa: E402
+    IMAGE_CANDIDATES,
+    generate_images_for_scenes,
+)
+from slop_gen.generators.story_gen.planning import (  # noqa: E402
+    Parameters,
+    PostProcessing,
+    generate_high_level_plan,
+)
+from slop_gen.generators.story_gen.scene_gen import generate_all_scenes  # noqa: E402
+from slop_gen.generators.story_gen.video import create_video_from_assets  # noqa: E402
+from slop_gen.utils import api_utils  # noqa: E402
+from slop_gen.utils.audio_probe import AudioMetadataIndex, set_audio_index  # noqa: E402
+from slop_gen.utils.image_cache import ImagePyramidCache, set_image_cache  # noqa: E402
+from slop_gen.utils.instrumentation import Tracer, span, start_run  # noqa: E402
+from slop_gen.utils.mock_proxy import start_mock_proxy  # noqa: E402
+
+RESULTS_DIR = "benchmarks/results"
+MUSIC_FILE = "assets/music/house_stark_theme.mp3"
+DEFAULT_SCENE_COUNTS = [5, 20, 100]
+DEFAULT_HEIGHTS = [720, 1080]
+STAGES = ["plan", "scenes", "images", "audio", "render"]
+CACHE_MODES = ["cold", "warm"]
+
+
+def git_revision() -> Dict[str, Any]:
+    def git(*args: str) -> str:
+        return subprocess.run(
+            ["git", *args], capture_output=True, text=True, check=False
+        ).stdout.strip()
+
+    return {"commit": git("rev-parse", "HEAD"), "dirty": bool(git("status", "--porcelain"))}
+
+
+def canned_scene_assets(num_scenes: int):
+    """Cycles the checked-in scene images/audio to build a story of any length."""
+    images = sorted(glob.glob(CANNED_IMAGE_GLOB), key=asset_sort_key)
+    audio = sorted(glob.glob(CANNED_AUDIO_GLOB), key=asset_sort_key)
+    image_paths = [images[i % len(images)] for i in range(num_scenes)]
+    audio_paths: List[Optional[str]] = [audio[i % len(audio)] for i in range(num_scenes)]
+    texts = [f"Narration for scene {i + 1}." for i in range(num_scenes)]
+    return image_paths, audio_paths, texts
+
+
+def _render(
+    image_paths, audio_paths, texts, output_path, height, fps, seed, music, preview
+):
+    # Seed effects and the music offset so the same frames get rendered every run.
+    random.seed(seed)
+    with span("stage.render", scenes=len(image_paths), height=height):
+        create_video_from_assets(
+            image_paths=image_paths,
+            audio_paths=audio_paths,
+            scene_texts=texts,
+            output_path=output_path,
+            fps=fps,
+            height=height,
+            music_path=MUSIC_FILE if music else None,
+            post_processing_effects=[PostProcessing.PAN],
+            preview=preview,
+            effect_seed=seed,
+        )
+
+
+@contextmanager
+def bench_caches(cache_dir: str) -> Iterator[None]:
+    """
+    Points the process-wide image pyramid cache and audio metadata index at
+    `cache_dir` for the duration of the block, instead of assets/cache.
+    """
+    previous_cache = set_image_cache(
+        ImagePyramidCache(os.path.join(cache_dir, "image_pyramids"))
+    )
+    previous_index = set_audio_index(
+        AudioMetadataIndex(os.path.join(cache_dir, "audio_metadata.json"))
+    )
+    try:
+        yield
+    finally:
+        set_image_cache(previous_cache)
+        set_audio_index(previous_index)
+
+
+@contextmanager
+def mock_proxy_server(args: argparse.Namespace) -> Iterator[None]:
+    """Runs the HTTP mock proxy and points api_utils at it for the duration of the block."""
+    server = start_mock_proxy(
+        image_latency=args.image_latency,
+        tts_latency=args.tts_latency,
+        chat_latency=args.chat_latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        seed=args.seed,
+    )
+    original_base_url = api_utils.OPENAI_BASE_URL
+    api_utils.set_base_url(server.base_url)
+    try:
+        yield
+    finally:
+        api_utils.set_base_url(original_base_url)
+        server.shutdown()
+        server.server_close()
+
+
+def _proxy_for(args: argparse.Namespace, num_scenes: int) -> ContextManager:
+    if args.proxy == "server":
+        return mock_proxy_server(args)
+    return StandInProxy(
+        num_scenes,
+        image_latency=args.image_latency,
+        tts_latency=args.tts_latency,
+        chat_latency=args.chat_latency,
+        jitter=args.jitter,
+        seed=args.seed,
+    ).installed()
+
+
+async def run_pipeline(
+    proxy: ContextManager,
+    num_scenes: int,
+    workdir: str,
+    height: int,
+    fps: int,
+    seed: int,
+    music: bool,
+    preview: bool,
+    image_candidates: int = IMAGE_CANDIDATES,
+) -> str:
+    """The video_generator.main flow, pointed at `workdir` and a local proxy."""
+    # One paragraph per scene; the HTTP mock cuts scenes along paragraph breaks.
+    story = "\n\n".join(f"Narration for scene {k + 1}." for k in range(num_scenes))
+    parameters: Parameters = {
+        "story": story,
+        "director_prompt": "Fantasy oil painting style",
+        "character_design": None,
+        "video_gen": False,
+        "music": music,
+        "music_file": MUSIC_FILE,
+        "post_processing": [PostProcessing.PAN],
+        "music_volume": 0.8,
+        "high_level_plan": None,
+        "scene_descriptions": None,
+        "image_paths": None,
+        "audio_voice": "echo",
+        "preview": preview,
+    }
+    output_path = os.path.join(workdir, "output", "bench.mp4")
+
+    with proxy:
+        with span("stage.plan"):
+            parameters["high_level_plan"] = generate_high_level_plan(parameters)
+        with span("stage.scenes"):
+            scenes = generate_all_scenes(
+                story=parameters["story"],
+                high_level_plan=parameters["high_level_plan"],
+                num_scenes_per_iteration=3,
+                max_iterations=num_scenes,  # enough batches for any story length
+            )
+        scene_descriptions = [scene.model_dump() for scene in scenes]
+        with span("stage.images", scenes=len(scene_descriptions)):
+            image_paths = await generate_images_for_scenes(
+                scene_descriptions=scene_descriptions,
+                base_output_dir=os.path.join(workdir, "images"),
+                candidates=image_candidates,
+            )
+        with span("stage.audio", scenes=len(scene_descriptions)):
+            audio_paths = generate_audio_for_scenes(
+                scene_descriptions=scene_descriptions,
+                output_dir=os.path.join(workdir, "audio"),
+            )
+
+    texts = [scene["text"] for scene in scene_descriptions]
+    _render(
+        image_paths, audio_paths, texts, output_path, height, fps, seed, music, preview
+    )
+    return output_path
+
+
+def _video_frames(path: str, fps: int) -> int:
+    if not os.path.exists(path):
+        return 0
+    clip = VideoFileClip(path)
+    try:
+        return int(round(clip.duration * fps))
+    finally:
+        clip.close()
+
+
+def summarize(
+    tracer: Tracer, num_scenes: int, height: int, fps: int, wall_s: float, frames: int
+) -> Dict[str, Any]:
+    totals = tracer.aggregate()
+    stages: Dict[str, Dict[str, float]] = {}
+    for stage in STAGES:
+        entry = totals.get(f"stage.{stage}")
+        if not entry:
+            continue
+        stage_wall = entry["wall_s"]
+        stages[stage] = {"wall_s": round(stage_wall, 4)}
+        if stage in ("images", "audio") and stage_wall > 0:
+            stages[stage]["scenes_per_s"] = round(num_scenes / stage_wall, 3)
+        if stage == "render" and stage_wall > 0:
+            stages[stage]["frames_per_s"] = round(frames / stage_wall, 2)
+    calls = {
+        name: {"count": int(entry["count"]), "wall_s": round(entry["wall_s"], 4)}
+        for name, entry in totals.items()
+        if not name.startswith("stage.")
+    }
+    return {
+        "scenes": num_scenes,
+        "height": height,
+        "fps": fps,
+        "frames": frames,
+        "wall_s": round(wall_s, 4),
+        "stages": stages,
+        "calls": calls,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the story pipeline.")
+    parser.add_argument("--scenes", type=int, nargs="+", default=DEFAULT_SCENE_COUNTS)
+    parser.add_argument("--heights", type=int, nargs="+", default=DEFAULT_HEIGHTS)
+    parser.add_argument("--fps", type=int, default=24)
+    parser.add_argument(
+        "--mode",
+        choices=["pipeline", "render"],
+        default="pipeline",
+        help="pipeline: all stages via the stand-in proxy; render: rendering only, from canned assets",
+    )
+    parser.add_argument(
+        "--proxy",
+        choices=["stand-in", "server"],
+        default="stand-in",
+        help="stand-in: patch the API helpers in-process; server: run the HTTP mock proxy",
+    )
+    parser.add_argument("--error-rate", type=float, default=0.0, help="server only")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="server only")
+    parser.add_argument("--image-latency", type=float, default=1.0)
+    parser.add_argument("--tts-latency", type=float, default=0.3)
+    parser.add_argument("--chat-latency", type=float, default=0.5)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument(
+        "--image-candidates",
+        type=int,
+        default=IMAGE_CANDIDATES,
+        help="Images requested per scene (pipeline mode)",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-music", action="store_true")
+    parser.add_argument("--preview", action="store_true", help="Preview-quality render")
+    parser.add_argument("--output", type=str, default=None, help="Results JSON path")
+    parser.add_argument(
+        "--cache",
+        choices=CACHE_MODES,
+        default="cold",
+        help="cold: empty image/audio caches per run; warm: measure a second, cached run",
+    )
+    args = parser.parse_args()
+
+    def run_once(
+        num_scenes: int, height: int, cache_dir: Optional[str]
+    ) -> Tuple[float, int]:
+        """One timed run; without `cache_dir` it gets empty caches in its workdir."""
+        with tempfile.TemporaryDirectory(prefix="slop_bench_") as workdir:
+            with bench_caches(cache_dir or os.path.join(workdir, "cache")):
+                t0 = time.perf_counter()
+                if args.mode == "pipeline":
+                    output_path = asyncio.run(
+                        run_pipeline(
+                            _proxy_for(args, num_scenes),
+                            num_scenes,
+                            workdir,
+                            height,
+                            args.fps,
+                            args.seed,
+                            not args.no_music,
+                            args.preview,
+                            args.image_candidates,
+                        )
+                    )
+                else:
+                    output_path = os.path.join(workdir, "bench.mp4")
+                    _render(
+                        *canned_scene_assets(num_scenes),
+                        output_path,
+                        height,
+                        args.fps,
+                        args.seed,
+                        not args.no_music,
+                        args.preview,
+                    )
+                wall_s = time.perf_counter() - t0
+            return wall_s, _video_frames(output_path, args.fps)
+
+    results = []
+    for num_scenes in args.scenes:
+        for height in args.heights:
+            print(
+                f"\n⏱️ Benchmark: {num_scenes} scenes at {height}p "
+                f"({args.mode}, {args.cache} cache)"
+            )
+            with tempfile.TemporaryDirectory(prefix="slop_bench_cache_") as shared:
+                cache_dir = shared if args.cache == "warm" else None
+                if cache_dir:
+                    start_run(None)  # the warm-up run is not reported
+                    run_once(num_scenes, height, cache_dir)
+                tracer = start_run(f"bench-{args.mode}-{num_scenes}x{height}")
+                wall_s, frames = run_once(num_scenes, height, cache_dir)
+            result = summarize(tracer, num_scenes, height, args.fps, wall_s, frames)
+            results.append(result)
+            print(tracer.summary())
+
+    report = {
+        "benchmark": "pipeline",
+        "mode": args.mode,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "git": git_revision(),
+        "host": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "config": {
+            k: v for k, v in vars(args).items() if k not in ("output", "scenes", "heights")
+        },
+        "results": results,
+    }
+    output = args.output or os.path.join(
+        RESULTS_DIR,
+        f"pipeline-{args.mode}-{time.strftime('%Y%m%d-%H%M%S')}-{report['git']['commit'][:8]}.json",
+    )
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n📄 Benchmark results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
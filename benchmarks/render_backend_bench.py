@@ -0,0 +1,191 @@
+"""
+Render throughput of the moviepy and ffmpeg backends, and how closely their
+frames match.
+
+Both backends render the checked-in scene assets, cycled to the requested
+length, with the same effect plan (every effect, seeded) and narration, so
+the outputs are comparable frame by frame. Throughput is output frames per
+second of wall time, including the x264/AAC encode; the parity columns
+compare every decoded ffmpeg frame with the moviepy frame at the same index
+(mean absolute difference in 0-255 levels, and PSNR over all frames).
+
+Run from the repository root:
+
+    python -m benchmarks.render_backend_bench
+    python -m benchmarks.render_backend_bench --scenes 10 50 --height 720 --preview
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+from itertools import zip_longest
+from typing import Any, Dict, Iterator, List
+
+import numpy as np
+from moviepy.config import get_setting
+
+from benchmarks.pipeline_bench import (
+    MUSIC_FILE,
+    RESULTS_DIR,
+    canned_scene_assets,
+    git_revision,
+)
+
+DEFAULT_SCENE_COUNTS = [10, 50]
+BACKENDS = ["moviepy", "ffmpeg"]
+
+
+def _frames(path: str, width: int, height: int) -> Iterator[np.ndarray]:
+    """Decoded RGB frames of the video at `path`, one at a time."""
+    proc = subprocess.Popen(
+        [get_setting("FFMPEG_BINARY"), "-v", "error", "-i", path]
+        + ["-f", "rawvideo", "-pix_fmt", "rgb24", "-"],
+        stdout=subprocess.PIPE,
+    )
+    frame_bytes = width * height * 3
+    try:
+        while True:
+            data = proc.stdout.read(frame_bytes)
+            if len(data) < frame_bytes:
+                return
+            yield np.frombuffer(data, np.uint8).reshape(height, width, 3)
+    finally:
+        proc.stdout.close()
+        proc.wait()
+
+
+def frame_parity(reference: str, candidate: str, width: int, height: int) -> Dict[str, Any]:
+    """Per-frame differences between two renders of the same timeline."""
+    diffs, mses = [], []
+    counts = [0, 0]
+    pairs = zip_longest(_frames(reference, width, height), _frames(candidate, width, height))
+    for a, b in pairs:
+        counts[0] += a is not None
+        counts[1] += b is not None
+        if a is None or b is None:
+            continue
+        diff = np.abs(a.astype(np.int16) - b)
+        diffs.append(float(diff.mean()))
+        mses.append(float((diff.astype(np.float64) ** 2).mean()))
+    return {
+        "frames": counts,
+        "mean_abs_diff": round(float(np.mean(diffs)), 3),
+        "p95_abs_diff": round(float(np.percentile(diffs, 95)), 3),
+        "psnr_db": round(float(10 * np.log10(255**2 / max(np.mean(mses), 1e-12))), 2),
+    }
+
+
+def run(args: argparse.Namespace, num_scenes: int, workdir: str) -> List[Dict[str, Any]]:
+    from slop_gen.generators.story_gen.effect_plan import plan_effects
+    from slop_gen.generators.story_gen.video import (
+        EFFECTS_BY_NAME,
+        PREVIEW_MAX_FPS,
+        PREVIEW_MAX_HEIGHT,
+        create_video_from_assets,
+        probe_segment_durations,
+    )
+
+    image_paths, audio_paths, texts = canned_scene_assets(num_scenes)
+    plan = plan_effects(
+        probe_segment_durations(audio_paths, 3.0), args.seed, list(EFFECTS_BY_NAME)
+    )
+    height, fps = args.height, args.fps
+    if args.preview:
+        height, fps = min(height, PREVIEW_MAX_HEIGHT), min(fps, PREVIEW_MAX_FPS)
+    width = int(round(height * 9 / 16))
+    width += width % 2
+
+    results, outputs = [], {}
+    for backend in args.backends:
+        outputs[backend] = os.path.join(workdir, f"{backend}_{num_scenes}.mp4")
+        t0 = time.perf_counter()
+        create_video_from_assets(
+            image_paths=image_paths,
+            audio_paths=audio_paths,
+            scene_texts=texts,
+            output_path=outputs[backend],
+            fps=fps,
+            height=height,
+            music_path=None if args.no_music else MUSIC_FILE,
+            post_processing_effects=[],  # moviepy captions need ImageMagick
+            preview=args.preview,
+            effect_plan=plan,
+            backend=backend,
+        )
+        wall_s = time.perf_counter() - t0
+        frames = sum(1 for _ in _frames(outputs[backend], width, height))
+        results.append(
+            {
+                "scenes": num_scenes,
+                "backend": backend,
+                "wall_s": round(wall_s, 3),
+                "frames": frames,
+                "fps": round(frames / wall_s, 1) if wall_s else None,
+            }
+        )
+    if set(BACKENDS) <= set(outputs):
+        parity = frame_parity(outputs["moviepy"], outputs["ffmpeg"], width, height)
+        for result in results:
+            result["parity_vs_moviepy"] = parity
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark render backends.")
+    parser.add_argument("--scenes", type=int, nargs="+", default=DEFAULT_SCENE_COUNTS)
+    parser.add_argument("--backends", choices=BACKENDS, nargs="+", default=BACKENDS)
+    parser.add_argument("--height", type=int, default=480)
+    parser.add_argument("--fps", type=int, default=12)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--preview", action="store_true", help="ultrafast x264 preset")
+    parser.add_argument("--no-music", action="store_true")
+    parser.add_argument("--output", type=str, default=None, help="Results JSON path")
+    args = parser.parse_args()
+
+    results: List[Dict[str, Any]] = []
+    with tempfile.TemporaryDirectory(prefix="slop_backendbench_") as workdir:
+        for num_scenes in args.scenes:
+            print(f"\n⏱️ Render backend benchmark: {num_scenes} scenes")
+            for result in run(args, num_scenes, workdir):
+                results.append(result)
+                print(
+                    f"  {result['backend']}: {result['frames']} frames in "
+                    f"{result['wall_s']}s ({result['fps']} fps)"
+                )
+            parity = results[-1].get("parity_vs_moviepy")
+            if parity:
+                print(
+                    f"  ffmpeg vs moviepy: mean abs diff {parity['mean_abs_diff']}, "
+                    f"p95 {parity['p95_abs_diff']}, PSNR {parity['psnr_db']} dB"
+                )
+
+    report = {
+        "benchmark": "render_backend",
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "git": git_revision(),
+        "host": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "config": {
+            k: v for k, v in vars(args).items() if k not in ("output", "scenes", "backends")
+        },
+        "results": results,
+    }
+    output = args.output or os.path.join(
+        RESULTS_DIR,
+        f"render_backend-{time.strftime('%Y%m%d-%H%M%S')}-{report['git']['commit'][:8]}.json",
+    )
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n📄 Benchmark results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+In-process stand-in for the Cornell proxy, used by the benchmarks.
+
+Replaces the network helpers the story_gen modules imported from
+slop_gen.utils.api_utils with canned responses: images and audio are read
+from the checked-in assets/generated_images and assets/generated_audio, chat
+calls return a fixed plan and synthetic SceneList batches. Every call sleeps
+for a configurable latency so generation stages behave like real round-trips.
+"""
+
+import glob
+import importlib
+import os
+import random
+import re
+import time
+from contextlib import contextmanager
+from io import BytesIO
+from typing import Iterator, List, Optional, Tuple
+
+CANNED_IMAGE_GLOB = "assets/generated_images/scene_*.png"
+CANNED_AUDIO_GLOB = "assets/generated_audio/scene_audio_*.mp3"
+
+CANNED_PLAN = """# Visual Style
+Muted oil painting, heavy shadows.
+# Visual Flow
+Slow pushes in on each beat.
+# Major Scenes Breakdown
+One image per narration line.
+# Character Design
+A lone traveller in a grey cloak."""
+
+# (module, attribute) pairs the stand-in swaps out while installed.
+PATCH_TARGETS: List[Tuple[str, str]] = [
+    ("slop_gen.generators.story_gen.images", "generate_images_with_imagen_to_files"),
+    (
+        "slop_gen.generators.story_gen.images",
+        "generate_openai_images_via_proxy_to_files",
+    ),
+    ("slop_gen.generators.story_gen.audio", "text_to_speech"),
+    ("slop_gen.generators.story_gen.planning", "openai_chat_api"),
+    ("slop_gen.generators.story_gen.scene_gen", "openai_chat_api_structured"),
+]
+
+
+def asset_sort_key(path: str) -> int:
+    """Sorts scene_2.png before scene_10.png."""
+    match = re.search(r"(\d+)\.\w+$", path)
+    return int(match.group(1)) if match else 0
+
+
+class StandInProxy:
+    """Canned, latency-injecting replacements for the proxy-backed API helpers."""
+
+    def __init__(
+        self,
+        num_scenes: int,
+        image_latency: float = 0.0,
+        tts_latency: float = 0.0,
+        chat_latency: float = 0.0,
+        jitter: float = 0.0,
+        seed: int = 0,
+    ) -> None:
+        self.num_scenes = num_scenes
+        self.image_latency = image_latency
+        self.tts_latency = tts_latency
+        self.chat_latency = chat_latency
+        self.jitter = jitter
+        self._rng = random.Random(seed)
+        image_files = sorted(glob.glob(CANNED_IMAGE_GLOB), key=asset_sort_key)
+        audio_files = sorted(glob.glob(CANNED_AUDIO_GLOB), key=asset_sort_key)
+        if not image_files or not audio_files:
+            raise FileNotFoundError(
+                "Canned assets not found; run the benchmarks from the repository root."
+            )
+        self._images = [open(p, "rb").read() for p in image_files]
+        self._audio = [open(p, "rb").read() for p in audio_files]
+        self._image_calls = 0
+        self._tts_calls = 0
+
+    def _sleep(self, latency: float) -> None:
+        if latency > 0 or self.jitter > 0:
+            time.sleep(max(0.0, latency + self._rng.uniform(-self.jitter, self.jitter)))
+
+    # --- replacements, signatures mirror slop_gen.utils.api_utils ---
+
+    def generate_images(self, prompt, *args, **kwargs) -> List[BytesIO]:
+        self._sleep(self.image_latency)
+        count = kwargs.get("number_of_images", kwargs.get("n", 1)) or 1
+        images = []
+        for _ in range(count):
+            images.append(BytesIO(self._images[self._image_calls % len(self._images)]))
+            self._image_calls += 1
+        return images
+
+    def generate_images_to_files(self, prompt, path_for, *args, **kwargs) -> List[str]:
+        paths = []
+        for n, image in enumerate(self.generate_images(prompt, *args, **kwargs)):
+            with open(path_for(n), "wb") as f:
+                f.write(image.getbuffer())
+            paths.append(path_for(n))
+        return paths
+
+    def text_to_speech(self, text: str, *args, **kwargs) -> bytes:
+        self._sleep(self.tts_latency)
+        audio = self._audio[self._tts_calls % len(self._audio)]
+        self._tts_calls += 1
+        return audio
+
+    def openai_chat_api(self, messages, **kwargs) -> str:
+        self._sleep(self.chat_latency)
+        return CANNED_PLAN
+
+    def openai_chat_api_structured(self, messages, *, response_format=None, **kwargs):
+        from slop_gen.generators.story_gen.scene_gen import SceneDescription, SceneList
+
+        self._sleep(self.chat_latency)
+        prompt = messages[-1]["content"]
+        existing = len(re.findall(r"^\s*Scene \d+ Text:", prompt, flags=re.MULTILINE))
+        batch_match = re.search(r"generate up to (\d+) new scenes", prompt)
+        batch = int(batch_match.group(1)) if batch_match else 3
+
+        end = min(self.num_scenes, existing + batch)
+        scenes = [
+            SceneDescription(
+                text=f"Narration for scene {k + 1}.",
+                description=f"Oil painting of beat {k + 1}, a lone traveller in a grey cloak.",
+            )
+            for k in range(existing, end)
+        ]
+        if end >= self.num_scenes:
+            scenes.append(SceneDescription(text="DONE", description="DONE"))
+        return SceneList(scenes=scenes)
+
+    @contextmanager
+    def installed(self) -> Iterator["StandInProxy"]:
+        """Swaps the stand-in into the story_gen modules for the duration of the block."""
+        replacements = {
+            "generate_images_with_imagen_to_files": self.generate_images_to_files,
+            "generate_openai_images_via_proxy_to_files": self.generate_images_to_files,
+            "text_to_speech": self.text_to_speech,
+            "openai_chat_api": self.openai_chat_api,
+            "openai_chat_api_structured": self.openai_chat_api_structured,
+        }
+        originals: List[Tuple[object, str, Optional[object]]] = []
+        try:
+            for module_name, attr in PATCH_TARGETS:
+                module = importlib.import_module(module_name)
+                originals.append((module, attr, getattr(module, attr, None)))
+                setattr(module, attr, replacements[attr])
+            yield self
+        finally:
+            for module, attr, original in reversed(originals):
+                setattr(module, attr, original)
+
+
+def ensure_dummy_api_key() -> None:
+    """api_utils builds an OpenAI client at import time, which needs some key set."""
+    os.environ.setdefault("OPENAI_API_KEY", "stand-in")
@@ -12,6 +12,10 @@ from moviepy.editor import (
 )
 from moviepy.config import change_settings
 
+from slop_gen.generators.story_gen.pcm_audio import open_narration
+from slop_gen.utils.audio_probe import get_audio_index
+from slop_gen.utils.image_cache import ImagePyramidCache, get_image_cache
+
 change_settings({"IMAGEMAGICK_BINARY": "magick"})
 
 
@@ -25,8 +29,13 @@ def create_video(
     music_path: str | None = None,
     music_volume: float = 0.4,
     wrap_width: int = 40,
+    image_cache: ImagePyramidCache | None = None,
 ) -> None:
     clips = []
+    if image_cache is None:
+        image_cache = get_image_cache()
+    # Durations come from the file headers, before any decoder is opened.
+    durations = get_audio_index().durations(audio_paths, 0.0)
 
     for i, (img_path, audio_path) in enumerate(zip(image_paths, audio_paths)):
         if not img_path or not audio_path:
@@ -34,13 +43,12 @@ def create_video(
             continue
 
         try:
-            audio_clip = AudioFileClip(audio_path)
-            duration = audio_clip.duration
+            duration = durations[i]
+            audio_clip = open_narration(audio_path)
 
             img_clip = (
-                ImageClip(img_path)
+                ImageClip(image_cache.get(img_path, height))
                 .set_duration(duration)
-                .resize(height=height)
                 .resize(lambda t: 1 + 0.2 * (t / duration))
             )
 
@@ -0,0 +1,409 @@
+"""
+Genre-agnostic video pipeline.
+
+Every genre is a StorySource that turns its inputs into scenes (narration
+text plus an image prompt). The engine then generates all scene images and
+all narration concurrently and renders them with story_gen's renderer:
+
+    await generate_video(StorySource.create("horror", num_lines=6), "out.mp4")
+
+or from the command line:
+
+    python -m slop_gen.generators.pipeline funny --output assets/output/funny.mp4
+"""
+
+import argparse
+import asyncio
+import os
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, List, Optional, Tuple, Type, TypedDict
+
+from slop_gen.generators.funny_gen.story import generate_funny_story
+from slop_gen.generators.horror_gen.story import generate_story
+from slop_gen.generators.story_gen.audio import generate_audio_for_scenes_async
+from slop_gen.generators.story_gen.images import (
+    IMAGE_CANDIDATES,
+    generate_images_for_scenes,
+)
+from slop_gen.generators.story_gen.planning import (
+    Parameters,
+    PostProcessing,
+    generate_high_level_plan,
+)
+from slop_gen.generators.story_gen.scene_gen import generate_all_scenes
+from slop_gen.generators.story_gen.video import (
+    PREVIEW_MAX_HEIGHT,
+    create_video_from_assets,
+)
+from slop_gen.utils.async_utils import run_sync
+from slop_gen.utils.instrumentation import span
+from slop_gen.utils.workspace import RunWorkspace, current_workspace
+
+# Each run gets its own workspace under assets/pipeline/<genre>/<run id>.
+DEFAULT_WORK_DIR = "assets/pipeline"
+# Short-form stories are a handful of lines, so this is usually all of them at once.
+DEFAULT_LINE_IMAGE_CONCURRENCY = 8
+DEFAULT_FRAME_HEIGHT = 1080  # create_video_from_assets' default height
+# Background music for the short-form genres; the one track the repo ships.
+DEFAULT_MUSIC_PATH = "assets/music/house_stark_theme.mp3"
+
+
+class RenderSettings(TypedDict, total=False):
+    """
+    Per-genre defaults for narration and rendering; any of them can be
+    overridden per call to generate_video.
+
+    voice: TTS voice (default "echo").
+    speed: Narration speed, <1.0 is slower.
+    music_path: Background music; skipped with a warning if the file is missing.
+    music_volume: Music volume, 1.0 is the renderer's default level.
+    post_processing: Effects passed to the renderer, e.g. [PostProcessing.CAPTION].
+    height: Output height in pixels.
+    fps: Output frame rate.
+    preview: Fast low-resolution draft render.
+    image_candidates: Images requested per scene, the best usable one kept
+        (default IMAGE_CANDIDATES; each one is a billed generation).
+    """
+
+    voice: Optional[str]
+    speed: float
+    music_path: Optional[str]
+    music_volume: Optional[float]
+    post_processing: List[PostProcessing]
+    height: int
+    fps: int
+    preview: bool
+    image_candidates: int
+
+
+class StorySource(ABC):
+    """
+    Produces the scenes of one video.
+
+    Subclasses implement `scenes()` and register under a genre name with
+    @story_source("name"); `render_defaults` holds the genre's look and voice.
+    """
+
+    name: str = ""
+    render_defaults: RenderSettings = {}
+
+    @abstractmethod
+    def scenes(self) -> List[Dict[str, str]]:
+        """Scenes as dicts with "text" (narration) and "description" (image prompt)."""
+
+    @staticmethod
+    def create(name: str, *args, **kwargs) -> "StorySource":
+        if name not in STORY_SOURCES:
+            raise ValueError(
+                f"Unknown story source '{name}'. Available: {', '.join(sorted(STORY_SOURCES))}"
+            )
+        return STORY_SOURCES[name](*args, **kwargs)
+
+
+STORY_SOURCES: Dict[str, Type[StorySource]] = {}
+
+
+def story_source(name: str) -> Callable[[Type[StorySource]], Type[StorySource]]:
+    """Class decorator registering a StorySource under `name`."""
+
+    def register(cls: Type[StorySource]) -> Type[StorySource]:
+        cls.name = name
+        STORY_SOURCES[name] = cls
+        return cls
+
+    return register
+
+
+def lines_to_scenes(lines: List[str], style: str = "") -> List[Dict[str, str]]:
+    """One scene per line, narrating the line and using it (plus `style`) as the image prompt."""
+    return [
+        {"text": line, "description": f"{style} {line}".strip()} for line in lines
+    ]
+
+
+@story_source("lines")
+class LinesSource(StorySource):
+    """A ready-made list of story lines, one scene each."""
+
+    render_defaults: RenderSettings = {
+        "voice": "alloy",
+        "speed": 0.75,
+        "post_processing": [PostProcessing.CAPTION],
+    }
+
+    def __init__(self, lines: Optional[List[str]] = None, style: str = "") -> None:
+        self.lines = lines
+        self.style = style
+
+    def story_lines(self) -> List[str]:
+        return self.lines or []
+
+    def scenes(self) -> List[Dict[str, str]]:
+        if self.lines is None:
+            self.lines = self.story_lines()
+        return lines_to_scenes(self.lines, self.style)
+
+
+@story_source("horror")
+class HorrorSource(LinesSource):
+    """Short horror story written by the chat model, unless `lines` are given."""
+
+    render_defaults: RenderSettings = {
+        **LinesSource.render_defaults,
+        "music_path": DEFAULT_MUSIC_PATH,
+    }
+
+    def __init__(
+        self, num_lines: int = 6, lines: Optional[List[str]] = None, style: str = ""
+    ) -> None:
+        super().__init__(lines, style)
+        self.num_lines = num_lines
+
+    def story_lines(self) -> List[str]:
+        return generate_story(self.num_lines)
+
+
+@story_source("funny")
+class FunnySource(HorrorSource):
+    """Short funny story written by the chat model, unless `lines` are given."""
+
+    def story_lines(self) -> List[str]:
+        return generate_funny_story(self.num_lines)
+
+
+@story_source("story")
+class PlannedStorySource(StorySource):
+    """A full story, split into scenes by the high-level plan and scene bot."""
+
+    render_defaults: RenderSettings = {
+        "voice": "echo",
+        "post_processing": [PostProcessing.PAN],
+    }
+
+    def __init__(
+        self,
+        parameters: Parameters,
+        num_scenes_per_iteration: int = 3,
+        max_iterations: int = 15,
+    ) -> None:
+        self.parameters = parameters
+        self.num_scenes_per_iteration = num_scenes_per_iteration
+        self.max_iterations = max_iterations
+
+    def scenes(self) -> List[Dict[str, str]]:
+        with span("stage.plan"):
+            self.parameters["high_level_plan"] = generate_high_level_plan(
+                self.parameters
+            )
+        scenes = generate_all_scenes(
+            story=self.parameters["story"],
+            high_level_plan=self.parameters["high_level_plan"],
+            num_scenes_per_iteration=self.num_scenes_per_iteration,
+            max_iterations=self.max_iterations,
+        )
+        self.parameters["scene_descriptions"] = [scene.model_dump() for scene in scenes]
+        return self.parameters["scene_descriptions"]
+
+
+async def generate_scene_assets(
+    scenes: List[Dict[str, str]],
+    work_dir: str,
+    voice: Optional[str] = None,
+    speed: float = 1.0,
+    reuse_cached: bool = False,
+    image_names: Optional[List[str]] = None,
+    audio_names: Optional[List[str]] = None,
+    frame_height: int = DEFAULT_FRAME_HEIGHT,
+    image_candidates: int = IMAGE_CANDIDATES,
+) -> Tuple[List[str], List[Optional[str]]]:
+    """
+    Generates every scene's image and narration at the same time.
+
+    Image requests all run concurrently (with fallbacks for failed images)
+    while TTS requests run alongside them with bounded concurrency. Images
+    are requested at the smallest size that covers a `frame_height` render.
+    """
+    with span("stage.assets", scenes=len(scenes)):
+        return await asyncio.gather(
+            generate_images_for_scenes(
+                scenes,
+                base_output_dir=os.path.join(work_dir, "images"),
+                reuse_cached=reuse_cached,
+                file_names=image_names,
+                frame_height=frame_height,
+                candidates=image_candidates,
+            ),
+            generate_audio_for_scenes_async(
+                scenes,
+                output_dir=os.path.join(work_dir, "audio"),
+                voice=voice,
+                speed=speed,
+                reuse_cached=reuse_cached,
+                file_names=audio_names,
+            ),
+        )
+
+
+async def generate_video(
+    source: StorySource,
+    output_path: str,
+    work_dir: Optional[str] = None,
+    reuse_cached: bool = False,
+    workspace: Optional[RunWorkspace] = None,
+    **overrides,
+) -> Optional[str]:
+    """
+    Runs `source` through the shared engine and returns the rendered video path.
+
+    Assets are written under `work_dir`, else `workspace`, else a new
+    RunWorkspace under assets/pipeline/<genre> for this call, so concurrent
+    runs never share files; pass a previous run's workspace with
+    `reuse_cached` to reuse its assets.
+    Keyword overrides take precedence over the source's RenderSettings.
+    Returns None if no scenes, images or video could be produced.
+    """
+    settings: RenderSettings = {**source.render_defaults, **overrides}  # type: ignore
+    if work_dir is None:
+        if workspace is None:
+            workspace = RunWorkspace(root=os.path.join(DEFAULT_WORK_DIR, source.name))
+        work_dir = workspace.path
+    frame_height = settings.get("height", DEFAULT_FRAME_HEIGHT)
+    if settings.get("preview"):
+        frame_height = min(frame_height, PREVIEW_MAX_HEIGHT)
+
+    with span("stage.scenes"):
+        scenes = await asyncio.to_thread(source.scenes)
+    if not scenes:
+        print(f"❌ Story source '{source.name}' produced no scenes.")
+        return None
+    print(f"📝 {len(scenes)} scenes from '{source.name}'.")
+
+    image_paths, audio_paths = await generate_scene_assets(
+        scenes,
+        work_dir,
+        voice=settings.get("voice"),
+        speed=settings.get("speed", 1.0),
+        reuse_cached=reuse_cached,
+        frame_height=frame_height,
+        image_candidates=settings.get("image_candidates", IMAGE_CANDIDATES),
+    )
+    if len(image_paths) != len(scenes):
+        print(
+            f"❌ Only {len(image_paths)} of {len(scenes)} scene images are available. Not rendering."
+        )
+        return None
+
+    music_path = settings.get("music_path")
+    if music_path and not os.path.exists(music_path):
+        print(f"Warning: Music file {music_path} not found. Proceeding without music.")
+        music_path = None
+
+    render_kwargs = {
+        key: settings[key] for key in ("height", "fps", "preview") if key in settings
+    }
+    with span("stage.render", scenes=len(scenes)):
+        await asyncio.to_thread(
+            create_video_from_assets,
+            image_paths=image_paths,
+            audio_paths=audio_paths,
+            scene_texts=[scene.get("text", "") for scene in scenes],
+            output_path=output_path,
+            music_path=music_path,
+            music_volume_param=settings.get("music_volume"),
+            post_processing_effects=settings.get("post_processing"),
+            **render_kwargs,
+        )
+    return output_path if os.path.exists(output_path) else None
+
+
+def generate_line_images(
+    lines: List[str],
+    output_dir: Optional[str] = None,
+    prefix: str = "image",
+    max_concurrency: int = DEFAULT_LINE_IMAGE_CONCURRENCY,
+    workspace: Optional[RunWorkspace] = None,
+) -> List[Optional[str]]:
+    """
+    One image per line, saved as <prefix>_<n>.png (1-based) in `output_dir`,
+    else the images directory of `workspace`. Without either, the current
+    run's workspace (see current_workspace) is used, which
+    generate_line_audio shares, so a story's assets stay together.
+
+    Up to `max_concurrency` requests run at once and the returned image bytes
+    are written to disk as-is. Failed images fall back to a neighbouring
+    line's image; None is returned only for lines with no image at all.
+    """
+    output_dir = output_dir or (workspace or current_workspace()).images_dir
+    file_names = [f"{prefix}_{idx+1}.png" for idx in range(len(lines))]
+    present = set(
+        run_sync(
+            generate_images_for_scenes(
+                lines_to_scenes(lines),
+                output_dir,
+                file_names=file_names,
+                max_concurrency=max_concurrency,
+            )
+        )
+    )
+    paths = [os.path.join(output_dir, file_name) for file_name in file_names]
+    return [path if path in present else None for path in paths]
+
+
+def generate_line_audio(
+    lines: List[str],
+    output_dir: Optional[str] = None,
+    model: str = "openai.tts-hd",
+    voice: str = "alloy",
+    speed: float = 1.0,  # <1.0 = slower
+    prefix: str = "audio",
+    workspace: Optional[RunWorkspace] = None,
+) -> List[Optional[str]]:
+    """
+    Narration per line, saved as <prefix>_<n>.wav (1-based) in `output_dir`,
+    else the audio directory of `workspace` (the current run's workspace if
+    neither is given, see generate_line_images); None on failure.
+    """
+    output_dir = output_dir or (workspace or current_workspace()).audio_dir
+    return run_sync(
+        generate_audio_for_scenes_async(
+            lines_to_scenes(lines),
+            output_dir=output_dir,
+            model=model,
+            voice=voice,
+            speed=speed,
+            file_names=[f"{prefix}_{idx+1}.wav" for idx in range(len(lines))],
+        )
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("genre", choices=sorted(set(STORY_SOURCES) - {"lines", "story"}))
+    parser.add_argument("--num-lines", type=int, default=6)
+    parser.add_argument("--output", default=None)
+    parser.add_argument("--preview", action="store_true")
+    parser.add_argument("--reuse-cached", action="store_true")
+    parser.add_argument("--run-id", default=None, help="Reuse this run's workspace")
+    args = parser.parse_args()
+
+    source = StorySource.create(args.genre, num_lines=args.num_lines)
+    workspace = RunWorkspace(
+        args.run_id, root=os.path.join(DEFAULT_WORK_DIR, args.genre)
+    )
+    print(f"📁 Run {workspace.run_id}: assets in {workspace.path}")
+    output_path = args.output or workspace.output(f"final_{args.genre}_clip.mp4")
+    result = asyncio.run(
+        generate_video(
+            source,
+            output_path,
+            workspace=workspace,
+            reuse_cached=args.reuse_cached,
+            preview=args.preview,
+        )
+    )
+    if result:
+        print(f"🎬 Video written to {result}")
+
+
+if __name__ == "__main__":
+    main()
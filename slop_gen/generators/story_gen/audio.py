@@ -1,8 +1,42 @@
+import asyncio
 import os
 import io
+import random
 import subprocess
+import time
+import wave
 from typing import List, Dict, Optional  # Added Dict, Optional
+
+import requests
+from moviepy.config import get_setting
+
 from slop_gen.utils.api_utils import text_to_speech
+from slop_gen.utils.asset_cache import content_key, is_cached, mark_cached
+from slop_gen.utils.async_utils import run_sync, to_io_thread
+from slop_gen.utils.instrumentation import span, record
+
+
+def _ffmpeg_pipe(args: List[str], audio_bytes: bytes, what: str) -> bytes:
+    """
+    Runs moviepy's ffmpeg binary (the one the renderer uses) on `audio_bytes`
+    from stdin and returns its stdout; raises RuntimeError with ffmpeg's
+    error output if it can't run, fails or produces nothing.
+    """
+    ffmpeg = get_setting("FFMPEG_BINARY")
+    cmd = [ffmpeg, "-hide_banner", "-loglevel", "error", *args]
+    try:
+        proc = subprocess.Popen(
+            cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+        )
+    except OSError as e:
+        raise RuntimeError(f"Could not run ffmpeg ({ffmpeg}) to {what}: {e}") from e
+    out, err = proc.communicate(audio_bytes)
+    if proc.returncode != 0 or not out:
+        reason = err.decode(errors="replace").strip() or "no audio decoded"
+        raise RuntimeError(
+            f"ffmpeg ({ffmpeg}) could not {what} ({len(audio_bytes)} bytes): {reason}"
+        )
+    return out
 
 
 def change_speed_ffmpeg(
@@ -12,76 +46,244 @@ def change_speed_ffmpeg(
     Uses ffmpeg -filter:a atempo to change speed.
     speed <1.0 -> slower, >1.0 -> faster.
     """
-    cmd = [
-        "ffmpeg",
-        "-hide_banner",
-        "-loglevel",
-        "error",
-        "-f",
-        in_fmt,
-        "-i",
-        "pipe:0",
-        "-filter:a",
-        f"atempo={speed}",
+    args = ["-f", in_fmt, "-i", "pipe:0", "-filter:a", f"atempo={speed}"]
+    return _ffmpeg_pipe(args + ["-f", out_fmt, "pipe:1"], audio_bytes, "change speed")
+
+
+# Narration is stored as 16-bit mono PCM WAV at the renderer's mix rate
+# (streaming.AUDIO_FPS), so a render never decodes or resamples it.
+NARRATION_FORMAT = "wav"
+NARRATION_SAMPLE_RATE = 44100
+
+
+def _is_narration_wav(audio_bytes: bytes) -> bool:
+    try:
+        with wave.open(io.BytesIO(audio_bytes), "rb") as w:
+            return (
+                w.getsampwidth() == 2
+                and w.getnchannels() == 1
+                and w.getframerate() == NARRATION_SAMPLE_RATE
+                and w.getcomptype() == "NONE"
+            )
+    except (wave.Error, EOFError):
+        return False
+
+
+def to_narration_wav(audio_bytes: bytes, speed: float = 1.0) -> bytes:
+    """
+    TTS output (WAV or MP3) as narration WAV: 16-bit mono PCM at
+    NARRATION_SAMPLE_RATE with the speed change applied, in one ffmpeg pass
+    that never re-encodes lossily. Audio already in that form at speed 1.0
+    is returned as-is.
+    """
+    if speed == 1.0 and _is_narration_wav(audio_bytes):
+        return audio_bytes
+    args = ["-i", "pipe:0"]
+    if speed != 1.0:
+        args += ["-filter:a", f"atempo={speed}"]
+    args += [
+        "-ac",
+        "1",
+        "-ar",
+        str(NARRATION_SAMPLE_RATE),
         "-f",
-        out_fmt,
+        "s16le",
+        "-acodec",
+        "pcm_s16le",
         "pipe:1",
     ]
-    proc = subprocess.Popen(
-        cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE
-    )
-    out, err = proc.communicate(audio_bytes)
-    if proc.returncode != 0:
-        raise RuntimeError(f"ffmpeg failed: {err.decode().strip()}")
-    return out
+    pcm = _ffmpeg_pipe(args, audio_bytes, "convert TTS audio to narration WAV")
+    # Raw PCM from the pipe, wrapped here: a WAV written to a pipe can't have its sizes filled in.
+    out = io.BytesIO()
+    with wave.open(out, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(NARRATION_SAMPLE_RATE)
+        w.writeframes(pcm)
+    return out.getvalue()
 
 
-def generate_audio_for_scenes(
-    scene_descriptions: List[Dict],  # Changed from lines: list[str]
-    output_dir: str = "assets/generated_audio",  # Changed default dir
-    model: str = "openai.tts-hd",
-    voice: Optional[str] = None,  # Allow None, default to "echo" internally
-    speed: float = 1.0,  # <1.0 = slower
-) -> List[Optional[str]]:  # Changed to List[Optional[str]]
-    os.makedirs(output_dir, exist_ok=True)
-    paths: List[Optional[str]] = []  # Changed to List[Optional[str]]
+# Concurrent TTS requests per batch; the proxy rate-limits beyond this.
+DEFAULT_TTS_CONCURRENCY = 4
+# Retries for a throttled or failed TTS request, the first after about
+# TTS_RETRY_BACKOFF seconds (or the proxy's Retry-After, up to
+# TTS_RETRY_MAX_DELAY) and each later one after twice as long (with jitter).
+TTS_RETRY_ATTEMPTS = 3
+TTS_RETRY_BACKOFF = 1.0
+TTS_RETRY_MAX_DELAY = 30.0
+# Rejected outright (auth, unknown model or voice, bad parameters): not retried.
+PERMANENT_STATUS_CODES = (400, 401, 403, 404, 422)
 
-    actual_voice_to_use = voice if voice is not None else "echo"
 
-    for idx, scene in enumerate(scene_descriptions):
-        line = scene.get("text")
-        if not line or line == "@@@":  # Handle empty text or silent scene marker
-            if line == "@@@":
-                print(
-                    f"ℹ️ Scene {idx+1} is marked as silent (@@@). No audio will be generated."
-                )
-            else:
-                print(f"⚠️ Scene {idx+1} has no text. Skipping audio generation.")
-            paths.append(None)
-            continue
+def _retry_delay(error: Exception, attempt: int) -> Optional[float]:
+    """
+    Seconds to wait before retry `attempt` of a TTS request that raised
+    `error`, or None if retrying can't help.
+    """
+    transient = (requests.HTTPError, requests.ConnectionError, requests.Timeout)
+    if not isinstance(error, transient):
+        return None
+    response = getattr(error, "response", None)
+    status = getattr(response, "status_code", None)
+    if status in PERMANENT_STATUS_CODES:
+        return None
+    delay = TTS_RETRY_BACKOFF * 2 ** (attempt - 1) * random.uniform(0.5, 1.0)
+    try:
+        retry_after = float(response.headers.get("Retry-After", 0))
+    except (AttributeError, ValueError):
+        retry_after = 0.0
+    return min(max(delay, retry_after), TTS_RETRY_MAX_DELAY)
+
+
+def _synthesize(idx: int, line: str, model: str, voice: str, fmt: str) -> bytes:
+    """
+    text_to_speech with up to TTS_RETRY_ATTEMPTS retries for rate limits (429),
+    server errors and dropped connections; other errors are raised at once.
+    """
+    attempt = 0
+    while True:
         try:
-            # 1) Synthesize as MP3
-            raw_bytes = text_to_speech(
-                text=line, model=model, voice=actual_voice_to_use, fmt="mp3"
+            with span("tts", scene=idx, chars=len(line), attempt=attempt):
+                return text_to_speech(text=line, model=model, voice=voice, fmt=fmt)
+        except Exception as e:
+            attempt += 1
+            delay = _retry_delay(e, attempt) if attempt <= TTS_RETRY_ATTEMPTS else None
+            if delay is None:
+                raise
+            print(
+                f"⚠️ TTS for scene {idx+1} failed ({e}); "
+                f"retry {attempt}/{TTS_RETRY_ATTEMPTS} in {delay:.1f}s."
             )
-            # 2) Slow it down (if speed is not 1.0)
-            if speed != 1.0:
+            record(retries=1)
+            time.sleep(delay)
+
+
+def _generate_scene_audio(
+    idx: int,
+    line: Optional[str],
+    out_path: str,
+    model: str,
+    voice: str,
+    speed: float,
+    reuse_cached: bool,
+    fmt: str = NARRATION_FORMAT,
+) -> Optional[str]:
+    if not line or line == "@@@":  # Handle empty text or silent scene marker
+        if line == "@@@":
+            print(
+                f"ℹ️ Scene {idx+1} is marked as silent (@@@). No audio will be generated."
+            )
+        else:
+            print(f"⚠️ Scene {idx+1} has no text. Skipping audio generation.")
+        return None
+    cache_key = content_key("tts", model, voice, speed, fmt, line)
+    if reuse_cached and is_cached(out_path, cache_key):
+        print(f"♻️ Reusing cached audio for scene {idx+1}: {out_path}")
+        record(cache_hits=1)
+        return out_path
+    try:
+        # 1) Synthesize
+        raw_bytes = _synthesize(idx, line, model, voice, fmt)
+        # 2) Slow it down (if speed is not 1.0), keeping WAV narration as PCM
+        if fmt == "wav":
+            with span("speed_change", scene=idx, speed=speed):
+                record(bytes_in=len(raw_bytes))
+                raw_bytes = to_narration_wav(raw_bytes, speed)
+                record(bytes_out=len(raw_bytes))
+        elif speed != 1.0:
+            with span("speed_change", scene=idx, speed=speed):
+                record(bytes_in=len(raw_bytes))
                 raw_bytes = change_speed_ffmpeg(
                     raw_bytes, speed, in_fmt="mp3", out_fmt="mp3"
                 )
-            # 3) Write out
-            out_path = os.path.join(
-                output_dir, f"scene_audio_{idx}.mp3"
-            )  # Changed naming to scene_audio_idx
-            with open(out_path, "wb") as f:
-                f.write(raw_bytes)
-            paths.append(out_path)
-            print(f"✅ Generated audio for scene {idx+1}: {out_path}")
+                record(bytes_out=len(raw_bytes))
+        # 3) Write out
+        with open(out_path, "wb") as f:
+            f.write(raw_bytes)
+        mark_cached(out_path, cache_key)
+        print(f"✅ Generated audio for scene {idx+1}: {out_path}")
+        return out_path
 
-        except Exception as e:
-            print(
-                f"❌ Failed to generate audio for scene {idx+1} (text: '{line[:50]}...'): {e}"
+    except Exception as e:
+        print(
+            f"❌ Failed to generate audio for scene {idx+1} (text: '{line[:50]}...'): {e}"
+        )
+        return None
+
+
+async def generate_audio_for_scenes_async(
+    scene_descriptions: List[Dict],
+    output_dir: str = "assets/generated_audio",
+    model: str = "openai.tts-hd",
+    voice: Optional[str] = None,
+    speed: float = 1.0,
+    reuse_cached: bool = False,
+    file_names: Optional[List[str]] = None,
+    max_concurrency: int = DEFAULT_TTS_CONCURRENCY,
+    fmt: str = NARRATION_FORMAT,
+) -> List[Optional[str]]:
+    """
+    Synthesizes every scene's text, up to `max_concurrency` requests at a time.
+
+    Narration is requested as WAV and stored as PCM at the renderer's mix
+    rate (see to_narration_wav), so it is only encoded once, when the video
+    is muxed; fmt="mp3" keeps the TTS service's MP3 instead.
+
+    Returns one path per scene, in scene order, with None for silent (@@@),
+    empty or failed scenes. Files are named scene_audio_<idx>.<fmt> unless
+    `file_names` gives a name per scene.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    actual_voice_to_use = voice if voice is not None else "echo"
+    if file_names is None:
+        file_names = [
+            f"scene_audio_{idx}.{fmt}" for idx in range(len(scene_descriptions))
+        ]
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def generate(idx: int, scene: Dict) -> Optional[str]:
+        async with semaphore:
+            return await to_io_thread(
+                _generate_scene_audio,
+                idx,
+                scene.get("text"),
+                os.path.join(output_dir, file_names[idx]),
+                model,
+                actual_voice_to_use,
+                speed,
+                reuse_cached,
+                fmt,
             )
-            paths.append(None)  # This is now type-correct
 
-    return paths
+    return list(
+        await asyncio.gather(
+            *(generate(idx, scene) for idx, scene in enumerate(scene_descriptions))
+        )
+    )
+
+
+def generate_audio_for_scenes(
+    scene_descriptions: List[Dict],  # Changed from lines: list[str]
+    output_dir: str = "assets/generated_audio",  # Changed default dir
+    model: str = "openai.tts-hd",
+    voice: Optional[str] = None,  # Allow None, default to "echo" internally
+    speed: float = 1.0,  # <1.0 = slower
+    reuse_cached: bool = False,  # keep existing audio generated from the same text/voice/speed
+    file_names: Optional[List[str]] = None,
+    max_concurrency: int = DEFAULT_TTS_CONCURRENCY,
+    fmt: str = NARRATION_FORMAT,
+) -> List[Optional[str]]:  # Changed to List[Optional[str]]
+    """Blocking wrapper around generate_audio_for_scenes_async."""
+    return run_sync(
+        generate_audio_for_scenes_async(
+            scene_descriptions,
+            output_dir=output_dir,
+            model=model,
+            voice=voice,
+            speed=speed,
+            reuse_cached=reuse_cached,
+            file_names=file_names,
+            max_concurrency=max_concurrency,
+            fmt=fmt,
+        )
+    )
@@ -0,0 +1,62 @@
+import random
+from typing import Collection, List, Optional
+
+from pydantic import BaseModel
+
+# A zoom over less than this many seconds reads as a jump cut.
+MIN_ZOOM_DURATION = 2.0
+
+
+class SegmentEffect(BaseModel):
+    """
+    Pan/zoom effect for one segment.
+
+    Offsets are fractions (-1..1) of the largest offset the renderer allows,
+    so a plan does not depend on the output resolution.
+    """
+
+    effect: Optional[str] = None  # effect function name; None is a static view
+    offset_x: float = 0.0
+    offset_y: float = 0.0
+
+
+class EffectPlan(BaseModel):
+    """Effect for every segment of a video, decided before rendering starts."""
+
+    seed: int
+    segments: List[SegmentEffect]
+
+
+def plan_effects(
+    durations: List[float],
+    seed: int,
+    effect_names: List[str],
+    zoom_effect_names: Collection[str] = (),
+    min_zoom_duration: float = MIN_ZOOM_DURATION,
+) -> EffectPlan:
+    """
+    Picks an effect and initial offsets for each segment.
+
+    Each segment draws from its own RNG seeded with (seed, index), so the same
+    inputs always give the same plan. Constraints: a segment never repeats the
+    previous segment's effect, and segments shorter than `min_zoom_duration`
+    don't get zooms. An empty `effect_names` plans static views throughout.
+    """
+    segments: List[SegmentEffect] = []
+    previous: Optional[str] = None
+    for i, duration in enumerate(durations):
+        rng = random.Random(f"{seed}:{i}")
+        allowed = list(effect_names)
+        if duration < min_zoom_duration:
+            allowed = [name for name in allowed if name not in zoom_effect_names] or allowed
+        choices = [name for name in allowed if name != previous] or allowed
+        effect = rng.choice(choices) if choices else None
+        segments.append(
+            SegmentEffect(
+                effect=effect,
+                offset_x=rng.uniform(-1.0, 1.0),
+                offset_y=rng.uniform(-1.0, 1.0),
+            )
+        )
+        previous = effect
+    return EffectPlan(seed=seed, segments=segments)
@@ -0,0 +1,445 @@
+"""
+Renders a Timeline in a single ffmpeg process.
+
+Every effect in story_gen.video is a linear scale and translation of a still
+image, so each segment compiles to one zoompan over its image: the image is
+resampled once, padded to a 9:16 canvas that holds every window the effect
+shows, and zoompan crops the moving window and scales it to the frame.
+Captions are drawn once per segment as PNGs and overlaid; narration, silence
+and music are cut, joined and mixed in the same filtergraph. Python only
+writes the graph, no frame passes through it.
+"""
+
+import math
+import os
+import random
+import shutil
+import subprocess
+import tempfile
+import textwrap
+from typing import List, Optional, Tuple, TypedDict
+
+import numpy as np
+from moviepy.config import get_setting
+from PIL import Image, ImageDraw, ImageFont
+
+from slop_gen.generators.story_gen.streaming import AUDIO_FPS
+from slop_gen.generators.story_gen.timeline import Timeline
+from slop_gen.generators.story_gen.video import (
+    EFFECTS_BY_NAME,
+    content_offsets,
+    static_view,
+)
+from slop_gen.utils.audio_probe import get_audio_index
+from slop_gen.utils.image_cache import (
+    ImagePyramidCache,
+    get_image_cache,
+    scaled_size,
+)
+from slop_gen.utils.instrumentation import span
+
+# Caption style of the moviepy path's TextClip: 40px bold white with a 1px
+# black outline, centered in 90% of the frame width, top at 80% of the height.
+CAPTION_FONTS = ["Arial Bold.ttf", "arialbd.ttf", "DejaVuSans-Bold.ttf"]
+CAPTION_FONT_SIZE = 40
+CAPTION_STROKE_WIDTH = 1
+CAPTION_WIDTH_FRACTION = 0.9
+CAPTION_TOP_FRACTION = 0.8
+
+
+class SegmentMotion(TypedDict):
+    """
+    Motion of a segment's image, linear from the first frame to the end.
+
+    scale: (start, end) scale of the image covering the frame height.
+    x/y: (start, end) position in the frame of the scaled image's top-left corner.
+    """
+
+    scale: Tuple[float, float]
+    x: Tuple[float, float]
+    y: Tuple[float, float]
+
+
+class _MotionProbe:
+    """Stands in for a segment's base ImageClip to read an effect's scale and position."""
+
+    def __init__(self) -> None:
+        self.scale = 1.0
+        self.pos = (0.0, 0.0)
+
+    def resize(self, scale):
+        self.scale = scale
+        return self
+
+    def set_position(self, pos):
+        self.pos = pos
+        return self
+
+
+def segment_motion(
+    effect,
+    duration: float,
+    frame_W: int,
+    frame_H: int,
+    img_W: int,
+    img_H: int,
+    offset_x: float,
+    offset_y: float,
+) -> SegmentMotion:
+    """
+    Motion of `effect` (an entry of EFFECTS_BY_NAME, or static_view), read
+    from the scale and position functions it builds. Raises ValueError for
+    an effect that is not linear in time, which a zoompan cannot reproduce.
+    """
+    probe = effect(
+        _MotionProbe(), duration, frame_W, frame_H, img_W, img_H, offset_x, offset_y
+    )
+
+    def at(t: float) -> Tuple[float, float, float]:
+        scale = probe.scale(t) if callable(probe.scale) else probe.scale
+        x, y = probe.pos(t) if callable(probe.pos) else probe.pos
+        return float(scale), float(x), float(y)
+
+    start, middle, end = at(0.0), at(duration / 2), at(duration)
+    for a, b, m in zip(start, end, middle):
+        if not math.isclose((a + b) / 2, m, rel_tol=1e-6, abs_tol=1e-6):
+            raise ValueError(f"{effect.__name__} does not move linearly")
+    return {
+        "scale": (start[0], end[0]),
+        "x": (start[1], end[1]),
+        "y": (start[2], end[2]),
+    }
+
+
+def _lerp(values: Tuple[float, float], frames: int) -> str:
+    """ffmpeg expression for `values` interpolated over zoompan's output frame number."""
+    start, end = values
+    if start == end:
+        return f"{start:.9f}"
+    return f"({start:.9f}+{end - start:.9f}*on/{frames})"
+
+
+def zoompan_filter(
+    motion: SegmentMotion,
+    img_size: Tuple[int, int],
+    level_size: Tuple[int, int],
+    frames: int,
+    fps: int,
+    frame_W: int,
+    frame_H: int,
+) -> str:
+    """
+    Filter chain rendering `frames` frames of `motion` from the image at the
+    largest scale the segment shows (`level_size`; `img_size` at scale 1):
+    a pad to a frame-shaped canvas around every window shown, then a zoompan
+    whose crop is that window, so zoompan only ever scales down.
+    """
+    img_W, img_H = img_size
+    level_W, level_H = level_size
+    k = max(motion["scale"])
+    # Window shown at each end, in pixels of the image at frame height:
+    # the frame's (0, 0) and (W, H) mapped back through the scale and position.
+    windows = [
+        (-x / s, -y / s, (frame_W - x) / s, (frame_H - y) / s)
+        for s, x, y in zip(motion["scale"], motion["x"], motion["y"])
+    ]
+    left = min(0.0, *(w[0] for w in windows))
+    top = min(0.0, *(w[1] for w in windows))
+    right = max(float(img_W), *(w[2] for w in windows))
+    bottom = max(float(img_H), *(w[3] for w in windows))
+
+    pad_x, pad_y = math.ceil(-left * k), math.ceil(-top * k)
+    canvas_W = max(math.ceil((right - left) * k), pad_x + level_W)
+    canvas_H = max(math.ceil((bottom - top) * k), pad_y + level_H)
+    # zoompan crops in the canvas' aspect ratio, so make it the frame's.
+    if canvas_W * frame_H < canvas_H * frame_W:
+        canvas_W = math.ceil(canvas_H * frame_W / frame_H)
+    else:
+        canvas_H = math.ceil(canvas_W * frame_H / frame_W)
+
+    # zoompan truncates the crop size (canvas / zoom) to whole pixels; a zoom
+    # a hair low keeps a crop of exactly k/s frames from losing a pixel.
+    zoom_per_scale = min(canvas_W / frame_W, canvas_H / frame_H) / k * (1 - 1e-9)
+    scale = _lerp(motion["scale"], frames)
+    zoom = f"{zoom_per_scale:.12f}*{scale}"
+    # Frame pixel (0, 0) shows image pixel -position / scale.
+    x = f"{pad_x}-{k:.9f}*{_lerp(motion['x'], frames)}/{scale}"
+    y = f"{pad_y}-{k:.9f}*{_lerp(motion['y'], frames)}/{scale}"
+    return (
+        f"format=rgb24,pad={canvas_W}:{canvas_H}:{pad_x}:{pad_y}:black,"
+        f"zoompan=z='{zoom}':x='{x}':y='{y}':d={frames}:s={frame_W}x{frame_H}:fps={fps},"
+        # RGB on both sides: in a YUV format zoompan rounds x and y down to even pixels.
+        "format=rgb24,setsar=1"
+    )
+
+
+def level_input(image_cache: ImagePyramidCache, path: str, height: int, scale: float):
+    """
+    ffmpeg input arguments reading the pyramid level of `path` at `height` *
+    `scale` straight from its .npy file, and the level's (width, height).
+    """
+    image_cache.get(path, height, scale)  # builds the level if missing
+    level_path = image_cache.level_path(path, height, scale)
+    level = np.load(level_path, mmap_mode="r")
+    level_H, level_W = level.shape[:2]
+    channels = level.shape[2] if level.ndim == 3 else 1
+    pix_fmt = {1: "gray", 3: "rgb24", 4: "rgba"}[channels]
+    args = [
+        "-f",
+        "rawvideo",
+        "-pixel_format",
+        pix_fmt,
+        "-video_size",
+        f"{level_W}x{level_H}",
+        "-skip_initial_bytes",
+        str(level.offset),
+        "-i",
+        level_path,
+    ]
+    return args, (level_W, level_H)
+
+
+def _caption_font(size: int):
+    for name in CAPTION_FONTS:
+        try:
+            return ImageFont.truetype(name, size)
+        except OSError:
+            continue
+    print("⚠️ No bold caption font found; using PIL's default font.")
+    return ImageFont.load_default()
+
+
+def _fit_lines(lines: List[str], font, max_width: float) -> List[str]:
+    """Breaks lines wider than `max_width` pixels at spaces, as ImageMagick's caption: does."""
+    fitted: List[str] = []
+    for line in lines:
+        current = ""
+        for word in line.split(" "):
+            candidate = f"{current} {word}" if current else word
+            if current and font.getlength(candidate) > max_width:
+                fitted.append(current)
+                candidate = word
+            current = candidate
+        fitted.append(current)
+    return fitted
+
+
+def render_caption(text: str, frame_W: int, path: str, wrap_width: int = 30) -> str:
+    """Writes `text`, wrapped to `wrap_width` characters, as a transparent caption PNG."""
+    font = _caption_font(CAPTION_FONT_SIZE)
+    lines = textwrap.wrap(text, width=wrap_width)
+    wrapped = "\n".join(_fit_lines(lines, font, frame_W * CAPTION_WIDTH_FRACTION))
+    measure = ImageDraw.Draw(Image.new("RGBA", (1, 1)))
+    left, top, right, bottom = measure.multiline_textbbox(
+        (0, 0), wrapped, font=font, align="center", stroke_width=CAPTION_STROKE_WIDTH
+    )
+    width = max(int(frame_W * CAPTION_WIDTH_FRACTION), math.ceil(right - left))
+    image = Image.new("RGBA", (width, math.ceil(bottom - top)), (0, 0, 0, 0))
+    ImageDraw.Draw(image).multiline_text(
+        (width / 2, -top),
+        wrapped,
+        font=font,
+        anchor="ma",
+        align="center",
+        fill="white",
+        stroke_width=CAPTION_STROKE_WIDTH,
+        stroke_fill="black",
+    )
+    image.save(path)
+    return path
+
+
+def render_timeline(
+    timeline: Timeline,
+    image_paths: List[str],
+    audio_paths: List[Optional[str]],
+    output_path: str,
+    frame_W: int,
+    frame_H: int,
+    preset: str = "medium",
+    music_path: Optional[str] = None,
+    music_volume: float = 0.3,
+    wrap_width: int = 30,
+    image_cache: Optional[ImagePyramidCache] = None,
+) -> str:
+    """
+    Renders `timeline` to `output_path` (libx264/AAC, like the moviepy path)
+    with one ffmpeg filtergraph. Segments whose image cannot be opened are
+    left out, with their narration.
+    """
+    ffmpeg = get_setting("FFMPEG_BINARY")
+    if image_cache is None:
+        image_cache = get_image_cache()
+    workdir = tempfile.mkdtemp(
+        prefix="ffmpeg_render_", dir=os.path.dirname(output_path) or "."
+    )
+    audio_index = get_audio_index()
+    inputs: List[str] = []
+    graph: List[str] = []
+    joined: List[Tuple[str, str]] = []
+    total_frames = total_samples = 0
+
+    def add_input(*args: str) -> int:
+        inputs.extend(args)
+        return sum(arg == "-i" for arg in inputs) - 1
+
+    try:
+        for i, img_path in enumerate(image_paths):
+            if not timeline.is_shown(i):
+                print(f"⚠️ Skipping segment {i+1} – missing image path.")
+                continue
+            try:
+                with Image.open(img_path) as img:
+                    src_size = img.size  # reads the header only
+            except Exception as e:
+                print(f"❌ Error building segment {i+1} for image '{img_path}': {e}")
+                continue
+
+            frames, duration = timeline.frames(i), timeline.segment_duration(i)
+            img_W, img_H = scaled_size(src_size, frame_H, 1.0)
+            planned = timeline.segment_effect(i)
+            effect = EFFECTS_BY_NAME.get(planned.effect or "", static_view)
+            if planned.effect and planned.effect not in EFFECTS_BY_NAME:
+                print(
+                    f"Warning: Unknown effect '{planned.effect}' planned for segment {i+1}. Using a static view."
+                )
+            offset_x, offset_y = content_offsets(planned, frame_W, img_W, img_H)
+            motion = segment_motion(
+                effect, duration, frame_W, frame_H, img_W, img_H, offset_x, offset_y
+            )
+            # The level moviepy would show, or the largest a zoom reaches.
+            args, level_size = level_input(
+                image_cache, img_path, frame_H, max(motion["scale"])
+            )
+            image_input = add_input(*args)
+            # A segment that doesn't move is rendered once and held.
+            still = all(start == end for start, end in motion.values())
+            chain = zoompan_filter(
+                motion,
+                (img_W, img_H),
+                level_size,
+                1 if still else frames,
+                timeline.fps,
+                frame_W,
+                frame_H,
+            )
+            graph.append(f"[{image_input}:v]{chain}[v{i}]")
+            video = f"[v{i}]"
+
+            caption = timeline.captions[i]
+            if caption:
+                caption_path = render_caption(
+                    caption,
+                    frame_W,
+                    os.path.join(workdir, f"caption_{i:05d}.png"),
+                    wrap_width,
+                )
+                caption_input = add_input("-i", caption_path)
+                graph.append(
+                    f"{video}[{caption_input}:v]overlay=x=(W-w)/2:"
+                    f"y={int(frame_H * CAPTION_TOP_FRACTION)}:format=rgb[vc{i}]"
+                )
+                video = f"[vc{i}]"
+            if still and frames > 1:
+                graph.append(
+                    f"{video}loop=loop={frames - 1}:size=1,"
+                    f"setpts=N/({timeline.fps}*TB),fps={timeline.fps}[vs{i}]"
+                )
+                video = f"[vs{i}]"
+
+            # Narration cut or padded to the segment's samples, always stereo at AUDIO_FPS.
+            samples = timeline.audio_samples(i)
+            audio_path = audio_paths[i]
+            if audio_path and os.path.exists(audio_path):
+                audio_input = add_input("-i", audio_path)
+                channels = audio_index.info(audio_path)["channels"]
+                # Mono narration plays at full level on both channels, as in PcmAudioClip.
+                layout = (
+                    "pan=stereo|c0=c0|c1=c0"
+                    if channels == 1
+                    else "aformat=channel_layouts=stereo"
+                )
+                graph.append(
+                    f"[{audio_input}:a]aresample={AUDIO_FPS},{layout},"
+                    f"atrim=end_sample={samples},apad=whole_len={samples}[a{i}]"
+                )
+            else:
+                graph.append(
+                    f"anullsrc=r={AUDIO_FPS}:cl=stereo,atrim=end_sample={samples}[a{i}]"
+                )
+            joined.append((video, f"[a{i}]"))
+            total_frames += frames
+            total_samples += samples
+
+        if not joined:
+            raise RuntimeError("No video segments were created.")
+        # Picture and narration are joined separately: a joint concat would
+        # stretch each segment to its longer stream, undoing the timeline's
+        # frame and sample counts.
+        graph.append(
+            f"{''.join(v for v, _ in joined)}concat=n={len(joined)}:v=1:a=0,"
+            "format=yuv420p[vout]"
+        )
+        graph.append(
+            f"{''.join(a for _, a in joined)}concat=n={len(joined)}:v=0:a=1[narration]"
+        )
+
+        audio_out = "[narration]"
+        if music_path and os.path.exists(music_path):
+            duration = total_samples / AUDIO_FPS
+            music_duration = audio_index.duration(music_path)
+            audio_index.save()
+            # If the video is longer than the music, loop it, otherwise take a random slice.
+            if duration > music_duration:
+                music_input = add_input("-stream_loop", "-1", "-i", music_path)
+            else:
+                start = random.uniform(0, max(0, music_duration - duration))
+                music_input = add_input("-ss", f"{start:.3f}", "-i", music_path)
+            graph.append(
+                f"[{music_input}:a]aresample={AUDIO_FPS},aformat=channel_layouts=stereo,"
+                f"volume={music_volume:.6f},atrim=end_sample={total_samples}[music]"
+            )
+            graph.append(
+                "[narration][music]amix=inputs=2:duration=first:normalize=0[mix]"
+            )
+            audio_out = "[mix]"
+            print(f"✅ Added background music: {music_path}")
+
+        graph_path = os.path.join(workdir, "graph.txt")
+        with open(graph_path, "w", encoding="utf-8") as f:
+            f.write(";\n".join(graph))
+        cmd = [
+            ffmpeg,
+            "-y",
+            "-loglevel",
+            "error",
+            *inputs,
+            "-filter_complex_script",
+            graph_path,
+            "-map",
+            "[vout]",
+            "-map",
+            audio_out,
+            "-c:v",
+            "libx264",
+            "-preset",
+            preset,
+            "-c:a",
+            "aac",
+            "-ar",
+            str(AUDIO_FPS),
+            "-movflags",
+            "+faststart",
+            output_path,
+        ]
+        print(f"🎞️ Rendering {len(joined)} segments in one ffmpeg filtergraph")
+        with span(
+            "ffmpeg_render", segments=len(joined), frames=total_frames
+        ) as render_span:
+            proc = subprocess.run(cmd, capture_output=True, text=True)
+            if proc.returncode != 0:
+                raise RuntimeError(f"ffmpeg render failed: {proc.stderr.strip()}")
+            render_span.add(bytes_out=os.path.getsize(output_path))
+        return output_path
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
@@ -0,0 +1,71 @@
+"""
+Image request sizes matched to the render.
+
+The renderer scales each image to the frame height and then by at most
+RENDER_MAX_SCALE (the 4/3 diagonal pans; zooms reach S_BASE + S_DELTA = 1.3),
+so pixels beyond frame height x that scale are never shown. Requests ask for
+the smallest size the backend supports that still covers that height, and a
+cheaper quality tier for preview-sized renders.
+"""
+
+import math
+from typing import List, Optional, TypedDict
+
+from slop_gen.utils.image_cache import RENDER_MAX_HEIGHT, RENDER_MAX_SCALE
+
+# (size, height of the returned images), fewest pixels first. Only portrait
+# and square sizes: the video is 9:16, so landscape images would just be cropped.
+OPENAI_IMAGE_SIZES = [("1024x1024", 1024), ("1024x1536", 1536)]
+IMAGEN_ASPECT_RATIOS = [("1:1", 1024), ("9:16", 1408), ("3:4", 1280)]
+# Frames up to this tall (previews) get gpt-image-1's "low" quality tier.
+LOW_QUALITY_MAX_HEIGHT = 480
+
+
+class ImageRequestSize(TypedDict):
+    """
+    Size parameters of one image request.
+
+    value: OpenAI `size` ("1024x1536") or Imagen `aspect_ratio` ("9:16").
+    height: Height in pixels of the images the backend returns for it.
+    quality: OpenAI quality tier; None for Imagen, which has none.
+    """
+
+    value: str
+    height: int
+    quality: Optional[str]
+
+
+def required_image_height(
+    frame_height: int = RENDER_MAX_HEIGHT, max_scale: float = RENDER_MAX_SCALE
+) -> int:
+    """Source image height at which no effect has to upscale it for a `frame_height` render."""
+    return math.ceil(frame_height * max_scale)
+
+
+def image_request_sizes(
+    model: str,
+    frame_height: int = RENDER_MAX_HEIGHT,
+    max_scale: float = RENDER_MAX_SCALE,
+) -> List[ImageRequestSize]:
+    """
+    Sizes to request from `model` for a `frame_height` render, in the order
+    to try them: the smallest that covers required_image_height first, then
+    the larger ones, then the ones that fall short, tallest first. Later
+    entries are fallbacks for when the backend rejects a size.
+    """
+    imagen = model.startswith("google.imagen")
+    options = IMAGEN_ASPECT_RATIOS if imagen else OPENAI_IMAGE_SIZES
+    needed = required_image_height(frame_height, max_scale)
+    covering = [option for option in options if option[1] >= needed]
+    short = sorted(
+        (option for option in options if option[1] < needed),
+        key=lambda option: option[1],
+        reverse=True,
+    )
+    quality = None
+    if not imagen:
+        quality = "low" if frame_height <= LOW_QUALITY_MAX_HEIGHT else "medium"
+    return [
+        {"value": value, "height": height, "quality": quality}
+        for value, height in covering + short
+    ]
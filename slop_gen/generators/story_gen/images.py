@@ -1,20 +1,41 @@
 import os
-from typing import List, Dict, Optional
-from io import BytesIO
+from typing import Awaitable, Callable, List, Dict, Optional, Set, Tuple, TypeVar
 import logging
 import asyncio
+import random
+import re
 import shutil
+import tempfile
 
+from PIL import Image
+
+from slop_gen.generators.story_gen.image_sizing import (
+    ImageRequestSize,
+    image_request_sizes,
+    required_image_height,
+)
 from slop_gen.utils.api_utils import (
-    generate_openai_images_via_proxy,
-    generate_images_with_imagen,
+    generate_openai_images_via_proxy_to_files,
+    generate_images_with_imagen_to_files,
 )
+from slop_gen.utils.asset_cache import (
+    clear_cached,
+    content_key,
+    is_cached,
+    mark_cached,
+)
+from slop_gen.utils.async_utils import to_io_thread
+from slop_gen.utils.image_cache import RENDER_MAX_HEIGHT, normalize_image
+from slop_gen.utils.image_quality import rank_candidates
+from slop_gen.utils.instrumentation import span, record
 
 # Configure logging
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
 
+T = TypeVar("T")
+
 MODEL = (
     # "google.imagen-3.0-fast-generate"
     "google.imagen-3.0-generate"
@@ -22,79 +43,434 @@ MODEL = (
 )
 
 
-async def generate_single_image_from_prompt(
-    prompt: str,
-    output_path: str,
-) -> bool:
-    """
-    Generates a single image using the specified prompt and saves it to output_path.
-    Routes to OpenAI or Gemini Imagen based on the model name.
+# Most images one request may ask for (Imagen's per-request sample limit).
+MAX_IMAGES_PER_REQUEST = 4
+# Candidates requested per scene; the best-scoring usable one is kept, so a
+# blank or corrupt image doesn't cost a second round-trip or a fallback copy.
+# Every candidate is a billed generation, so callers opt in to more than one.
+IMAGE_CANDIDATES = 1
+# Retries for a failed scene, the first after about IMAGE_RETRY_BACKOFF seconds
+# and each later one after twice as long (with jitter).
+IMAGE_RETRY_ATTEMPTS = 3
+IMAGE_RETRY_BACKOFF = 1.0
+# Seconds from a scene's first attempt after which it stops retrying and
+# reuses a neighbour's image.
+IMAGE_RECOVERY_DEADLINE = 60.0
+# HTTP statuses a retry can't fix: malformed requests, auth failures and
+# unknown models (content-filter refusals excepted, see is_permanent_failure).
+PERMANENT_STATUS_CODES = (400, 401, 403, 404, 422)
+
+
+class ImageRefusedError(RuntimeError):
+    """The backend returned no image for a prompt, usually a content-filter refusal."""
+
+
+class UnsupportedModelError(ValueError):
+    """MODEL names a backend this module can't generate images with."""
+
+
+# Phrases in an error that mark a content-filter refusal rather than an outage.
+REFUSAL_MARKERS = (
+    "safety",
+    "content policy",
+    "content_policy",
+    "moderation",
+    "blocked",
+    "filtered",
+    "no image data returned",
+)
+# Words that commonly trip image content filters; dropped when simplifying a refused prompt.
+FILTER_PRONE_WORDS = {
+    "blood",
+    "bloody",
+    "gore",
+    "gory",
+    "corpse",
+    "corpses",
+    "dead",
+    "death",
+    "kill",
+    "killed",
+    "killing",
+    "murder",
+    "murdered",
+    "knife",
+    "gun",
+    "weapon",
+    "severed",
+    "mutilated",
+    "violent",
+    "violence",
+    "naked",
+    "nude",
+}
+
+
+def is_refusal(error: Optional[BaseException]) -> bool:
+    if isinstance(error, ImageRefusedError):
+        return True
+    if error is None:
+        return False
+    response = getattr(error, "response", None)
+    message = str(error)
+    if response is not None and getattr(response, "status_code", None) == 400:
+        message += " " + (getattr(response, "text", "") or "")
+    message = message.lower()
+    return any(marker in message for marker in REFUSAL_MARKERS)
 
-    Args:
-        prompt: The text prompt for image generation.
-        output_path: The full path where the image will be saved.
-        model: The model to use (e.g., "gpt-image-1", "google.imagen-3.0-generate").
-        size: The desired size for OpenAI models (e.g., "1024x1024", "1024x1536").
-        quality: The quality setting for OpenAI models.
 
-    Returns:
-        True if the image was generated and saved successfully, False otherwise.
+def is_permanent_failure(error: Optional[BaseException]) -> bool:
+    """
+    Whether retrying `error` can't help: an unsupported model, or a request
+    the backend rejects outright (auth, unknown model, bad parameters).
+    Refusals are not permanent, they are retried with a simpler prompt.
     """
+    if error is None or is_refusal(error):
+        return False
+    if isinstance(error, UnsupportedModelError):
+        return True
+    response = getattr(error, "response", None)
+    return getattr(response, "status_code", None) in PERMANENT_STATUS_CODES
+
+
+def simplify_prompt(prompt: str) -> str:
+    """A tamer version of a refused prompt: its first sentence, minus filter-prone words."""
+    first_sentence = re.split(r"(?<=[.!?])\s+", prompt.strip(), maxsplit=1)[0]
+    words = [
+        word
+        for word in first_sentence.split()
+        if word.strip(".,;:!?\"'()").lower() not in FILTER_PRONE_WORDS
+    ]
+    return " ".join(words) or prompt
+
+
+# Phrases in a 400/422 error that mark a request parameter the backend doesn't take.
+SIZE_REJECTION_MARKERS = (
+    "size",
+    "aspect",
+    "resolution",
+    "dimension",
+    "invalid",
+    "not supported",
+    "unsupported",
+)
+# (model, size) pairs the backend has rejected in this process; later requests skip them.
+_rejected_sizes: Set[Tuple[str, str]] = set()
+
+
+def is_size_rejection(error: Optional[BaseException]) -> bool:
+    """Whether `error` is the backend turning down the requested size or aspect ratio."""
+    response = getattr(error, "response", None)
+    if getattr(response, "status_code", None) not in (400, 422) or is_refusal(error):
+        return False
+    message = f"{error} {getattr(response, 'text', '') or ''}".lower()
+    return any(marker in message for marker in SIZE_REJECTION_MARKERS)
+
+
+def _usable_sizes(sizes: List[ImageRequestSize]) -> List[ImageRequestSize]:
+    """`sizes` minus the ones already rejected, or all of them if every one was."""
+    return [size for size in sizes if (MODEL, size["value"]) not in _rejected_sizes] or sizes
+
+
+async def _request_candidates(
+    prompt: str, path_for: Callable[[int], str], count: int, size: ImageRequestSize
+) -> List[str]:
+    if MODEL.startswith("google.imagen"):
+        logger.info(
+            f"Using Gemini Imagen model: {MODEL} for prompt: '{prompt[:50]}...' ({count} images, {size['value']})"
+        )
+        return await to_io_thread(
+            generate_images_with_imagen_to_files,
+            prompt=prompt,
+            path_for=path_for,
+            model=MODEL,  # Pass the full model name e.g., "google.imagen-3.0-generate"
+            number_of_images=count,
+            aspect_ratio=size["value"],
+        )
+    if MODEL.startswith("gpt-image-1"):  # doesnt work with school api key
+        logger.info(
+            f"Using OpenAI model: {MODEL} via proxy ({count} images, {size['value']} {size['quality']})"
+        )
+        return await to_io_thread(
+            generate_openai_images_via_proxy_to_files,
+            prompt=prompt,
+            path_for=path_for,
+            model=MODEL,
+            n=count,
+            size=size["value"],
+            quality=size["quality"],
+            response_format="b64_json",
+        )
+    raise UnsupportedModelError(
+        f"Unsupported model specified: {MODEL}. Cannot generate image."
+    )
+
+
+async def _request_and_save(
+    prompt: str,
+    output_paths: List[str],
+    candidates: int,
+    sizes: List[ImageRequestSize],
+) -> List[bool]:
+    count = len(output_paths) * candidates
+    # Candidates are streamed into a scratch directory next to the outputs, so
+    # the chosen ones can be renamed into place without a copy.
+    candidate_dir = await asyncio.to_thread(
+        _make_candidate_dir, os.path.dirname(output_paths[0])
+    )
     try:
-        image_data_list: List[BytesIO] = []
 
-        if MODEL.startswith("google.imagen"):
-            logger.info(
-                f"Using Gemini Imagen model: {MODEL} for prompt: '{prompt[:50]}...'"
+        def path_for(n: int) -> str:
+            return os.path.join(candidate_dir, f"candidate_{n}.png")
+
+        candidate_paths: List[str] = []
+        sizes = _usable_sizes(sizes)
+        for k, size in enumerate(sizes):
+            try:
+                candidate_paths = await _request_candidates(
+                    prompt, path_for, count, size
+                )
+                break
+            except Exception as e:
+                if k == len(sizes) - 1 or not is_size_rejection(e):
+                    raise
+                _rejected_sizes.add((MODEL, size["value"]))
+                record(size_fallbacks=1)
+                logger.warning(
+                    f"{MODEL} rejected image size {size['value']}; falling back to {sizes[k + 1]['value']}."
+                )
+
+        if not candidate_paths:
+            raise ImageRefusedError(
+                f"No image data returned for prompt: {prompt} using model {MODEL}"
             )
-            # Imagen 3 uses aspect ratio, user requested 9:16 for this path.
-            # The `size` and `quality` params are primarily for OpenAI.
-            image_data_list = await asyncio.to_thread(
-                generate_images_with_imagen,
-                prompt=prompt,
-                model=MODEL,  # Pass the full model name e.g., "google.imagen-3.0-generate"
-                number_of_images=1,
-                aspect_ratio="9:16",  # looks like this aspect ratio is not supported by cornell proxy
+
+        ranked = await asyncio.to_thread(rank_candidates, candidate_paths)
+        record(
+            candidates=len(candidate_paths),
+            rejected=len(candidate_paths) - len(ranked),
+        )
+        if not ranked:
+            raise RuntimeError(
+                f"None of the {len(candidate_paths)} images for prompt '{prompt[:50]}...' were usable."
             )
-        elif MODEL.startswith("gpt-image-1"):  # doesnt work with school api key
-            logger.info(f"Using OpenAI model: {MODEL} via proxy")
-            image_data_list = await asyncio.to_thread(
-                generate_openai_images_via_proxy,
-                prompt=prompt,
-                model=MODEL,
-                n=1,
-                size="1024x1536",
-                quality="medium",
-                response_format="b64_json",
+        if len(ranked) < len(candidate_paths):
+            logger.warning(
+                f"{len(candidate_paths) - len(ranked)} of {len(candidate_paths)} images for prompt '{prompt[:50]}...' were unusable."
             )
-        else:
+        chosen = [
+            (output_path, candidate_paths[k]) for output_path, k in zip(output_paths, ranked)
+        ]
+
+        def _move_images_into_place():
+            # A rename also replaces, rather than rewrites, an old file that may
+            # be a hardlinked fallback sharing its data with a neighbouring scene.
+            for output_path, candidate_path in chosen:
+                os.replace(candidate_path, output_path)
+                logger.info(f"Successfully saved image to {output_path}")
+                _normalize_for_render(output_path)
+
+        record(bytes_out=sum(os.path.getsize(path) for _, path in chosen))
+        await asyncio.to_thread(_move_images_into_place)
+        return [True] * len(chosen) + [False] * (len(output_paths) - len(chosen))
+    finally:
+        await asyncio.to_thread(shutil.rmtree, candidate_dir, True)
+
+
+def _normalize_for_render(path: str) -> None:
+    """Writes the render-ready copy of a landed image; the renderer falls back to the original without it."""
+    try:
+        with span("image_normalize"):
+            normalize_image(path)
+    except Exception as e:
+        logger.warning(f"Could not write render-ready copy of {path}: {e}")
+
+
+def _make_candidate_dir(output_dir: str) -> str:
+    os.makedirs(output_dir or ".", exist_ok=True)
+    return tempfile.mkdtemp(prefix=".candidates_", dir=output_dir or ".")
+
+
+async def _attempt_images(
+    prompt: str,
+    output_paths: List[str],
+    candidates: int,
+    sizes: List[ImageRequestSize],
+) -> Tuple[List[bool], Optional[Exception]]:
+    """One request for `output_paths`; returns the per-path flags and the error, if any."""
+    with span(
+        "image", output_path=output_paths[0], model=MODEL, images=len(output_paths)
+    ):
+        try:
+            return (
+                await _request_and_save(prompt, output_paths, candidates, sizes),
+                None,
+            )
+        except Exception as e:
             logger.error(
-                f"Unsupported model specified: {MODEL}. Cannot generate image."
+                f"Error generating or saving image for prompt '{prompt}' with model '{MODEL}': {e}"
             )
-            return False
+            return [False] * len(output_paths), e
 
-        if not image_data_list:
-            logger.error(
-                f"No image data returned for prompt: {prompt} using model {MODEL}"
+
+async def generate_images_from_prompt(
+    prompt: str,
+    output_paths: List[str],
+    candidates: int = 1,
+    frame_height: int = RENDER_MAX_HEIGHT,
+) -> List[bool]:
+    """
+    Generates an image for every path in `output_paths` from one prompt, with
+    a single request for len(output_paths) * candidates images.
+    Routes to OpenAI or Gemini Imagen based on the model name, asking for
+    the smallest size that covers a `frame_height` render (see
+    image_sizing.image_request_sizes) and falling back to the next size
+    if the backend rejects it.
+
+    Candidates are ranked by local sharpness and contrast (see
+    slop_gen.utils.image_quality); undecodable or near-blank ones are
+    dropped, and each path gets the best remaining candidate, written as the
+    bytes the backend returned.
+
+    Returns:
+        One flag per output path: True if an image was saved there.
+    """
+    sizes = image_request_sizes(MODEL, frame_height)
+    saved, _ = await _attempt_images(prompt, output_paths, candidates, sizes)
+    return saved
+
+
+async def generate_single_image_from_prompt(
+    prompt: str,
+    output_path: str,
+    candidates: int = 1,
+    frame_height: int = RENDER_MAX_HEIGHT,
+) -> bool:
+    """
+    Generates a single image using the specified prompt and saves it to output_path,
+    keeping the best of `candidates` images from one request, sized for a
+    `frame_height` render.
+
+    Returns:
+        True if the image was generated and saved successfully, False otherwise.
+    """
+    return (
+        await generate_images_from_prompt(
+            prompt, [output_path], candidates, frame_height
+        )
+    )[0]
+
+
+async def _bounded(semaphore: asyncio.Semaphore, coro: Awaitable[T]) -> T:
+    async with semaphore:
+        return await coro
+
+
+async def _timed(coro: Awaitable[T]) -> Tuple[float, T]:
+    """`coro`'s result, with the event loop time it started running at."""
+    started = asyncio.get_running_loop().time()
+    return started, await coro
+
+
+async def _retry_image(
+    prompt: str,
+    output_path: str,
+    candidates: int,
+    sizes: List[ImageRequestSize],
+    error: Optional[Exception],
+    semaphore: Optional[asyncio.Semaphore],
+    deadline: float,
+    simplify_refused_prompts: bool,
+) -> bool:
+    """
+    Retries a failed scene image with exponential backoff until it succeeds,
+    IMAGE_RETRY_ATTEMPTS run out, the error is permanent (see
+    is_permanent_failure) or the next attempt would start after `deadline`
+    (event loop time). Refused prompts are retried simplified, never as they were.
+    """
+    loop = asyncio.get_running_loop()
+    attempt_prompt = prompt
+    for attempt in range(1, IMAGE_RETRY_ATTEMPTS + 1):
+        if is_permanent_failure(error):
+            logger.warning(f"Not retrying {output_path}: {error}")
+            return False
+        delay = IMAGE_RETRY_BACKOFF * 2 ** (attempt - 1) * random.uniform(0.5, 1.0)
+        if loop.time() + delay >= deadline:
+            logger.warning(
+                f"Recovery deadline reached for {output_path} after {attempt - 1} retries."
             )
             return False
+        if is_refusal(error):
+            simpler = attempt_prompt
+            if simplify_refused_prompts:
+                simpler = simplify_prompt(attempt_prompt)
+            if simpler == attempt_prompt:
+                # The same prompt would only be refused again.
+                logger.warning(f"Not retrying refused prompt for {output_path}.")
+                return False
+            logger.info(
+                f"Prompt for {output_path} looks refused; retrying as '{simpler[:50]}...'"
+            )
+            attempt_prompt = simpler
+        await asyncio.sleep(delay)
+        logger.info(f"Retry {attempt}/{IMAGE_RETRY_ATTEMPTS} for {output_path}")
+        request = _attempt_images(attempt_prompt, [output_path], candidates, sizes)
+        if semaphore is not None:
+            request = _bounded(semaphore, request)
+        saved, error = await request
+        record(retries=1)
+        if saved[0]:
+            return True
+    return False
+
+
+async def _scene_image(
+    request: Awaitable[Tuple[float, Tuple[List[bool], Optional[Exception]]]],
+    k: int,
+    prompt: str,
+    output_path: str,
+    candidates: int,
+    sizes: List[ImageRequestSize],
+    semaphore: Optional[asyncio.Semaphore],
+    recovery_deadline: float,
+    simplify_refused_prompts: bool,
+) -> bool:
+    """
+    Result of the scene's share of a grouped request, retrying it on its own
+    if it failed for up to `recovery_deadline` seconds from the request's start.
+    """
+    started, (saved, error) = await request
+    if saved[k]:
+        return True
+    return await _retry_image(
+        prompt,
+        output_path,
+        candidates,
+        sizes,
+        error,
+        semaphore,
+        started + recovery_deadline,
+        simplify_refused_prompts,
+    )
 
-        image_bytes_io = image_data_list[0]
 
-        def _write_image_to_disk():
-            os.makedirs(os.path.dirname(output_path), exist_ok=True)
-            with open(output_path, "wb") as f:
-                f.write(image_bytes_io.getvalue())
-            logger.info(f"Successfully saved image to {output_path}")
+def _image_height(path: str) -> int:
+    """Pixel height of the image at `path` (0 if unreadable), from its header."""
+    try:
+        with Image.open(path) as img:
+            return img.height
+    except Exception:
+        return 0
 
-        await asyncio.to_thread(_write_image_to_disk)
-        return True
 
-    except Exception as e:
-        logger.error(
-            f"Error generating or saving image for prompt '{prompt}' with model '{MODEL}': {e}"
-        )
-        return False
+def _link_or_copy(source_path: str, target_path: str) -> None:
+    """Points `target_path` at the same data as `source_path`, copying only if hardlinks fail."""
+    tmp_path = f"{target_path}.{os.getpid()}.link"
+    try:
+        os.link(source_path, tmp_path)
+    except OSError:  # e.g. another filesystem, or no hardlink support
+        shutil.copyfile(source_path, tmp_path)
+    os.replace(tmp_path, target_path)
 
 
 async def generate_images_for_scenes(
@@ -102,16 +478,41 @@ async def generate_images_for_scenes(
         Dict
     ],  # Expects list of dicts from parameters["scene_descriptions"]
     base_output_dir: str,
+    reuse_cached: bool = False,
+    file_names: Optional[List[str]] = None,
+    max_concurrency: Optional[int] = None,
+    candidates: int = IMAGE_CANDIDATES,
+    recovery_deadline: float = IMAGE_RECOVERY_DEADLINE,
+    simplify_refused_prompts: bool = True,
+    frame_height: int = RENDER_MAX_HEIGHT,
 ) -> List[str]:
     """
-    Generates images for a list of scene descriptions asynchronously, with fallback for failures.
-    If an image fails to generate, it attempts to use the previous image, or the next if the first fails.
+    Generates images for a list of scene descriptions asynchronously, with recovery for failures.
+    A failed scene is retried with backoff while the other scenes are still generating
+    (with a simplified prompt after a content-filter refusal). Only once its retries are
+    exhausted, or `recovery_deadline` has passed, does it reuse the previous image (or
+    the next if the first fails) through a hardlink.
 
     Args:
         scene_descriptions: A list of dictionaries, where each dict has a 'description' key
                             containing the prompt for image generation.
         base_output_dir: The base directory where images will be saved.
                          Images will be named scene_0.png, scene_1.png, etc.
+        file_names: Optional file name per scene, used instead of scene_<i>.png.
+        max_concurrency: Maximum number of image requests in flight at once;
+                         None sends them all at once.
+        candidates: Images requested per scene; the best usable one is kept.
+                    Scenes with the same prompt share requests, up to
+                    MAX_IMAGES_PER_REQUEST images each.
+        recovery_deadline: Seconds from a scene's first attempt after which it starts no
+                           new retry and falls back to a neighbouring image. Errors a
+                           retry can't fix (see is_permanent_failure) fall back at once.
+        simplify_refused_prompts: Retry refused prompts as simplify_prompt(prompt).
+        frame_height: Height of the video the images are for; requests ask for the
+                      smallest size that covers it at the largest effect scale.
+        reuse_cached: If True, keep an existing scene image whose sidecar key shows it was
+                      generated from the same prompt and model instead of regenerating it,
+                      unless it is too small for `frame_height`.
 
     Returns:
         A list of file paths for images that are present (either original or fallback).
@@ -123,17 +524,43 @@ async def generate_images_for_scenes(
     os.makedirs(base_output_dir, exist_ok=True)
     logger.info(f"Ensured base output directory exists: {base_output_dir}")
 
-    tasks = []
+    tasks: List[Optional[Awaitable[bool]]] = []
+    prompt_groups: Dict[str, List[int]] = {}
+    semaphore = asyncio.Semaphore(max_concurrency) if max_concurrency else None
+    sizes = image_request_sizes(MODEL, frame_height)
+    # A cached image only needs to be as tall as the largest size this backend offers.
+    min_cached_height = min(
+        required_image_height(frame_height), max(size["height"] for size in sizes)
+    )
     # Store the intended final output path for each scene, even if initially skipped.
+    if file_names is None:
+        file_names = [f"scene_{i}.png" for i in range(len(scene_descriptions))]
     intended_output_paths = [
-        os.path.join(base_output_dir, f"scene_{i}.png")
-        for i in range(len(scene_descriptions))
+        os.path.join(base_output_dir, file_name) for file_name in file_names
+    ]
+
+    cache_keys = [
+        content_key("image", MODEL, scene.get("description"))
+        for scene in scene_descriptions
     ]
 
     for i, scene in enumerate(scene_descriptions):
         prompt = scene.get("description")
         output_path_for_generation_attempt = intended_output_paths[i]
 
+        if (
+            reuse_cached
+            and prompt
+            and is_cached(output_path_for_generation_attempt, cache_keys[i])
+            and _image_height(output_path_for_generation_attempt) >= min_cached_height
+        ):
+            logger.info(
+                f"Reusing cached image for scene {i+1}: {output_path_for_generation_attempt}"
+            )
+            record(cache_hits=1)
+            tasks.append(asyncio.sleep(0, result=True))
+            continue
+
         if not prompt:
             logger.warning(
                 f"Scene {i} ('{output_path_for_generation_attempt}') is missing a 'description'. Scheduling as a failed task."
@@ -145,11 +572,35 @@ async def generate_images_for_scenes(
         logger.info(
             f"Queueing scene {i+1}/{len(scene_descriptions)}: Generating image for '{prompt[:50]}...' -> {output_path_for_generation_attempt}"
         )
-        task = generate_single_image_from_prompt(
-            prompt=prompt,
-            output_path=output_path_for_generation_attempt,  # Use the final intended path for the attempt
-        )
-        tasks.append(task)
+        prompt_groups.setdefault(prompt, []).append(i)
+        tasks.append(None)  # filled in below, once scenes are grouped by prompt
+
+    # One request per prompt (or per MAX_IMAGES_PER_REQUEST images), written
+    # to the final intended paths of every scene in the group.
+    scenes_per_request = max(1, MAX_IMAGES_PER_REQUEST // candidates)
+    for prompt, indices in prompt_groups.items():
+        for start in range(0, len(indices), scenes_per_request):
+            chunk = indices[start : start + scenes_per_request]
+            request = _timed(
+                _attempt_images(
+                    prompt, [intended_output_paths[i] for i in chunk], candidates, sizes
+                )
+            )
+            if semaphore is not None:
+                request = _bounded(semaphore, request)
+            request_task = asyncio.ensure_future(request)
+            for k, i in enumerate(chunk):
+                tasks[i] = _scene_image(
+                    request_task,
+                    k,
+                    prompt,
+                    intended_output_paths[i],
+                    candidates,
+                    sizes,
+                    semaphore,
+                    recovery_deadline,
+                    simplify_refused_prompts,
+                )
 
     if not tasks:  # All scenes might have been skipped (e.g., all had no descriptions)
         logger.info("No valid scenes to process for image generation.")
@@ -173,6 +624,7 @@ async def generate_images_for_scenes(
             logger.info(f"Successfully generated {current_path_attempted}")
             success_flags[i] = True
             initially_successful_paths[i] = current_path_attempted
+            mark_cached(current_path_attempted, cache_keys[i])
         else:  # result_or_exc is False (can also be from our dummy asyncio.sleep for skipped prompts)
             # If it was a real generation that returned False, generate_single_image_from_prompt logged it.
             # If it was a skipped prompt, we logged it when creating the dummy task.
@@ -225,17 +677,21 @@ async def generate_images_for_scenes(
                     )
 
             if fallback_source_path:
+                # The copy is not this scene's prompt, so it must never be reused as cached.
+                clear_cached(current_target_path)
                 try:
                     await asyncio.to_thread(
-                        shutil.copy, fallback_source_path, current_target_path
+                        _link_or_copy, fallback_source_path, current_target_path
                     )
+                    await asyncio.to_thread(_normalize_for_render, current_target_path)
                     final_image_paths[i] = current_target_path
+                    record(fallbacks=1)
                     logger.info(
-                        f"Successfully used fallback: Copied {fallback_source_path} to {current_target_path}"
+                        f"Successfully used fallback: Linked {fallback_source_path} to {current_target_path}"
                     )
                 except Exception as e:
                     logger.error(
-                        f"Error copying fallback from {fallback_source_path} to {current_target_path}: {e}"
+                        f"Error linking fallback from {fallback_source_path} to {current_target_path}: {e}"
                     )
             else:
                 logger.warning(
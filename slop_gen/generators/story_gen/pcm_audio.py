@@ -0,0 +1,71 @@
+"""
+Narration kept as 16-bit PCM from TTS to the final mux.
+
+Scene narration is stored as WAV at the renderer's mix rate (AUDIO_FPS; see
+story_gen.audio.to_narration_wav), so a render reads it straight into memory
+instead of starting an ffmpeg reader per segment, and the only lossy encode
+is the AAC track written with the video.
+"""
+
+import wave
+from typing import Optional, Tuple
+
+import numpy as np
+from moviepy.audio.AudioClip import AudioClip
+from moviepy.editor import AudioFileClip
+
+from slop_gen.generators.story_gen.streaming import AUDIO_CHANNELS, AUDIO_FPS
+
+
+def read_pcm_wav(path: str) -> Optional[Tuple[np.ndarray, int]]:
+    """
+    (int16 samples shaped (n, channels), sample rate) of a 16-bit PCM WAV
+    file; None if `path` is anything else.
+    """
+    try:
+        with wave.open(path, "rb") as w:
+            if w.getsampwidth() != 2 or w.getcomptype() != "NONE":
+                return None
+            channels, sample_rate = w.getnchannels(), w.getframerate()
+            data = w.readframes(w.getnframes())
+    except (wave.Error, EOFError):
+        return None
+    samples = np.frombuffer(data, dtype="<i2")
+    samples = samples[: len(samples) - len(samples) % channels]
+    return samples.reshape(-1, channels), sample_rate
+
+
+class PcmAudioClip(AudioClip):
+    """
+    Stereo audio clip over 16-bit PCM samples held in memory.
+
+    The frame at time t is sample round(t * fps), silence outside the clip,
+    so at the output rate every sample is used exactly once (moviepy's
+    AudioArrayClip truncates instead, which can repeat or skip samples).
+    Mono samples play on both channels.
+    """
+
+    def __init__(self, samples: np.ndarray, fps: int = AUDIO_FPS) -> None:
+        self.samples = samples
+
+        def make_frame(t):
+            scalar = np.isscalar(t)
+            indices = np.atleast_1d(np.round(np.asarray(t) * fps).astype(np.int64))
+            inside = (indices >= 0) & (indices < len(samples))
+            frames = np.zeros((len(indices), AUDIO_CHANNELS))
+            frames[inside] = samples[indices[inside]] / 32768.0
+            return frames[0] if scalar else frames
+
+        super().__init__(make_frame, duration=len(samples) / fps, fps=fps)
+
+
+def open_narration(path: str) -> AudioClip:
+    """
+    Narration clip for `path`: a PcmAudioClip for a 16-bit WAV at AUDIO_FPS,
+    otherwise an AudioFileClip decoded (and resampled) by ffmpeg, e.g. for
+    MP3 narration generated before the PCM path.
+    """
+    pcm = read_pcm_wav(path)
+    if pcm is not None and pcm[1] == AUDIO_FPS:
+        return PcmAudioClip(pcm[0], AUDIO_FPS)
+    return AudioFileClip(path)
@@ -24,6 +24,7 @@ class Parameters(TypedDict):
         post_processing: List of post-processing effects to apply to the video.
         music_volume: Optional parameter for music volume, 1.0 is default
         audio_voice: Optional parameter for TTS voice
+        preview: If True, render a fast low-resolution draft and reuse cached plan, scenes, images and audio
     """
 
     # Input Parameters
@@ -38,6 +39,7 @@ class Parameters(TypedDict):
     post_processing: list[PostProcessing]
     music_volume: float | None  # Optional parameter for music volume, 1.0 is default
     audio_voice: str | None  # Optional parameter for TTS voice
+    preview: bool  # fast draft render, reusing cached assets where the inputs are unchanged
 
     # Output Parameters
     high_level_plan: str | None
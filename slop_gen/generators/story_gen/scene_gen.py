@@ -1,6 +1,7 @@
 from typing import List, Optional
 from pydantic import BaseModel
 from slop_gen.utils.api_utils import openai_chat_api_structured
+from slop_gen.utils.instrumentation import span
 
 
 class SceneDescription(BaseModel):
@@ -138,12 +139,14 @@ def generate_all_scenes(
 
     while current_iteration < max_iterations:
         print(f"Scene generation iteration {current_iteration + 1}...")
-        new_scene_list_obj = generate_scenes_iteratively(
-            story=story,
-            high_level_plan=high_level_plan,
-            num_scenes_to_generate=num_scenes_per_iteration,
-            existing_scenes=all_scenes if all_scenes else None,
-        )
+        with span("scene_batch", iteration=current_iteration) as batch_span:
+            new_scene_list_obj = generate_scenes_iteratively(
+                story=story,
+                high_level_plan=high_level_plan,
+                num_scenes_to_generate=num_scenes_per_iteration,
+                existing_scenes=all_scenes if all_scenes else None,
+            )
+            batch_span.set(scenes_returned=len(new_scene_list_obj.scenes))
 
         if not new_scene_list_obj.scenes:
             print(
@@ -0,0 +1,394 @@
+import multiprocessing
+import os
+import shutil
+import subprocess
+import tempfile
+import uuid
+import wave
+from contextlib import contextmanager
+from typing import Callable, Iterator, List, Optional, Sequence
+
+import numpy as np
+from moviepy.audio.AudioClip import AudioClip
+from moviepy.editor import AudioFileClip
+from moviepy.config import get_setting
+
+from slop_gen.utils.frame_ring import FrameRing
+
+AUDIO_FPS = 44100
+AUDIO_CHANNELS = 2
+AUDIO_CHUNK = 50000
+# A still segment is encoded as a unit of at most this many seconds, repeated.
+STILL_UNIT_SECONDS = 2.0
+# Frame slots per render worker in the ring feeding the encoder.
+RING_SLOTS_PER_WORKER = 2
+
+
+def _render_frames(clip, ring: FrameRing, fps: int, frames: int, worker: int, workers: int) -> None:
+    """Render worker: frames worker, worker + workers, ... of `clip`, into `ring`."""
+    for k in range(worker, frames, workers):
+        # k * (1 / fps), like moviepy's np.arange, so effects see the same times.
+        frame = clip.get_frame(k * (1.0 / fps))
+        with ring.writing(k) as slot:
+            slot[...] = frame[..., :3]
+
+
+@contextmanager
+def _replacing(path: str) -> Iterator[str]:
+    """
+    A unique temporary path next to `path`, moved onto it once the block
+    succeeds and removed if it fails, so concurrent or interrupted renders
+    never leave or read a partial chunk.
+    """
+    tmp_path = f"{path}.{os.getpid()}.{uuid.uuid4().hex[:8]}.tmp.mp4"
+    try:
+        yield tmp_path
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+class SegmentStreamWriter:
+    """
+    Encodes a video one segment at a time instead of as one long composite.
+
+    Each segment's frames go straight to a small video-only file and its
+    narration is appended to a single PCM WAV, after which the caller can drop
+    the segment's clips. `finish` joins the segment files with ffmpeg's concat
+    demuxer (no re-encode) and muxes in the narration, optionally mixed with
+    music. Peak memory is that of one segment, whatever the story length.
+
+    Segment lengths are snapped to whole frames on a running timeline, so
+    video and narration stay within half a frame of each other. Callers with
+    a precomputed Timeline pass its frame and sample counts instead.
+
+    With `workers` > 1, each segment's frames are rendered by that many
+    forked processes and handed to the encoder through a shared-memory
+    FrameRing instead of being rendered in this process.
+    """
+
+    def __init__(
+        self, output_path: str, fps: int, preset: str = "medium", workers: int = 1
+    ) -> None:
+        self.output_path = output_path
+        self.fps = fps
+        self.preset = preset
+        self.workers = workers
+        self._ring: Optional[FrameRing] = None
+        self.ffmpeg = get_setting("FFMPEG_BINARY")
+        self.workdir = tempfile.mkdtemp(
+            prefix="segments_", dir=os.path.dirname(output_path) or "."
+        )
+        self.segment_paths: List[str] = []
+        self.duration = 0.0  # narration timeline, in seconds
+        self._frames = 0
+        self._samples = 0
+        self._narration_path = os.path.join(self.workdir, "narration.wav")
+        self._narration = wave.open(self._narration_path, "wb")
+        self._narration.setnchannels(AUDIO_CHANNELS)
+        self._narration.setsampwidth(2)
+        self._narration.setframerate(AUDIO_FPS)
+
+    def segment_frames(self, duration: float) -> int:
+        """Number of frames the next segment gets if it lasts `duration` seconds."""
+        end_frame = int(round((self.duration + duration) * self.fps))
+        return max(1, end_frame - self._frames)
+
+    def add_segment(
+        self,
+        clip,
+        audio_clip: Optional[AudioClip],
+        duration: float,
+        segment_path: Optional[str] = None,
+        frames: Optional[int] = None,
+        samples: Optional[int] = None,
+    ) -> str:
+        """
+        Encodes `clip` (video only) and appends `audio_clip`, or silence, to the narration.
+
+        The encoded segment is written to `segment_path` if given (e.g. a
+        segment cache), otherwise into the writer's temporary directory.
+        `frames` and `samples` override the counts derived from `duration`.
+        """
+        if frames is None:
+            frames = self.segment_frames(duration)
+        if segment_path is None:
+            segment_path = os.path.join(
+                self.workdir, f"segment_{len(self.segment_paths):05d}.mp4"
+            )
+        with _replacing(segment_path) as tmp_path:
+            if self.workers > 1:
+                self._encode_with_workers(clip, frames, tmp_path)
+            else:
+                # Half a frame short: moviepy samples t in arange(0, duration, 1/fps),
+                # which can otherwise round up to an extra frame.
+                clip.set_duration((frames - 0.5) / self.fps).write_videofile(
+                    tmp_path,
+                    fps=self.fps,
+                    codec="libx264",
+                    audio=False,
+                    preset=self.preset,
+                    logger=None,
+                )
+        return self.add_encoded_segment(
+            segment_path, audio_clip, duration, frames, samples
+        )
+
+    def add_still_segment(
+        self,
+        frame: np.ndarray,
+        audio_clip: Optional[AudioClip],
+        duration: float,
+        segment_path: Optional[str] = None,
+        frames: Optional[int] = None,
+        samples: Optional[int] = None,
+    ) -> str:
+        """
+        add_segment for a segment whose every frame is `frame` (no effect).
+
+        A unit of at most STILL_UNIT_SECONDS of the still is encoded once and
+        stream-copied as many times as the segment needs, plus a shorter
+        remainder, so encoding time does not grow with the segment's length.
+        """
+        if frames is None:
+            frames = self.segment_frames(duration)
+        if segment_path is None:
+            segment_path = os.path.join(
+                self.workdir, f"segment_{len(self.segment_paths):05d}.mp4"
+            )
+        unit = max(1, min(frames, int(round(STILL_UNIT_SECONDS * self.fps))))
+        repeats, remainder = divmod(frames, unit)
+        with _replacing(segment_path) as tmp_path:
+            if repeats == 1 and not remainder:
+                self._encode_still(frame, unit, tmp_path)
+            else:
+                parts = [os.path.join(self.workdir, "still_unit.mp4")] * repeats
+                self._encode_still(frame, unit, parts[0])
+                if remainder:
+                    parts.append(os.path.join(self.workdir, "still_remainder.mp4"))
+                    self._encode_still(frame, remainder, parts[-1])
+                concat_list = self._concat_list(parts, "still")
+                self._run_ffmpeg(
+                    ["-f", "concat", "-safe", "0", "-i", concat_list]
+                    + ["-c", "copy", tmp_path],
+                    "still segment concat",
+                )
+        return self.add_encoded_segment(
+            segment_path, audio_clip, duration, frames, samples
+        )
+
+    def _encode_with_workers(self, clip, frames: int, path: str) -> None:
+        """
+        Encodes `frames` frames of `clip` into `path`: frame k is rendered by
+        worker k % workers straight into the ring, and piped to ffmpeg from there.
+        """
+        width, height = clip.size
+        shape = (height, width, 3)
+        if self._ring is None or self._ring.shape != shape:
+            self._close_ring()
+            self._ring = FrameRing(
+                shape, slots=RING_SLOTS_PER_WORKER * self.workers, workers=self.workers
+            )
+        ring = self._ring
+        ctx = multiprocessing.get_context("fork")
+        # Forked before ffmpeg starts, so no worker holds its stdin open.
+        procs = [
+            ctx.Process(
+                target=_render_frames,
+                args=(clip, ring, self.fps, frames, worker, self.workers),
+                daemon=True,
+            )
+            for worker in range(min(self.workers, frames))
+        ]
+        for proc in procs:
+            proc.start()
+        encoder = subprocess.Popen(
+            self._encoder_cmd(width, height, path),
+            stdin=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+        try:
+            for k in range(frames):
+                while not ring.acquire_read(k, timeout=1.0):
+                    failed = [p.exitcode for p in procs if p.exitcode not in (None, 0)]
+                    if failed:
+                        raise RuntimeError(f"render worker exited with code {failed[0]}")
+                encoder.stdin.write(ring.slot(k).data)
+                ring.release(k)
+        except BaseException:
+            for proc in procs:
+                proc.terminate()
+            # Slots may be left mid-handoff; the next segment gets a new ring.
+            self._close_ring()
+            encoder.kill()
+            raise
+        finally:
+            for proc in procs:
+                proc.join()
+            try:
+                encoder.stdin.close()
+            except BrokenPipeError:  # ffmpeg already exited
+                pass
+            stderr = encoder.stderr.read()
+            encoder.wait()
+        if encoder.returncode != 0:
+            raise RuntimeError(
+                f"ffmpeg encode failed: {stderr.decode(errors='replace').strip()}"
+            )
+
+    def _close_ring(self) -> None:
+        if self._ring is not None:
+            self._ring.close()
+            self._ring = None
+
+    def _encoder_cmd(
+        self, width: int, height: int, path: str, output_args: Sequence[str] = ()
+    ) -> List[str]:
+        """
+        ffmpeg command encoding raw RGB frames from stdin into `path`, with the
+        input and encoder settings moviepy's writer uses, so the results can be
+        stream-copied next to moviepy-encoded segments.
+        """
+        return [
+            self.ffmpeg,
+            "-y",
+            "-loglevel",
+            "error",
+            "-f",
+            "rawvideo",
+            "-vcodec",
+            "rawvideo",
+            "-s",
+            f"{width}x{height}",
+            "-pix_fmt",
+            "rgb24",
+            "-r",
+            f"{self.fps:.02f}",
+            "-an",
+            "-i",
+            "-",
+            *output_args,
+            "-vcodec",
+            "libx264",
+            "-preset",
+            self.preset,
+            "-pix_fmt",
+            "yuv420p",
+            path,
+        ]
+
+    def _encode_still(self, frame: np.ndarray, count: int, path: str) -> None:
+        """Encodes `count` copies of `frame` into `path`."""
+        height, width = frame.shape[:2]
+        cmd = self._encoder_cmd(
+            width,
+            height,
+            path,
+            ["-vf", f"loop=loop={count - 1}:size=1", "-frames:v", str(count)],
+        )
+        pixels = np.ascontiguousarray(frame[..., :3], dtype=np.uint8).tobytes()
+        proc = subprocess.run(cmd, input=pixels, capture_output=True)
+        if proc.returncode != 0:
+            raise RuntimeError(
+                f"ffmpeg still encode failed: {proc.stderr.decode(errors='replace').strip()}"
+            )
+
+    def _concat_list(self, paths: List[str], name: str) -> str:
+        """Writes a concat demuxer list of `paths`; returns its path."""
+        list_path = os.path.join(self.workdir, f"{name}.txt")
+        with open(list_path, "w", encoding="utf-8") as f:
+            for path in paths:
+                f.write(f"file '{os.path.abspath(path)}'\n")
+        return list_path
+
+    def _run_ffmpeg(self, args: List[str], what: str) -> None:
+        proc = subprocess.run(
+            [self.ffmpeg, "-y", "-loglevel", "error", *args],
+            capture_output=True,
+            text=True,
+        )
+        if proc.returncode != 0:
+            raise RuntimeError(f"ffmpeg {what} failed: {proc.stderr.strip()}")
+
+    def add_encoded_segment(
+        self,
+        segment_path: str,
+        audio_clip: Optional[AudioClip],
+        duration: float,
+        frames: Optional[int] = None,
+        samples: Optional[int] = None,
+    ) -> str:
+        """Appends an already encoded segment, e.g. one reused from a segment cache."""
+        if frames is None:
+            frames = self.segment_frames(duration)
+        if samples is None:
+            samples = int(round((self.duration + duration) * AUDIO_FPS)) - self._samples
+        self._append_audio(audio_clip, samples)
+        self.segment_paths.append(segment_path)
+        self._frames += frames
+        self.duration += duration
+        return segment_path
+
+    def _append_audio(self, audio_clip: Optional[AudioClip], target: int) -> None:
+        """Appends exactly `target` samples: `audio_clip`, cut or padded with silence."""
+        written = 0
+        if audio_clip is not None:
+            for chunk in audio_clip.iter_chunks(
+                fps=AUDIO_FPS, quantize=True, nbytes=2, chunksize=AUDIO_CHUNK
+            ):
+                chunk = chunk[: target - written]
+                if chunk.ndim == 1:
+                    chunk = np.column_stack([chunk] * AUDIO_CHANNELS)
+                self._narration.writeframes(np.ascontiguousarray(chunk, "<i2").tobytes())
+                written += len(chunk)
+                if written >= target:
+                    break
+        if written < target:
+            self._narration.writeframes(bytes(2 * AUDIO_CHANNELS * (target - written)))
+        self._samples += target
+
+    def finish(
+        self, mix_audio: Optional[Callable[[AudioClip, float], AudioClip]] = None
+    ) -> str:
+        """Joins the segments into `output_path`; `mix_audio(narration, duration)` may add music."""
+        self._narration.close()
+        concat_list = self._concat_list(self.segment_paths, "segments")
+
+        narration = AudioFileClip(self._narration_path)
+        try:
+            audio = mix_audio(narration, self.duration) if mix_audio else narration
+            audio_path = os.path.join(self.workdir, "audio.m4a")
+            audio.write_audiofile(audio_path, fps=AUDIO_FPS, codec="aac", logger=None)
+        finally:
+            narration.close()
+
+        self._run_ffmpeg(
+            [
+                "-f",
+                "concat",
+                "-safe",
+                "0",
+                "-i",
+                concat_list,
+                "-i",
+                audio_path,
+                "-map",
+                "0:v",
+                "-map",
+                "1:a",
+                "-c",
+                "copy",
+                "-movflags",
+                "+faststart",
+                self.output_path,
+            ],
+            "concat",
+        )
+        return self.output_path
+
+    def close(self) -> None:
+        """Removes the intermediate files."""
+        self._narration.close()  # no-op if already closed
+        self._close_ring()
+        shutil.rmtree(self.workdir, ignore_errors=True)
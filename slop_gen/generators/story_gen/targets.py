@@ -0,0 +1,127 @@
+import os
+import tempfile
+from typing import List, Optional, Tuple, TypedDict
+
+import numpy as np
+from moviepy.video.io.ffmpeg_writer import FFMPEG_VideoWriter
+from PIL import Image
+
+from slop_gen.utils.profiling import RenderProfiler
+
+
+class RenderTarget(TypedDict, total=False):
+    """
+    One output of a multi-target render.
+
+    output_path: Where the video is written.
+    height: Output height in pixels.
+    aspect: (width, height) ratio of the output, e.g. (9, 16) or (1, 1).
+        The largest centered region of the 9:16 render with this ratio is
+        used. Defaults to (9, 16).
+    """
+
+    output_path: str
+    height: int
+    aspect: Tuple[int, int]
+
+
+def _even(value: float) -> int:
+    return max(2, int(round(value / 2)) * 2)
+
+
+def target_size(target: RenderTarget) -> Tuple[int, int]:
+    """(width, height) of the encoded output."""
+    aspect_w, aspect_h = target.get("aspect", (9, 16))
+    height = target["height"]
+    return _even(height * aspect_w / aspect_h), _even(height)
+
+
+def crop_box(target: RenderTarget, frame_W: int, frame_H: int) -> Tuple[int, int, int, int]:
+    """(x1, y1, x2, y2) of the centered region of a frame_W x frame_H frame the target shows."""
+    aspect_w, aspect_h = target.get("aspect", (9, 16))
+    if frame_W * aspect_h > frame_H * aspect_w:  # frame is wider than the target
+        crop_W, crop_H = int(round(frame_H * aspect_w / aspect_h)), frame_H
+    else:
+        crop_W, crop_H = frame_W, int(round(frame_W * aspect_h / aspect_w))
+    x1, y1 = (frame_W - crop_W) // 2, (frame_H - crop_H) // 2
+    return x1, y1, x1 + crop_W, y1 + crop_H
+
+
+def render_height_for(targets: List[RenderTarget]) -> int:
+    """Smallest 9:16 render height from which every target can be cropped without upscaling."""
+    needed = 0
+    for target in targets:
+        out_W, out_H = target_size(target)
+        aspect_w, aspect_h = target.get("aspect", (9, 16))
+        if aspect_w * 16 > aspect_h * 9:  # wider than 9:16: full frame width is used
+            needed = max(needed, int(np.ceil(out_W * 16 / 9)))
+        else:
+            needed = max(needed, out_H)
+    return _even(needed)
+
+
+class _TargetWriter:
+    def __init__(self, target: RenderTarget, frame_W: int, frame_H: int, **writer_kwargs):
+        self.target = target
+        self.size = target_size(target)
+        x1, y1, x2, y2 = crop_box(target, frame_W, frame_H)
+        self.crop = (slice(y1, y2), slice(x1, x2))
+        self.needs_resize = (x2 - x1, y2 - y1) != self.size
+        os.makedirs(os.path.dirname(target["output_path"]) or ".", exist_ok=True)
+        self.writer = FFMPEG_VideoWriter(target["output_path"], self.size, **writer_kwargs)
+
+    def write(self, frame: np.ndarray) -> None:
+        region = frame[self.crop]
+        if self.needs_resize:
+            region = np.asarray(Image.fromarray(region).resize(self.size, Image.LANCZOS))
+        self.writer.write_frame(np.ascontiguousarray(region))
+
+
+def write_render_targets(
+    clip,
+    targets: List[RenderTarget],
+    fps: int,
+    preset: str = "medium",
+    profiler: Optional[RenderProfiler] = None,
+) -> List[str]:
+    """
+    Encodes `clip` to every target in one pass over its frames.
+
+    The audio track is encoded once and muxed into every output; each frame
+    is produced once and only cropped, scaled and encoded per target.
+    """
+    profiler = profiler or RenderProfiler(enabled=False)
+    frame_W, frame_H = clip.size
+    with tempfile.TemporaryDirectory(
+        prefix="targets_", dir=os.path.dirname(targets[0]["output_path"]) or "."
+    ) as workdir:
+        audio_path = None
+        if clip.audio is not None:
+            audio_path = os.path.join(workdir, "audio.m4a")
+            with profiler.section("audio_mix"):
+                clip.audio.write_audiofile(
+                    audio_path, fps=44100, codec="aac", logger=None
+                )
+
+        writers = [
+            _TargetWriter(
+                target,
+                frame_W,
+                frame_H,
+                fps=fps,
+                codec="libx264",
+                audiofile=audio_path,
+                preset=preset,
+            )
+            for target in targets
+        ]
+        try:
+            for frame in clip.iter_frames(fps=fps, dtype="uint8", logger="bar"):
+                for writer in writers:
+                    with profiler.section(f"target_{writer.size[0]}x{writer.size[1]}"):
+                        writer.write(frame)
+        finally:
+            for writer in writers:
+                writer.writer.close()
+
+    return [target["output_path"] for target in targets]
@@ -0,0 +1,153 @@
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from slop_gen.generators.story_gen.effect_plan import EffectPlan, SegmentEffect
+from slop_gen.generators.story_gen.streaming import AUDIO_FPS
+
+
+class Timeline:
+    """
+    Where every segment of a render sits, computed once before any clip is built.
+
+    Arrays are indexed by segment:
+
+    start_frame/end_frame: the segment's frames [start, end) at `fps`, cut on
+        a running timeline so rounding never accumulates; a segment that is
+        shown gets at least one frame.
+    audio_start/audio_end: its narration samples [start, end) at AUDIO_FPS,
+        on the unquantized timeline, so narration stays within half a frame
+        of the picture.
+    effect: index into `effect_names`, -1 for a static view.
+    offset_x/offset_y: the effect plan's offsets.
+    captions: caption text, None where no caption is shown.
+
+    Skipped segments get no frames and no samples. `frame_segment` maps every
+    output frame to its segment, so per-frame lookups are a single index.
+    """
+
+    def __init__(
+        self,
+        fps: int,
+        start_frame: np.ndarray,
+        end_frame: np.ndarray,
+        audio_start: np.ndarray,
+        audio_end: np.ndarray,
+        effect_names: List[str],
+        effect: np.ndarray,
+        offset_x: np.ndarray,
+        offset_y: np.ndarray,
+        captions: List[Optional[str]],
+    ) -> None:
+        self.fps = fps
+        self.start_frame = start_frame
+        self.end_frame = end_frame
+        self.audio_start = audio_start
+        self.audio_end = audio_end
+        self.effect_names = effect_names
+        self.effect = effect
+        self.offset_x = offset_x
+        self.offset_y = offset_y
+        self.captions = captions
+        self.frame_segment = np.repeat(
+            np.arange(len(start_frame), dtype=np.int32), end_frame - start_frame
+        )
+
+    def __len__(self) -> int:
+        return len(self.start_frame)
+
+    @property
+    def n_frames(self) -> int:
+        return int(self.end_frame[-1]) if len(self) else 0
+
+    @property
+    def duration(self) -> float:
+        """Length of the video in seconds."""
+        return self.n_frames / self.fps
+
+    def frames(self, i: int) -> int:
+        return int(self.end_frame[i] - self.start_frame[i])
+
+    def segment_duration(self, i: int) -> float:
+        """Segment `i`'s length in seconds, a whole number of frames."""
+        return self.frames(i) / self.fps
+
+    def start(self, i: int) -> float:
+        return int(self.start_frame[i]) / self.fps
+
+    def audio_samples(self, i: int) -> int:
+        return int(self.audio_end[i] - self.audio_start[i])
+
+    def is_shown(self, i: int) -> bool:
+        return self.end_frame[i] > self.start_frame[i]
+
+    def segment_at_frame(self, frame: int) -> int:
+        return int(self.frame_segment[frame])
+
+    def segment_at(self, t: float) -> int:
+        """Segment on screen at `t` seconds (the last one past the end)."""
+        return self.segment_at_frame(min(max(int(t * self.fps), 0), self.n_frames - 1))
+
+    def segments_in(self, start_frame: int, end_frame: int) -> range:
+        """Segments with frames in [start_frame, end_frame), e.g. one worker's share of a render."""
+        if end_frame <= start_frame or not self.n_frames:
+            return range(0)
+        first = self.segment_at_frame(max(start_frame, 0))
+        last = self.segment_at_frame(min(end_frame, self.n_frames) - 1)
+        return range(first, last + 1)
+
+    def segment_effect(self, i: int) -> SegmentEffect:
+        """Segment `i`'s planned effect, as in the EffectPlan it was built from."""
+        effect = int(self.effect[i])
+        return SegmentEffect(
+            effect=self.effect_names[effect] if effect >= 0 else None,
+            offset_x=float(self.offset_x[i]),
+            offset_y=float(self.offset_y[i]),
+        )
+
+
+def build_timeline(
+    durations: Sequence[float],
+    fps: int,
+    effect_plan: EffectPlan,
+    captions: Optional[Sequence[Optional[str]]] = None,
+    shown: Optional[Sequence[bool]] = None,
+) -> Timeline:
+    """
+    Timeline for segments lasting `durations` seconds (e.g. from
+    probe_segment_durations), with effects from `effect_plan`. Segments
+    whose `shown` flag is False take up no time.
+    """
+    n = len(durations)
+    start_frame = np.zeros(n, dtype=np.int64)
+    end_frame = np.zeros(n, dtype=np.int64)
+    audio_start = np.zeros(n, dtype=np.int64)
+    audio_end = np.zeros(n, dtype=np.int64)
+    seconds, frames, samples = 0.0, 0, 0
+    for i, duration in enumerate(durations):
+        start_frame[i], audio_start[i] = frames, samples
+        if shown is None or shown[i]:
+            frames += max(1, int(round((seconds + duration) * fps)) - frames)
+            seconds += duration
+            samples = int(round(seconds * AUDIO_FPS))
+        end_frame[i], audio_end[i] = frames, samples
+
+    effect_names: List[str] = []
+    effect = np.full(n, -1, dtype=np.int16)
+    for i, segment in enumerate(effect_plan.segments):
+        if segment.effect is not None:
+            if segment.effect not in effect_names:
+                effect_names.append(segment.effect)
+            effect[i] = effect_names.index(segment.effect)
+    return Timeline(
+        fps=fps,
+        start_frame=start_frame,
+        end_frame=end_frame,
+        audio_start=audio_start,
+        audio_end=audio_end,
+        effect_names=effect_names,
+        effect=effect,
+        offset_x=np.array([s.offset_x for s in effect_plan.segments], dtype=np.float64),
+        offset_y=np.array([s.offset_y for s in effect_plan.segments], dtype=np.float64),
+        captions=list(captions) if captions is not None else [None] * n,
+    )
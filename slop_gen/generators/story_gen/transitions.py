@@ -0,0 +1,132 @@
+import bisect
+from enum import Enum
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+
+class Transition(Enum):
+    CROSSFADE = "crossfade"
+    DIP_TO_BLACK = "dip_to_black"
+    SLIDE = "slide"
+
+
+class TransitionBlender:
+    """
+    Blends two frames of the same shape into a buffer it owns.
+
+    The float scratch buffers and the uint8 output are allocated once per
+    frame shape and reused, so a blend allocates nothing. The returned frame
+    is only valid until the next call.
+    """
+
+    def __init__(self) -> None:
+        self._shape: Optional[Tuple[int, ...]] = None
+        self._acc = np.empty(0, dtype=np.float32)
+        self._tmp = np.empty(0, dtype=np.float32)
+        self._out = np.empty(0, dtype=np.uint8)
+
+    def _buffers(self, shape: Tuple[int, ...]):
+        if shape != self._shape:
+            self._shape = shape
+            self._acc = np.empty(shape, dtype=np.float32)
+            self._tmp = np.empty(shape, dtype=np.float32)
+            self._out = np.empty(shape, dtype=np.uint8)
+        return self._acc, self._tmp, self._out
+
+    def crossfade(self, a: np.ndarray, b: np.ndarray, progress: float) -> np.ndarray:
+        acc, tmp, out = self._buffers(a.shape)
+        np.multiply(a, 1.0 - progress, out=acc, casting="unsafe")
+        np.multiply(b, progress, out=tmp, casting="unsafe")
+        acc += tmp
+        np.copyto(out, acc, casting="unsafe")
+        return out
+
+    def dip_to_black(self, a: np.ndarray, b: np.ndarray, progress: float) -> np.ndarray:
+        acc, _, out = self._buffers(a.shape)
+        # Out to black over the first half, in from black over the second.
+        if progress < 0.5:
+            np.multiply(a, 1.0 - 2.0 * progress, out=acc, casting="unsafe")
+        else:
+            np.multiply(b, 2.0 * progress - 1.0, out=acc, casting="unsafe")
+        np.copyto(out, acc, casting="unsafe")
+        return out
+
+    def slide(self, a: np.ndarray, b: np.ndarray, progress: float) -> np.ndarray:
+        """`b` pushes `a` out to the left."""
+        _, _, out = self._buffers(a.shape)
+        width = a.shape[1]
+        shift = int(round(width * progress))
+        out[:, : width - shift] = a[:, shift:]
+        out[:, width - shift :] = b[:, :shift]
+        return out
+
+    def blend(
+        self, transition: Transition, a: np.ndarray, b: np.ndarray, progress: float
+    ) -> np.ndarray:
+        blend_fn = {
+            Transition.CROSSFADE: self.crossfade,
+            Transition.DIP_TO_BLACK: self.dip_to_black,
+            Transition.SLIDE: self.slide,
+        }[transition]
+        return blend_fn(a, b, progress)
+
+
+def transition_windows(
+    durations: List[float], transition_duration: float
+) -> List[Tuple[float, float, float]]:
+    """
+    (cut, start, end) for each cut between consecutive segments.
+
+    Windows are centered on the cut, so the timeline and audio keep their
+    length, and are clamped to half of each neighbouring segment.
+    """
+    windows = []
+    cut = 0.0
+    for before, after in zip(durations, durations[1:]):
+        cut += before
+        half = min(transition_duration / 2, before / 2, after / 2)
+        windows.append((cut, cut - half, cut + half))
+    return windows
+
+
+def apply_transitions(
+    final_clip,
+    clips: List,
+    transition: Transition,
+    transition_duration: float,
+    blender: Optional[TransitionBlender] = None,
+):
+    """
+    Returns a copy of `final_clip` (the concatenation of `clips`) with a
+    transition at every cut.
+
+    Frames outside a transition window come straight from `final_clip`; only
+    frames inside a window fetch both neighbouring segments and blend them, so
+    the extra cost grows with the number and length of transitions, not with
+    the length of the video.
+    """
+    blender = blender or TransitionBlender()
+    windows = transition_windows(
+        [clip.duration for clip in clips], transition_duration
+    )
+    starts = [0.0] + [cut for cut, _, _ in windows]
+    window_starts = [start for _, start, _ in windows]
+    base_make_frame: Callable[[float], np.ndarray] = final_clip.make_frame
+
+    def make_frame(t: float) -> np.ndarray:
+        k = bisect.bisect_right(window_starts, t) - 1
+        if k < 0 or t >= windows[k][2]:
+            return base_make_frame(t)
+        cut, start, end = windows[k]
+        before, after = clips[k], clips[k + 1]
+        # Each side's own time, clamped to the segment: the outgoing segment
+        # holds its last frame past the cut, the incoming one its first before it.
+        frame_a = before.get_frame(min(t - starts[k], before.duration - 1e-3))
+        frame_b = after.get_frame(max(t - cut, 0.0))
+        progress = (t - start) / (end - start)
+        return blender.blend(transition, frame_a, frame_b, progress)
+
+    blended = final_clip.copy()
+    blended.make_frame = make_frame
+    return blended
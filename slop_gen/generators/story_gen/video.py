@@ -1,7 +1,9 @@
+import multiprocessing
 import os
 import random
 import textwrap
-from typing import List, Optional, Callable
+import time
+from typing import List, Optional, Callable, Tuple, Union
 
 from moviepy.editor import (
     ImageClip,
@@ -13,8 +15,28 @@ from moviepy.editor import (
 )
 from moviepy.config import change_settings
 import moviepy.audio.fx.all as afx
+from moviepy.audio.AudioClip import AudioClip
 
+from slop_gen.generators.story_gen.effect_plan import (
+    EffectPlan,
+    SegmentEffect,
+    plan_effects,
+)
+from slop_gen.generators.story_gen.pcm_audio import open_narration
 from slop_gen.generators.story_gen.planning import PostProcessing
+from slop_gen.generators.story_gen.streaming import SegmentStreamWriter
+from slop_gen.generators.story_gen.transitions import Transition, apply_transitions
+from slop_gen.generators.story_gen.timeline import build_timeline
+from slop_gen.generators.story_gen.targets import (
+    RenderTarget,
+    render_height_for,
+    write_render_targets,
+)
+from slop_gen.utils.asset_cache import content_key
+from slop_gen.utils.audio_probe import get_audio_index
+from slop_gen.utils.image_cache import ImagePyramidCache, get_image_cache
+from slop_gen.utils.instrumentation import record, span
+from slop_gen.utils.profiling import RenderProfiler
 
 # It's good practice to call this once, e.g., in your main script or an init file if used across modules.
 # However, having it here ensures it's set if this module is used somewhat independently.
@@ -44,6 +66,40 @@ S_DELTA = 0.1
 MAX_VERTICAL_OFFSET_FRACTION_FOR_ZOOM = (S_BASE - 1) / (2 * S_BASE)  # Approx 0.0833
 
 
+# Random factor for initial view offset (percentage of max pannable area)
+RANDOM_HORIZONTAL_OFFSET_FACTOR = 0.4  # For zoom effects, fraction of pannable width
+
+
+def content_offsets(
+    planned: SegmentEffect, frame_W: int, img_W: int, img_H: int
+) -> Tuple[float, float]:
+    """
+    Initial content offset (x, y) of a segment, in pixels of the base clip:
+    the plan's -1..1 fractions of the largest offset that keeps the frame covered.
+    """
+    # Max pannable content area at S_BASE zoom relative to frame (for X offset of zoom effects)
+    # Ensure these are non-negative if S_BASE makes image smaller than frame (should not happen with S_BASE > 1)
+    max_content_pan_x_for_zoom = max(0, (S_BASE * img_W - frame_W) / 2)
+    offset_x = (
+        planned.offset_x * RANDOM_HORIZONTAL_OFFSET_FACTOR * max_content_pan_x_for_zoom
+    )
+    # Vertical offset based on a fraction of image height (for all effects)
+    # img_H here is the height of the base clip (which is the frame height)
+    offset_y = planned.offset_y * img_H * MAX_VERTICAL_OFFSET_FRACTION_FOR_ZOOM
+    return offset_x, offset_y
+
+
+def rescale_clip(clip: ImageClip, scale: float) -> ImageClip:
+    """`clip.resize(scale)`, served from the image pyramid cache when the clip was built from it."""
+    source = getattr(clip, "pyramid_source", None)
+    if source is None:
+        return clip.resize(scale)
+    image_cache, img_path, height = source
+    return ImageClip(image_cache.get(img_path, height, scale)).set_duration(
+        clip.duration
+    )
+
+
 def zoom_in_effect(
     clip: ImageClip,
     duration: float,
@@ -230,7 +286,7 @@ def pan_diag_br_tl_effect(  # Bottom-Right content to Top-Left content
         current_y = y_start + (y_end - y_start) * (t / duration)
         return (current_x, current_y)
 
-    return clip_base.resize(s_diag_pan).set_position(pos_func)  # type: ignore
+    return rescale_clip(clip_base, s_diag_pan).set_position(pos_func)  # type: ignore
 
 
 def pan_diag_tl_br_effect(  # Top-Left content to Bottom-Right content
@@ -257,7 +313,7 @@ def pan_diag_tl_br_effect(  # Top-Left content to Bottom-Right content
         current_y = y_start + (y_end - y_start) * (t / duration)
         return (current_x, current_y)
 
-    return clip_base.resize(s_diag_pan).set_position(pos_func)  # type: ignore
+    return rescale_clip(clip_base, s_diag_pan).set_position(pos_func)  # type: ignore
 
 
 def pan_diag_tr_bl_effect(  # Top-Right content to Bottom-Left content
@@ -284,7 +340,7 @@ def pan_diag_tr_bl_effect(  # Top-Right content to Bottom-Left content
         current_y = y_start + (y_end - y_start) * (t / duration)
         return (current_x, current_y)
 
-    return clip_base.resize(s_diag_pan).set_position(pos_func)  # type: ignore
+    return rescale_clip(clip_base, s_diag_pan).set_position(pos_func)  # type: ignore
 
 
 def pan_diag_bl_tr_effect(  # Bottom-Left content to Top-Right content
@@ -311,7 +367,25 @@ def pan_diag_bl_tr_effect(  # Bottom-Left content to Top-Right content
         current_y = y_start + (y_end - y_start) * (t / duration)
         return (current_x, current_y)
 
-    return clip_base.resize(s_diag_pan).set_position(pos_func)  # type: ignore
+    return rescale_clip(clip_base, s_diag_pan).set_position(pos_func)  # type: ignore
+
+
+def static_view(
+    clip: ImageClip,
+    duration: float,
+    frame_W: int,
+    frame_H: int,
+    img_W: int,
+    img_H: int,
+    offset_x: float,
+    offset_y: float,
+) -> ImageClip:
+    """Holds still at S_BASE, with the offset content center at the frame center (no effect planned)."""
+    # The base image is HxH, frame is WxH (W<H).
+    # We need to position it so the (img_center + offset) is at frame_center at S_BASE scale.
+    clip_x = frame_W / 2 - S_BASE * (img_W / 2 + offset_x)
+    clip_y = frame_H / 2 - S_BASE * (img_H / 2 + offset_y)
+    return rescale_clip(clip, S_BASE).set_position((clip_x, clip_y))
 
 
 # List of available effects
@@ -341,6 +415,117 @@ available_effects: List[
 ]
 
 
+EFFECTS_BY_NAME = {eff.__name__: eff for eff in available_effects}
+
+# Effects whose scale changes every frame, i.e. a full image resample per frame.
+PER_FRAME_RESIZE_EFFECT_NAMES = {
+    zoom_in_effect.__name__,
+    zoom_out_effect.__name__,
+    zoom_in_top_center_effect.__name__,
+    zoom_out_top_center_effect.__name__,
+}
+
+# Preview renders: a watchable draft for iterating on prompts, effects and music.
+PREVIEW_MAX_HEIGHT = 480
+PREVIEW_MAX_FPS = 12
+PREVIEW_PRESET = "ultrafast"
+FINAL_PRESET = "medium"  # moviepy/ffmpeg default
+
+# Bump when segment rendering changes, so cached segment chunks are not reused.
+SEGMENT_CHUNK_VERSION = 1
+# A segment cache is pruned back to this size after each render that uses it,
+# least recently used chunks first; chunks used within the last
+# SEGMENT_CACHE_MIN_AGE_S seconds are kept, as a concurrent render may be using them.
+SEGMENT_CACHE_MAX_BYTES = 2 * 1024**3
+SEGMENT_CACHE_MIN_AGE_S = 3600
+
+
+def segment_chunk_key(
+    image_hash: str,
+    audio_hash: Optional[str],
+    caption: Optional[Tuple[str, int]],
+    planned: SegmentEffect,
+    size: Tuple[int, int],
+    fps: int,
+    preset: str,
+    frames: int,
+) -> str:
+    """
+    Segment cache key: everything a rendered segment depends on, with the
+    image and narration by content hash and the caption as (text, wrap width).
+    """
+    return content_key(
+        SEGMENT_CHUNK_VERSION,
+        image_hash,
+        audio_hash,
+        caption,
+        planned.model_dump_json(),
+        *size,
+        fps,
+        preset,
+        frames,
+    )
+
+
+def prune_segment_cache(
+    cache_dir: str,
+    max_bytes: int = SEGMENT_CACHE_MAX_BYTES,
+    min_age_s: float = SEGMENT_CACHE_MIN_AGE_S,
+) -> int:
+    """
+    Deletes the least recently used chunks in `cache_dir` (by mtime, which a
+    reuse refreshes) until it holds at most `max_bytes`, plus temporary
+    files left by interrupted renders. Returns the number of bytes freed.
+    """
+    now = time.time()
+    chunks, total, freed = [], 0, 0
+    for entry in os.scandir(cache_dir):
+        if not entry.is_file():
+            continue
+        stat = entry.stat()
+        if now - stat.st_mtime < min_age_s:
+            total += stat.st_size
+        elif entry.name.endswith(".tmp.mp4"):
+            os.remove(entry.path)
+            freed += stat.st_size
+        else:
+            chunks.append((stat.st_mtime, stat.st_size, entry.path))
+            total += stat.st_size
+    for _, size, path in sorted(chunks):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:  # pruned by another render
+            pass
+        total -= size
+        freed += size
+    return freed
+
+
+def content_effect_seed(
+    image_paths: List[str], image_cache: ImagePyramidCache
+) -> int:
+    """Effect plan seed derived from the content of the scene images."""
+    hashes = [
+        image_cache.content_hash(path) if os.path.exists(path) else path
+        for path in image_paths
+    ]
+    return int(content_key("effect_seed", *hashes), 16) % 2**31
+
+
+def probe_segment_durations(
+    audio_paths: List[Optional[str]], default_duration: float
+) -> List[float]:
+    """
+    Duration of each segment: its audio file's, or `default_duration` without
+    audio. Read from the file headers through the audio metadata index, so no
+    ffmpeg process is started.
+    """
+    with span("audio_probe", files=len(audio_paths)):
+        return get_audio_index().durations(audio_paths, default_duration)
+
+
 def create_video_from_assets(
     image_paths: List[str],
     audio_paths: List[Optional[str]],
@@ -356,8 +541,87 @@ def create_video_from_assets(
     post_processing_effects: Optional[
         List[PostProcessing]
     ] = None,  # Added for captions control
+    profile_render: Union[bool, RenderProfiler] = False,
+    profile_report_path: Optional[str] = None,
+    preview: bool = False,
+    image_cache: Optional[ImagePyramidCache] = None,
+    streaming: bool = False,
+    targets: Optional[List[RenderTarget]] = None,
+    segment_cache_dir: Optional[str] = None,
+    effect_seed: Optional[int] = None,
+    effect_plan: Optional[EffectPlan] = None,
+    transition: Optional[Transition] = None,
+    transition_duration: float = 0.5,
+    backend: str = "moviepy",
+    render_workers: int = 1,
 ) -> None:
+    """
+    Renders the scene images/audio into a single 9:16 video at `output_path`.
+
+    Set `profile_render=True` (or pass a configured RenderProfiler, e.g. with
+    `sample_every`) to time each sub-step of segment building and of every
+    frame. The report is printed and folded stacks are written to
+    `profile_report_path` (default: `<output_path>.profile.txt`).
+
+    `preview=True` renders a fast draft: height and fps are capped at
+    PREVIEW_MAX_HEIGHT/PREVIEW_MAX_FPS, x264 runs with the ultrafast preset and
+    only effects without a per-frame resize are used.
+
+    Source images are read through `image_cache` (default: the shared
+    ImagePyramidCache), which keeps them decoded and pre-scaled per frame height.
+
+    `streaming=True` encodes each segment as soon as it is built and joins the
+    pieces with ffmpeg at the end (see SegmentStreamWriter), so memory and open
+    file handles stay flat for long stories instead of growing per scene.
+
+    Segments without an effect (static views, e.g. every segment with
+    `zoom_effect=False`) are composited once and held; streaming renders also
+    encode them in near-constant time (see SegmentStreamWriter.add_still_segment).
+
+    `render_workers` > 1 renders each streamed segment's frames in that many
+    forked processes, which hand them to the encoder through shared memory
+    (see FrameRing); it needs `streaming` and a platform with fork, and
+    per-frame profiling then only covers still segments and the encode.
+
+    `targets` renders several outputs (sizes and crops, see RenderTarget) in
+    one pass: segments, effects and the audio mix are computed once at the
+    smallest 9:16 height every target can be cut from, and each frame is only
+    cropped, scaled and encoded per target. `output_path` and `height` are
+    then ignored.
+
+    `segment_cache_dir` makes a streaming render keep every segment as an
+    encoded chunk keyed by its inputs (image and audio content, caption,
+    effect and offsets, resolution, fps, preset); other renders ignore it.
+    Unchanged segments are reused and the video is re-joined without
+    re-encoding them; `effect_seed`
+    then defaults to one derived from the scene images (see
+    content_effect_seed), so a story keeps its effects, and chunks, across
+    runs while different stories still get different ones.
+    After the render the cache is pruned to SEGMENT_CACHE_MAX_BYTES, least
+    recently used chunks first (see prune_segment_cache); deleting the
+    directory is always safe.
+
+    Effects come from `effect_plan` (see plan_effects), planned up front from
+    the segment durations with `effect_seed` (random if not given) unless a
+    plan is passed in. The same plan and inputs give the same video.
+
+    `transition` blends every cut over `transition_duration` seconds (centered
+    on the cut, so the length and audio don't change); only the frames inside
+    a transition are composited twice. Streaming renders keep hard cuts.
+
+    `backend="ffmpeg"` compiles the whole render (effects, captions, narration
+    and music) into one ffmpeg filtergraph instead of compositing frames with
+    moviepy (see story_gen.ffmpeg_render). It renders a single output with
+    hard cuts, so `targets`, `streaming`, `segment_cache_dir`, `transition`
+    and `profile_render` are ignored.
+    """
     clips = []
+    if image_cache is None:
+        image_cache = get_image_cache()
+    if isinstance(profile_render, RenderProfiler):
+        profiler = profile_render
+    else:
+        profiler = RenderProfiler(enabled=bool(profile_render))
     total_segments = len(image_paths)
 
     # Determine actual music volume to use
@@ -375,6 +639,46 @@ def create_video_from_assets(
                 f"Warning: Invalid music_volume_param '{music_volume_param}'. Using default volume {actual_music_volume}."
             )
 
+    if preview:
+        height = min(height, PREVIEW_MAX_HEIGHT)
+        fps = min(fps, PREVIEW_MAX_FPS)
+        print(f"👀 Preview render: {height}p at {fps} fps, preset '{PREVIEW_PRESET}'")
+
+    if backend == "ffmpeg":
+        ignored = [
+            name
+            for name, value in [
+                ("targets", targets),
+                ("streaming", streaming),
+                ("segment_cache_dir", segment_cache_dir),
+                ("transition", transition),
+                ("profile_render", profile_render),
+            ]
+            if value
+        ]
+        if ignored:
+            print(f"⚠️ The ffmpeg backend ignores: {', '.join(ignored)}")
+        targets, streaming, segment_cache_dir, transition = None, False, None, None
+    elif backend != "moviepy":
+        raise ValueError(f"Unknown render backend '{backend}'")
+
+    if targets:
+        height = render_height_for(targets)
+        print(f"🎯 Rendering {len(targets)} targets from a single {height}p pass")
+        if streaming:
+            print("⚠️ Streaming render does not support targets; rendering in one pass.")
+            streaming = False
+
+    if segment_cache_dir:
+        if not streaming:
+            print("⚠️ Segment cache is only used by streaming renders; not caching.")
+            segment_cache_dir = None
+        else:
+            os.makedirs(segment_cache_dir, exist_ok=True)
+
+    if transition and streaming:
+        print("⚠️ Transitions need neighbouring segments; streaming render keeps hard cuts.")
+
     # Calculate target 9:16 frame dimensions
     target_frame_H = height
     target_frame_W = int(round(target_frame_H * 9 / 16))
@@ -383,12 +687,6 @@ def create_video_from_assets(
 
     print(f"Target video resolution: {target_frame_W}x{target_frame_H} (9:16)")
 
-    # Random factor for initial view offset (percentage of max pannable area)
-    RANDOM_HORIZONTAL_OFFSET_FACTOR = (
-        0.4  # For zoom effects, fraction of pannable width
-    )
-    # RANDOM_VERTICAL_OFFSET_FRACTION = 0.1  # For all effects, fraction of image height # REMOVED - Using new global constant
-
     if len(image_paths) != len(audio_paths) or len(image_paths) != len(scene_texts):
         print(
             "Error: image_paths, audio_paths, and scene_texts lists must have the same length."
@@ -403,138 +701,192 @@ def create_video_from_assets(
             print("Error: No media to process after length check.")
             return
 
-    last_applied_effect_name: Optional[str] = None  # Track the last applied effect
-    pan_effect_names = {
-        "pan_left_to_right_effect",
-        "pan_right_to_left_effect",
-    }  # Define pan effect names
+    preset = PREVIEW_PRESET if preview else FINAL_PRESET
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    if render_workers > 1 and not streaming:
+        print("⚠️ Render workers are only used by streaming renders; rendering in-process.")
+    elif render_workers > 1 and "fork" not in multiprocessing.get_all_start_methods():
+        print("⚠️ Render workers need fork; rendering in-process.")
+        render_workers = 1
+    writer = (
+        SegmentStreamWriter(output_path, fps=fps, preset=preset, workers=render_workers)
+        if streaming
+        else None
+    )
+    open_readers: List[AudioClip] = []  # closed once the video is written
+
+    def add_background_music(audio, duration: float):
+        """Returns `audio` with a looped or randomly offset slice of the music under it."""
+        if not (music_path and os.path.exists(music_path)):
+            return audio
+        try:
+            full_music_clip = AudioFileClip(music_path)
+            open_readers.append(full_music_clip)
+            # If final video is longer than music, loop music, otherwise take a slice
+            if duration > full_music_clip.duration:
+                bg_music_clip = afx.audio_loop(  # type: ignore
+                    full_music_clip, duration=duration
+                ).volumex(actual_music_volume)
+            else:
+                # Try to pick a somewhat random segment if music is longer
+                max_start_time = max(0, full_music_clip.duration - duration)
+                start_time = random.uniform(0, max_start_time)
+                bg_music_clip = full_music_clip.subclip(
+                    start_time, start_time + duration
+                ).volumex(actual_music_volume)
+            print(f"✅ Added background music: {music_path}")
+            # If there is already audio (from segments), composite it
+            if audio:
+                return CompositeAudioClip([audio, bg_music_clip])
+            return bg_music_clip
+        except Exception as e:
+            print(f"⚠️ Could not add background music: {e}")
+            return audio
+
+    # The whole timeline is known before any audio decoder is opened.
+    segment_durations = probe_segment_durations(audio_paths, default_segment_duration)
+
+    if effect_plan is None:
+        if effect_seed is None and segment_cache_dir:
+            effect_seed = content_effect_seed(image_paths, image_cache)
+        elif effect_seed is None:
+            effect_seed = random.randrange(2**31)
+        planned_effects = list(EFFECTS_BY_NAME) if zoom_effect else []
+        if preview:
+            # Per-frame resizes dominate render time; previews stick to pans.
+            planned_effects = [
+                name
+                for name in planned_effects
+                if name not in PER_FRAME_RESIZE_EFFECT_NAMES
+            ] or planned_effects
+        effect_plan = plan_effects(
+            segment_durations,
+            effect_seed,
+            planned_effects,
+            zoom_effect_names=PER_FRAME_RESIZE_EFFECT_NAMES,
+        )
+        print(f"🎲 Effect plan seed: {effect_plan.seed}")
+    elif len(effect_plan.segments) != len(image_paths):
+        raise ValueError(
+            f"effect_plan has {len(effect_plan.segments)} segments, expected {len(image_paths)}"
+        )
+
+    # Frame-quantized start/end, narration offsets, effect and caption of every
+    # segment; the segments, the narration track, captions and music follow it.
+    show_captions = bool(
+        post_processing_effects and PostProcessing.CAPTION in post_processing_effects
+    )
+    timeline = build_timeline(
+        segment_durations,
+        fps,
+        effect_plan,
+        captions=[
+            text if show_captions and text and text != "@@@" else None
+            for text in scene_texts
+        ],
+        shown=[bool(path) for path in image_paths],
+    )
+
+    if backend == "ffmpeg":
+        # Imported here: the ffmpeg backend builds on this module's effects.
+        from slop_gen.generators.story_gen.ffmpeg_render import render_timeline
+
+        try:
+            render_timeline(
+                timeline,
+                image_paths,
+                audio_paths,
+                output_path,
+                target_frame_W,
+                target_frame_H,
+                preset=preset,
+                music_path=music_path,
+                music_volume=actual_music_volume,
+                wrap_width=wrap_width,
+                image_cache=image_cache,
+            )
+            print(f"✅ Video successfully written to {output_path}")
+        except Exception as e:
+            print(f"❌ Error writing final video to {output_path}: {e}")
+        return
 
     for i in range(len(image_paths)):
         img_path = image_paths[i]
         audio_path = audio_paths[i]
         raw_text = scene_texts[i]
 
-        if not img_path:
+        if not timeline.is_shown(i):
             print(f"⚠️ Skipping segment {i+1} – missing image path.")
             continue
 
         segment_audio_clip = None
-        duration = default_segment_duration
+        duration = timeline.segment_duration(i)
+
+        with span("segment_build", segment=i, image_path=img_path), profiler.section(
+            "segment"
+        ):
+            try:
+                if audio_path and os.path.exists(audio_path):
+                    with profiler.section("audio_open"):
+                        segment_audio_clip = open_narration(audio_path)
+                    if writer is None:
+                        open_readers.append(segment_audio_clip)
+                elif raw_text == "@@@":  # Silent scene marker, use default duration
+                    print(
+                        f"ℹ️ Segment {i+1} is silent (@@@), using default duration: {duration}s"
+                    )
+                else:
+                    print(
+                        f"⚠️ No audio for segment {i+1} or audio path invalid. Using default duration: {duration}s. Text: '{raw_text[:30]}...'"
+                    )
 
-        try:
-            if audio_path and os.path.exists(audio_path):
-                segment_audio_clip = AudioFileClip(audio_path)
-                duration = segment_audio_clip.duration
-            elif raw_text == "@@@":  # Silent scene marker, use default duration
-                print(
-                    f"ℹ️ Segment {i+1} is silent (@@@), using default duration: {duration}s"
+                # Image Clip: scaled to cover frame height (making it square HxH), then apply effects
+                with profiler.section("decode"):
+                    img_movie_clip_base = ImageClip(
+                        image_cache.get(img_path, target_frame_H)
+                    ).set_duration(
+                        duration
+                    )  # Image is target_frame_H x target_frame_H
+                img_movie_clip_base.pyramid_source = (
+                    image_cache,
+                    img_path,
+                    target_frame_H,
                 )
-            else:
-                print(
-                    f"⚠️ No audio for segment {i+1} or audio path invalid. Using default duration: {duration}s. Text: '{raw_text[:30]}...'"
-                )
-
-            # Image Clip: resize to cover frame height (making it square HxH), then apply effects
-            img_movie_clip_base = (
-                ImageClip(img_path)
-                .set_duration(duration)
-                .resize(
-                    height=target_frame_H
-                )  # Image becomes target_frame_H x target_frame_H
-            )
 
-            # Get dimensions of the base image clip (which is square target_frame_H x target_frame_H)
-            img_W, img_H = img_movie_clip_base.w, img_movie_clip_base.h
+                # Get dimensions of the base image clip (which is square target_frame_H x target_frame_H)
+                img_W, img_H = img_movie_clip_base.w, img_movie_clip_base.h
 
-            # Calculate random initial content offsets for this segment
-            # Max pannable content area at S_BASE zoom relative to frame (for X offset of zoom effects)
-            # Ensure these are non-negative if S_BASE makes image smaller than frame (should not happen with S_BASE > 1)
-            max_content_pan_x_for_zoom = max(0, (S_BASE * img_W - target_frame_W) / 2)
-            content_offset_x = (
-                random.uniform(
-                    -RANDOM_HORIZONTAL_OFFSET_FACTOR, RANDOM_HORIZONTAL_OFFSET_FACTOR
+                planned = timeline.segment_effect(i)
+                content_offset_x, content_offset_y = content_offsets(
+                    planned, target_frame_W, img_W, img_H
                 )
-                * max_content_pan_x_for_zoom
-            )
-
-            # Vertical offset based on a fraction of image height (for all effects)
-            # img_H here is the height of img_movie_clip_base (which is target_frame_H)
-            max_abs_vertical_offset = (
-                img_H * MAX_VERTICAL_OFFSET_FRACTION_FOR_ZOOM
-            )  # Use the new constant
-            content_offset_y = random.uniform(
-                -max_abs_vertical_offset, max_abs_vertical_offset
-            )
-
-            current_effect_name_for_update: Optional[str] = (
-                None  # Stores name of effect applied in this iteration
-            )
 
-            if zoom_effect:
-                if available_effects:
-                    effect_func_to_apply: Optional[Callable[..., ImageClip]] = None
-
-                    eligible_choices = list(available_effects)  # Start with all effects
-
-                    if (
-                        last_applied_effect_name
-                        and last_applied_effect_name in pan_effect_names
-                    ):
-                        # If last effect was a pan, try to pick a different one
-                        filtered_choices = [
-                            eff
-                            for eff in eligible_choices
-                            if eff.__name__ != last_applied_effect_name
-                        ]
-                        if filtered_choices:
-                            effect_func_to_apply = random.choice(filtered_choices)
-                        else:
-                            # Fallback: if filtering left no choices (e.g., only one effect type, and it was the last pan)
-                            effect_func_to_apply = random.choice(
-                                eligible_choices
-                            )  # Pick from original list
-                    else:
-                        # Last effect was not a pan, or no last effect yet, so pick any.
-                        effect_func_to_apply = random.choice(eligible_choices)
+                effect_func_to_apply = EFFECTS_BY_NAME.get(planned.effect or "")
+                if planned.effect and not effect_func_to_apply:
+                    print(
+                        f"Warning: Unknown effect '{planned.effect}' planned for segment {i+1}. Using a static view."
+                    )
 
-                    if effect_func_to_apply:
-                        print(
-                            f"Applying effect: {effect_func_to_apply.__name__} to segment {i+1} with offset ({content_offset_x:.2f}, {content_offset_y:.2f})"
+                if effect_func_to_apply:
+                    print(
+                        f"Applying effect: {effect_func_to_apply.__name__} to segment {i+1} with offset ({content_offset_x:.2f}, {content_offset_y:.2f})"
+                    )
+                    try:
+                        img_movie_clip_affected = effect_func_to_apply(
+                            img_movie_clip_base,
+                            duration,
+                            target_frame_W,
+                            target_frame_H,
+                            img_W,
+                            img_H,
+                            content_offset_x,
+                            content_offset_y,
                         )
-                        try:
-                            img_movie_clip_affected = effect_func_to_apply(
-                                img_movie_clip_base,
-                                duration,
-                                target_frame_W,
-                                target_frame_H,
-                                img_W,
-                                img_H,
-                                content_offset_x,
-                                content_offset_y,
-                            )
-                            current_effect_name_for_update = (
-                                effect_func_to_apply.__name__
-                            )
-                        except Exception as e_effect:
-                            print(
-                                f"Error applying effect {effect_func_to_apply.__name__} to segment {i+1}: {e_effect}"
-                            )
-                            # Fallback to a default if effect fails
-                            img_movie_clip_affected = zoom_in_effect(
-                                img_movie_clip_base,
-                                duration,
-                                target_frame_W,
-                                target_frame_H,
-                                img_W,
-                                img_H,
-                                0,
-                                0,  # No offset for fallback
-                            )
-                            current_effect_name_for_update = zoom_in_effect.__name__
-                    else:  # Should not happen if available_effects is not empty
+                    except Exception as e_effect:
                         print(
-                            f"Warning: No effect function was selected for segment {i+1}. Using default zoom_in_effect."
+                            f"Error applying effect {effect_func_to_apply.__name__} to segment {i+1}: {e_effect}"
                         )
+                        # Fallback to a default if effect fails
                         img_movie_clip_affected = zoom_in_effect(
                             img_movie_clip_base,
                             duration,
@@ -543,140 +895,215 @@ def create_video_from_assets(
                             img_W,
                             img_H,
                             0,
-                            0,
+                            0,  # No offset for fallback
                         )
-                        current_effect_name_for_update = zoom_in_effect.__name__
-
-                else:  # Fallback if no effects are defined in available_effects list
-                    print(
-                        f"No effects in available_effects list. Using default zoom_in_effect for segment {i+1}."
-                    )
-                    img_movie_clip_affected = zoom_in_effect(
+                else:
+                    img_movie_clip_affected = static_view(
                         img_movie_clip_base,
                         duration,
                         target_frame_W,
                         target_frame_H,
                         img_W,
                         img_H,
-                        0,
-                        0,  # No offset for fallback
+                        content_offset_x,
+                        content_offset_y,
                     )
-                    current_effect_name_for_update = zoom_in_effect.__name__
-            else:
-                # If no zoom effect, center the base image clip considering the random offset
-                # The base image is HxH, frame is WxH (W<H).
-                # We need to position it so the (img_center + offset) is at frame_center at S_BASE scale.
-                # Clip position for a static view at S_BASE scale with offset:
-                s_static = S_BASE  # or 1.0 if no zoom effect means no initial zoom beyond fitting
-                clip_x_static = target_frame_W / 2 - s_static * (
-                    img_W / 2 + content_offset_x
-                )
-                clip_y_static = target_frame_H / 2 - s_static * (
-                    img_H / 2 + content_offset_y
-                )
-                img_movie_clip_affected = img_movie_clip_base.resize(
-                    s_static
-                ).set_position((clip_x_static, clip_y_static))
-                current_effect_name_for_update = (
-                    None  # No specific 'effect' from the list was chosen
-                )
 
-            last_applied_effect_name = (
-                current_effect_name_for_update  # Update for the next iteration
-            )
+                caption = timeline.captions[i]
 
-            # Text Clip
-            text_segments = []
-            if (
-                raw_text
-                and raw_text != "@@@"
-                and post_processing_effects
-                and PostProcessing.CAPTION in post_processing_effects
-            ):  # Don't add text for silent scenes or if text is empty, and check for CAPTION post-processing
-                wrapped_text = textwrap.fill(raw_text, width=wrap_width)
-                # Potentially make font, size, color, etc., parameters
-                txt_clip = (
-                    TextClip(
-                        wrapped_text,
-                        fontsize=40,  # Adjusted for 1080p height
-                        font="Arial-Bold",  # Consider allowing font choice or ensure it's available
-                        color="white",
-                        stroke_color="black",
-                        stroke_width=1,
-                        method="caption",  # Use caption for auto-sizing to width
-                        size=(
-                            target_frame_W * 0.9,  # Text width is 90% of frame width
-                            None,
+                chunk_path = None
+                if segment_cache_dir and writer is not None:
+                    chunk_key = segment_chunk_key(
+                        image_cache.content_hash(img_path),
+                        (
+                            get_audio_index().content_hash(audio_path)
+                            if segment_audio_clip
+                            else None
                         ),
-                        align="center",
+                        (caption, wrap_width) if caption else None,
+                        planned,
+                        (target_frame_W, target_frame_H),
+                        fps,
+                        preset,
+                        timeline.frames(i),
                     )
-                    .set_position(
-                        ("center", 0.8), relative=True
-                    )  # Position lower for portrait
-                    .set_duration(duration)
+                    chunk_path = os.path.join(segment_cache_dir, f"{chunk_key}.mp4")
+                    if os.path.exists(chunk_path):
+                        print(f"♻️ Reusing rendered segment {i+1}")
+                        record(cache_hits=1)
+                        os.utime(chunk_path)  # recently used: pruned last
+                        writer.add_encoded_segment(
+                            chunk_path,
+                            segment_audio_clip,
+                            duration,
+                            timeline.frames(i),
+                            timeline.audio_samples(i),
+                        )
+                        continue
+
+                # Text Clip
+                text_segments = []
+                # Don't add text for silent scenes or if text is empty, and check for CAPTION post-processing
+                if caption:
+                    wrapped_text = textwrap.fill(caption, width=wrap_width)
+                    # Potentially make font, size, color, etc., parameters
+                    with profiler.section("caption_build"):
+                        txt_clip = (
+                            TextClip(
+                                wrapped_text,
+                                fontsize=40,  # Adjusted for 1080p height
+                                font="Arial-Bold",  # Consider allowing font choice or ensure it's available
+                                color="white",
+                                stroke_color="black",
+                                stroke_width=1,
+                                method="caption",  # Use caption for auto-sizing to width
+                                size=(
+                                    target_frame_W * 0.9,  # Text width is 90% of frame width
+                                    None,
+                                ),
+                                align="center",
+                            )
+                            .set_position(
+                                ("center", 0.8), relative=True
+                            )  # Position lower for portrait
+                            .set_duration(duration)
+                        )
+                    text_segments.append(profiler.wrap_clip(txt_clip, "caption"))
+
+                # Composite video for the segment
+                video_elements = [
+                    profiler.wrap_clip(img_movie_clip_affected, "effect")
+                ] + text_segments  # Use the affected clip
+                segment_video_clip = CompositeVideoClip(
+                    video_elements,
+                    size=(target_frame_W, target_frame_H),  # Set segment to 9:16
                 )
-                text_segments.append(txt_clip)
-
-            # Composite video for the segment
-            video_elements = [
-                img_movie_clip_affected
-            ] + text_segments  # Use the affected clip
-            segment_video_clip = CompositeVideoClip(
-                video_elements,
-                size=(target_frame_W, target_frame_H),  # Set segment to 9:16
-            )
-
-            if segment_audio_clip:
-                segment_video_clip = segment_video_clip.set_audio(segment_audio_clip)
-
-            clips.append(segment_video_clip)
-
-        except Exception as e:
-            print(f"❌ Error building segment {i+1} for image '{img_path}': {e}")
+                still_frame = None
+                if effect_func_to_apply is None:
+                    # Nothing moves, so composite one frame and hold it.
+                    with profiler.section("still_frame"):
+                        still_frame = segment_video_clip.get_frame(0)
+                    segment_video_clip = ImageClip(still_frame).set_duration(duration)
+                    record(still_segments=1)
+
+                if segment_audio_clip:
+                    # Cut to the segment's whole frames so narration never spills into the next one.
+                    segment_video_clip = segment_video_clip.set_audio(
+                        segment_audio_clip.set_duration(
+                            min(segment_audio_clip.duration, duration)
+                        )
+                    )
 
-    if not clips:
-        print("❌ No video segments were created. Aborting video generation.")
-        return
+                segment_video_clip = profiler.wrap_clip(segment_video_clip, "composite")
+                if writer is None:
+                    clips.append(segment_video_clip)
+                else:
+                    # Encode now so this segment's frames and readers can be released.
+                    with span("segment_encode", segment=i), profiler.section("encode"):
+                        if still_frame is not None:
+                            writer.add_still_segment(
+                                still_frame,
+                                segment_audio_clip,
+                                duration,
+                                segment_path=chunk_path,
+                                frames=timeline.frames(i),
+                                samples=timeline.audio_samples(i),
+                            )
+                        else:
+                            writer.add_segment(
+                                profiler.wrap_clip(
+                                    segment_video_clip, "frame", frame_root=True
+                                ),
+                                segment_audio_clip,
+                                duration,
+                                segment_path=chunk_path,
+                                frames=timeline.frames(i),
+                                samples=timeline.audio_samples(i),
+                            )
 
-    final_video_clip = concatenate_videoclips(clips, method="compose")
+            except Exception as e:
+                print(f"❌ Error building segment {i+1} for image '{img_path}': {e}")
+            finally:
+                if writer is not None and segment_audio_clip is not None:
+                    segment_audio_clip.close()
 
-    # Add background music if specified
-    if music_path and os.path.exists(music_path):
-        try:
-            full_music_clip = AudioFileClip(music_path)
-            # If final video is longer than music, loop music, otherwise take a slice
-            if final_video_clip.duration > full_music_clip.duration:
-                bg_music_clip = afx.audio_loop(  # type: ignore
-                    full_music_clip, duration=final_video_clip.duration
-                ).volumex(actual_music_volume)
-            else:
-                # Try to pick a somewhat random segment if music is longer
-                max_start_time = max(
-                    0, full_music_clip.duration - final_video_clip.duration
+    try:
+        if writer is not None:
+            if not writer.segment_paths:
+                print("❌ No video segments were created. Aborting video generation.")
+                return
+            try:
+                with span(
+                    "encode", output_path=output_path, fps=fps, height=height
+                ) as encode_span, profiler.section("mux"):
+                    writer.finish(add_background_music)
+                    encode_span.add(bytes_out=os.path.getsize(output_path))
+                print(f"✅ Video successfully written to {output_path}")
+            except Exception as e:
+                print(f"❌ Error writing final video to {output_path}: {e}")
+        else:
+            if not clips:
+                print("❌ No video segments were created. Aborting video generation.")
+                return
+
+            final_video_clip = concatenate_videoclips(clips, method="compose")
+            if transition:
+                final_video_clip = apply_transitions(
+                    final_video_clip, clips, transition, transition_duration
                 )
-                start_time = random.uniform(0, max_start_time)
-                bg_music_clip = full_music_clip.subclip(
-                    start_time, start_time + final_video_clip.duration
-                ).volumex(actual_music_volume)
+            # Segment clips last their timeline durations, so this is
+            # timeline.duration unless a segment failed to build.
+            final_video_clip = final_video_clip.set_audio(
+                add_background_music(final_video_clip.audio, final_video_clip.duration)
+            )
 
-            # If the final_video_clip already has audio (from segments), composite it
-            if final_video_clip.audio:
-                final_audio = CompositeAudioClip(
-                    [final_video_clip.audio, bg_music_clip]
+            # Per-frame hooks: every frame pulled by the encoder, and the mixed audio track.
+            final_video_clip = profiler.wrap_clip(
+                final_video_clip, "frame", frame_root=True
+            )
+            if final_video_clip.audio is not None:
+                final_video_clip = final_video_clip.set_audio(
+                    profiler.wrap_clip(final_video_clip.audio, "audio")
                 )
-                final_video_clip = final_video_clip.set_audio(final_audio)
-            else:
-                final_video_clip = final_video_clip.set_audio(bg_music_clip)
-            print(f"✅ Added background music: {music_path}")
-        except Exception as e:
-            print(f"⚠️ Could not add background music: {e}")
 
-    try:
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
-        # Consider adding more write_videofile parameters for quality, codec, threads, logger, etc.
-        final_video_clip.write_videofile(
-            output_path, fps=fps, codec="libx264", audio_codec="aac"
+            try:
+                # Consider adding more write_videofile parameters for quality, codec, threads, logger, etc.
+                with span(
+                    "encode", output_path=output_path, fps=fps, height=height
+                ) as encode_span, profiler.section("encode"):
+                    if targets:
+                        written_paths = write_render_targets(
+                            final_video_clip, targets, fps, preset, profiler
+                        )
+                    else:
+                        final_video_clip.write_videofile(
+                            output_path,
+                            fps=fps,
+                            codec="libx264",
+                            audio_codec="aac",
+                            preset=preset,
+                        )
+                        written_paths = [output_path]
+                    encode_span.add(
+                        bytes_out=sum(os.path.getsize(p) for p in written_paths)
+                    )
+                for path in written_paths:
+                    print(f"✅ Video successfully written to {path}")
+            except Exception as e:
+                print(f"❌ Error writing final video to {output_path}: {e}")
+    finally:
+        if writer is not None:
+            writer.close()
+        for reader in open_readers:
+            reader.close()
+        if segment_cache_dir:
+            freed = prune_segment_cache(segment_cache_dir)
+            if freed:
+                print(f"🧹 Pruned {freed / 1e6:.1f} MB from the segment cache")
+
+    if profiler.enabled:
+        print(profiler.report())
+        report_path = profiler.write_folded(
+            profile_report_path or f"{output_path}.profile.txt"
         )
-        print(f"✅ Video successfully written to {output_path}")
-    except Exception as e:
-        print(f"❌ Error writing final video to {output_path}: {e}")
+        print(f"📊 Render profile (folded stacks) written to {report_path}")
@@ -1,5 +1,5 @@
 import os
-from typing import List
+from typing import Callable, List
 
 from dotenv import load_dotenv
 from openai import OpenAI
@@ -12,15 +12,41 @@ import base64
 from io import BytesIO
 from PIL import Image
 
+from slop_gen.utils.image_ingest import ingest_image_response
+from slop_gen.utils.instrumentation import span, record
 
 load_dotenv()
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-OPENAI_BASE_URL = "https://api.ai.it.cornell.edu/v1"
+# Overridable so the pipeline can run against slop_gen.utils.mock_proxy.
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL", "https://api.ai.it.cornell.edu/v1")
 openai_client = OpenAI(api_key=OPENAI_API_KEY, base_url=OPENAI_BASE_URL)
 
 
+def set_base_url(base_url: str) -> None:
+    """Points every helper in this module at a different proxy (e.g. the local mock)."""
+    global OPENAI_BASE_URL, openai_client
+    OPENAI_BASE_URL = base_url
+    openai_client = OpenAI(api_key=OPENAI_API_KEY, base_url=OPENAI_BASE_URL)
+
+
+def _record_transfer(response: requests.Response) -> None:
+    """Adds request/response body sizes to the current instrumentation span."""
+    body = response.request.body if response.request is not None else None
+    record(bytes_out=len(body or b""), bytes_in=len(response.content))
+
+
+def _record_usage(completion) -> None:
+    """Adds prompt/completion token counts to the current instrumentation span."""
+    usage = getattr(completion, "usage", None)
+    if usage is not None:
+        record(
+            tokens_in=usage.prompt_tokens or 0,
+            tokens_out=usage.completion_tokens or 0,
+        )
+
+
 def generate_images_with_imagen(
     prompt, model="google.imagen-3.0-generate", number_of_images=1, aspect_ratio="3:4"
 ):
@@ -43,7 +69,9 @@ def generate_images_with_imagen(
         "aspect_ratio": aspect_ratio,
     }
 
-    response = requests.post(url, headers=headers, json=payload)
+    with span("api.images", model=model, n=number_of_images):
+        response = requests.post(url, headers=headers, json=payload)
+        _record_transfer(response)
     response.raise_for_status()
     data = response.json().get("data", [])
 
@@ -52,6 +80,7 @@ def generate_images_with_imagen(
         img_url = img.get("url")
         if img_url:
             img_resp = requests.get(img_url)
+            _record_transfer(img_resp)
             img_resp.raise_for_status()
             images.append(BytesIO(img_resp.content))
         elif "b64_json" in img:
@@ -91,7 +120,9 @@ def generate_openai_images_via_proxy(
         "response_format": response_format,
     }
 
-    response = requests.post(url, headers=headers, json=payload)
+    with span("api.images", model=model, n=n, size=size):
+        response = requests.post(url, headers=headers, json=payload)
+        _record_transfer(response)
     response.raise_for_status()  # Raise an exception for HTTP errors
     data = response.json().get("data", [])
 
@@ -119,6 +150,7 @@ def generate_openai_images_via_proxy(
                     "url format requested but no url field in response item."
                 )
             img_resp = requests.get(img_url)
+            _record_transfer(img_resp)
             img_resp.raise_for_status()
             images.append(BytesIO(img_resp.content))
         else:
@@ -132,13 +164,92 @@ def generate_openai_images_via_proxy(
     return images
 
 
+def _post_images_to_files(
+    payload: dict, path_for: Callable[[int], str], **span_fields
+) -> List[str]:
+    url = f"{OPENAI_BASE_URL}/images/generations"
+    headers = {
+        "Authorization": f"Bearer {OPENAI_API_KEY}",
+        "Content-Type": "application/json",
+    }
+    with span("api.images", **span_fields):
+        with requests.post(url, headers=headers, json=payload, stream=True) as response:
+            record(bytes_out=len(response.request.body or b""))
+            response.raise_for_status()
+            paths, received = ingest_image_response(response, path_for)
+            record(bytes_in=received)
+    return paths
+
+
+def generate_images_with_imagen_to_files(
+    prompt: str,
+    path_for: Callable[[int], str],
+    model: str = "google.imagen-3.0-generate",
+    number_of_images: int = 1,
+    aspect_ratio: str = "3:4",
+) -> List[str]:
+    """
+    Like generate_images_with_imagen, but streams the n-th image straight
+    into the file `path_for(n)` and returns the paths written.
+    """
+    if not OPENAI_API_KEY:
+        raise ValueError("OPENAI_API_KEY not set")
+    payload = {
+        "model": model,
+        "prompt": prompt,
+        "num_images": number_of_images,
+        "aspect_ratio": aspect_ratio,
+    }
+    paths = _post_images_to_files(
+        payload,
+        path_for,
+        model=model,
+        n=number_of_images,
+        aspect_ratio=aspect_ratio,
+    )
+    if not paths:
+        raise RuntimeError(f"No image data returned for prompt: {prompt}.")
+    return paths
+
+
+def generate_openai_images_via_proxy_to_files(
+    prompt: str,
+    path_for: Callable[[int], str],
+    model: str = "gpt-image-1",
+    n: int = 1,
+    size: str = "1024x1024",
+    quality: str = "medium",
+    response_format: str = "b64_json",
+) -> List[str]:
+    """
+    Like generate_openai_images_via_proxy, but streams the n-th image straight
+    into the file `path_for(n)` and returns the paths written.
+    """
+    if not OPENAI_API_KEY:
+        raise ValueError("OPENAI_API_KEY not set")
+    payload = {
+        "model": model,
+        "prompt": prompt,
+        "n": n,
+        "size": size,
+        "quality": quality,
+        "response_format": response_format,
+    }
+    paths = _post_images_to_files(payload, path_for, model=model, n=n, size=size)
+    if not paths:
+        raise RuntimeError(f"No image data returned for prompt: {prompt}.")
+    return paths
+
+
 def openai_chat_api(
     messages, *, model="anthropic.claude-3.5-sonnet.v2", temperature=0, seed=42
 ):
     client = OpenAI(api_key=OPENAI_API_KEY, base_url=OPENAI_BASE_URL)
-    response = client.chat.completions.create(
-        messages=messages, model=model, temperature=temperature, seed=seed
-    )
+    with span("api.chat", model=model):
+        response = client.chat.completions.create(
+            messages=messages, model=model, temperature=temperature, seed=seed
+        )
+        _record_usage(response)
     return response.choices[0].message.content
 
 
@@ -158,7 +269,9 @@ def text_to_speech(
     }
     payload = {"model": model, "input": text, "voice": voice, "format": fmt}
 
-    resp = requests.post(url, headers=headers, json=payload)
+    with span("api.tts", model=model, voice=voice, fmt=fmt):
+        resp = requests.post(url, headers=headers, json=payload)
+        _record_transfer(resp)
     resp.raise_for_status()
     return resp.content
 
@@ -176,13 +289,15 @@ def openai_chat_api_structured(
     using the Beta OpenAI API features for structured JSON output.
     """
     # enforces schema adherence with response_format
-    completion = openai_client.beta.chat.completions.parse(
-        messages=messages,
-        model=model,
-        temperature=temperature,
-        seed=seed,
-        response_format=response_format,  # type: ignore
-    )
+    with span("api.chat_structured", model=model):
+        completion = openai_client.beta.chat.completions.parse(
+            messages=messages,
+            model=model,
+            temperature=temperature,
+            seed=seed,
+            response_format=response_format,  # type: ignore
+        )
+        _record_usage(completion)
 
     structured_response = completion.choices[0].message
     # Catch refusals
@@ -0,0 +1,48 @@
+import hashlib
+import os
+from typing import Any
+
+# Generated assets get a small sidecar file holding a key derived from
+# everything that went into them (prompt, voice, model, ...). An existing asset
+# is only reused when its sidecar key still matches.
+KEY_SUFFIX = ".key"
+
+
+def content_key(*parts: Any) -> str:
+    """Stable hex key for a tuple of inputs (strings, numbers, None...)."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(repr(part).encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()[:24]
+
+
+def file_hash(path: str, chunk_size: int = 1 << 20) -> str:
+    """Hex digest of a file's contents, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:24]
+
+
+def is_cached(path: str, key: str) -> bool:
+    """True if `path` exists and was produced from inputs hashing to `key`."""
+    sidecar = path + KEY_SUFFIX
+    if not (os.path.exists(path) and os.path.exists(sidecar)):
+        return False
+    with open(sidecar, "r", encoding="utf-8") as f:
+        return f.read().strip() == key
+
+
+def mark_cached(path: str, key: str) -> None:
+    with open(path + KEY_SUFFIX, "w", encoding="utf-8") as f:
+        f.write(key)
+
+
+def clear_cached(path: str) -> None:
+    """Drops the sidecar, e.g. when `path` is overwritten by a fallback copy."""
+    try:
+        os.remove(path + KEY_SUFFIX)
+    except FileNotFoundError:
+        pass
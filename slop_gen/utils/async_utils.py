@@ -0,0 +1,44 @@
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Coroutine, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+def run_sync(coro: Coroutine[Any, Any, T]) -> T:
+    """
+    Runs `coro` to completion from synchronous code.
+
+    Inside a running event loop (e.g. a Jupyter notebook) asyncio.run() is not
+    allowed, so the coroutine gets its own loop on a worker thread instead,
+    running in a copy of the caller's context so spans still nest.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        context = contextvars.copy_context()
+        return executor.submit(context.run, asyncio.run, coro).result()
+
+
+# Blocking network calls (image and TTS requests) mostly wait on the proxy, so
+# they get their own pool instead of the default executor, which is sized for
+# CPU work (min(32, cpu_count + 4)) and would cap a 1-2 CPU machine at 5-6
+# requests in flight no matter what limit the caller set.
+IO_THREADS = 32
+_io_executor: Optional[ThreadPoolExecutor] = None
+
+
+async def to_io_thread(func: Callable[..., T], *args, **kwargs) -> T:
+    """asyncio.to_thread for blocking I/O, run on a pool of IO_THREADS threads."""
+    global _io_executor
+    if _io_executor is None:
+        _io_executor = ThreadPoolExecutor(
+            max_workers=IO_THREADS, thread_name_prefix="io"
+        )
+    context = contextvars.copy_context()
+    call = functools.partial(context.run, func, *args, **kwargs)
+    return await asyncio.get_running_loop().run_in_executor(_io_executor, call)
@@ -0,0 +1,355 @@
+"""
+Audio durations from file headers, without starting ffmpeg.
+
+moviepy learns an audio file's duration by running `ffmpeg -i` on it (and
+AudioFileClip then starts a second ffmpeg process to decode it). For the
+formats the pipeline writes that is unnecessary: a WAV file's fmt and data
+chunks give the duration directly, and an MP3's frame headers (or its
+Xing/Info/VBRI header, when present) give the exact number of samples.
+Other formats fall back to ffmpeg.
+
+AudioMetadataIndex caches the results by content hash in a JSON file, so
+the timeline of a render can be computed for every segment up front.
+"""
+
+import json
+import mmap
+import os
+import struct
+import tempfile
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple, TypedDict
+
+from slop_gen.utils.asset_cache import file_hash
+
+DEFAULT_INDEX_PATH = "assets/cache/audio_metadata.json"
+# Bump when probing changes, so entries from older probes are not reused.
+INDEX_VERSION = 1
+
+
+class AudioInfo(TypedDict):
+    """
+    Header metadata of one audio file.
+
+    duration: Length in seconds.
+    sample_rate: Samples per second per channel.
+    channels: Channel count; None if the probe could not tell.
+    format: "wav", "mp3", or "ffmpeg" for files probed with ffmpeg.
+    """
+
+    duration: float
+    sample_rate: Optional[int]
+    channels: Optional[int]
+    format: str
+
+
+def probe_wav(data: bytes) -> Optional[AudioInfo]:
+    """Metadata from a RIFF/WAVE file's fmt and data chunks; None if `data` isn't one."""
+    if len(data) < 12 or data[:4] != b"RIFF" or data[8:12] != b"WAVE":
+        return None
+    pos = 12
+    fmt: Optional[Tuple[int, int, int]] = None
+    while pos + 8 <= len(data):
+        chunk_id, size = data[pos : pos + 4], struct.unpack_from("<I", data, pos + 4)[0]
+        body = pos + 8
+        if chunk_id == b"fmt " and size >= 16:
+            _, channels, sample_rate, _, block_align = struct.unpack_from(
+                "<HHIIH", data, body
+            )
+            fmt = (channels, sample_rate, block_align)
+        elif chunk_id == b"data" and fmt is not None:
+            channels, sample_rate, block_align = fmt
+            # Streamed WAVs may leave the size at 0 or 0xFFFFFFFF: use the rest of the file.
+            available = len(data) - body
+            if size == 0 or size > available:
+                size = available
+            if not (sample_rate and block_align):
+                return None
+            return {
+                "duration": (size // block_align) / sample_rate,
+                "sample_rate": sample_rate,
+                "channels": channels,
+                "format": "wav",
+            }
+        pos = body + size + (size & 1)  # chunks are word-aligned
+    return None
+
+
+# Bitrates in kbit/s by (MPEG-1?, layer), indexed by the header's bitrate index.
+_MP3_BITRATES = {
+    (True, 1): [0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448],
+    (True, 2): [0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384],
+    (True, 3): [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    (False, 1): [0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256],
+    (False, 2): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+    (False, 3): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+# Sample rates by the header's version bits (0: MPEG-2.5, 2: MPEG-2, 3: MPEG-1).
+_MP3_SAMPLE_RATES = {
+    0: [11025, 12000, 8000],
+    2: [22050, 24000, 16000],
+    3: [44100, 48000, 32000],
+}
+
+
+def _mp3_frame(data, pos: int) -> Optional[Tuple[int, int, int, int, bool]]:
+    """(length, samples, sample rate, channels, MPEG-1?) of the MP3 frame header at `pos`."""
+    if pos + 4 > len(data) or data[pos] != 0xFF or data[pos + 1] & 0xE0 != 0xE0:
+        return None
+    b1, b2, b3 = data[pos + 1], data[pos + 2], data[pos + 3]
+    version, layer = (b1 >> 3) & 3, 4 - ((b1 >> 1) & 3)
+    bitrate_index, rate_index = b2 >> 4, (b2 >> 2) & 3
+    if version == 1 or layer == 4 or bitrate_index in (0, 15) or rate_index == 3:
+        return None  # reserved values, or free-format streams
+    mpeg1 = version == 3
+    bitrate = _MP3_BITRATES[(mpeg1, layer)][bitrate_index] * 1000
+    sample_rate = _MP3_SAMPLE_RATES[version][rate_index]
+    padding = (b2 >> 1) & 1
+    if layer == 1:
+        samples = 384
+        length = (12 * bitrate // sample_rate + padding) * 4
+    else:
+        samples = 1152 if (mpeg1 or layer == 2) else 576
+        length = samples // 8 * bitrate // sample_rate + padding
+    channels = 1 if b3 >> 6 == 3 else 2
+    return length, samples, sample_rate, channels, mpeg1
+
+
+def _id3v2_size(data) -> int:
+    """Bytes taken by a leading ID3v2 tag (0 without one)."""
+    if len(data) < 10 or data[:3] != b"ID3":
+        return 0
+    size = 0
+    for byte in data[6:10]:
+        size = (size << 7) | (byte & 0x7F)
+    footer = 10 if data[5] & 0x10 else 0
+    return 10 + size + footer
+
+
+def _vbr_header(data, pos: int, mpeg1: bool, channels: int) -> Tuple[bool, Optional[int]]:
+    """
+    Whether the frame at `pos` is a Xing/Info or VBRI header frame (which
+    holds no audio), and the stream's frame count if the header gives it.
+    """
+    side_info = (32 if channels == 2 else 17) if mpeg1 else (17 if channels == 2 else 9)
+    xing = pos + 4 + side_info
+    if data[xing : xing + 4] in (b"Xing", b"Info"):
+        flags = struct.unpack_from(">I", data, xing + 4)[0]
+        return True, struct.unpack_from(">I", data, xing + 8)[0] if flags & 1 else None
+    vbri = pos + 4 + 32
+    if data[vbri : vbri + 4] == b"VBRI":
+        return True, struct.unpack_from(">I", data, vbri + 14)[0]
+    return False, None
+
+
+def probe_mp3(data) -> Optional[AudioInfo]:
+    """
+    Metadata of an MPEG audio file, from the frame count in its VBR header
+    or else by adding up the samples of every frame. None if no frame is found.
+    """
+    pos = _id3v2_size(data)
+    end = len(data) - (128 if data[-128:-125] == b"TAG" else 0)  # ID3v1 trailer
+    first = None
+    total_samples = 0
+    while pos < end:
+        frame = _mp3_frame(data, pos)
+        # A sync word counts only if another frame (or the end) follows it,
+        # so stray 0xFF bytes in tags or junk don't read as frames.
+        if frame is None or (
+            pos + frame[0] < end and _mp3_frame(data, pos + frame[0]) is None
+        ):
+            pos = data.find(b"\xff", pos + 1, end)
+            if pos < 0:
+                break
+            continue
+        length, samples = frame[0], frame[1]
+        if first is None:
+            first = frame
+            is_header, frames = _vbr_header(data, pos, frame[4], frame[3])
+            if frames is not None:
+                total_samples = frames * samples
+                break
+            if is_header:
+                pos += length
+                continue
+        total_samples += samples
+        pos += length
+    if first is None:
+        return None
+    return {
+        "duration": total_samples / first[2],
+        "sample_rate": first[2],
+        "channels": first[3],
+        "format": "mp3",
+    }
+
+
+def _probe_with_ffmpeg(path: str) -> AudioInfo:
+    from moviepy.video.io.ffmpeg_reader import ffmpeg_parse_infos
+
+    infos = ffmpeg_parse_infos(path)
+    return {
+        "duration": float(infos["duration"]),
+        "sample_rate": infos.get("audio_fps"),
+        "channels": None,
+        "format": "ffmpeg",
+    }
+
+
+def probe_audio(path: str) -> AudioInfo:
+    """
+    Metadata of the audio file at `path`, from its headers for WAV and MP3
+    files and from `ffmpeg -i` for anything else.
+    """
+    with open(path, "rb") as f:
+        try:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # empty file
+            data = b""
+        try:
+            info = probe_wav(data) if len(data) else None
+            if info is None and len(data):
+                info = probe_mp3(data)
+        finally:
+            if isinstance(data, mmap.mmap):
+                data.close()
+    if info is None or info["duration"] <= 0:
+        info = _probe_with_ffmpeg(path)
+    return info
+
+
+class AudioMetadataIndex:
+    """
+    probe_audio results keyed by content hash, kept in a JSON file.
+
+    A file is hashed once per (path, mtime, size) and probed once per
+    content, so rerenders and reused narration skip probing altogether.
+    One index can be shared by renders running in threads.
+    """
+
+    def __init__(self, index_path: str = DEFAULT_INDEX_PATH) -> None:
+        self.index_path = index_path
+        # (path, mtime, size) -> content hash, so a render hashes each file once.
+        self._hashes: Dict[Tuple[str, float, int], str] = {}
+        self._entries: Dict[str, AudioInfo] = {}
+        self._dirty = False
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries = self._read(warn=True)
+
+    def _read(self, warn: bool = False) -> Dict[str, AudioInfo]:
+        """Entries currently stored in the index file."""
+        if not os.path.exists(self.index_path):
+            return {}
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                stored = json.load(f)
+        except (OSError, ValueError) as e:
+            if warn:
+                print(f"Warning: Ignoring unreadable audio index {self.index_path}: {e}")
+            return {}
+        if stored.get("version") != INDEX_VERSION:
+            return {}
+        return stored.get("entries", {})
+
+    def content_hash(self, path: str) -> str:
+        stat = os.stat(path)
+        memo_key = (os.path.abspath(path), stat.st_mtime, stat.st_size)
+        with self._lock:
+            known = self._hashes.get(memo_key)
+        if known is None:
+            # Hashed outside the lock; two threads may hash a file twice, harmlessly.
+            known = file_hash(path)
+            with self._lock:
+                self._hashes[memo_key] = known
+        return known
+
+    def info(self, path: str) -> AudioInfo:
+        """Metadata of the audio file at `path`, probed only on a cache miss."""
+        key = self.content_hash(path)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self.hits += 1
+                return entry
+            self.misses += 1
+        entry = probe_audio(path)
+        with self._lock:
+            self._entries[key] = entry
+            self._dirty = True
+        return entry
+
+    def duration(self, path: str) -> float:
+        return self.info(path)["duration"]
+
+    def durations(
+        self, paths: Iterable[Optional[str]], default_duration: float
+    ) -> List[float]:
+        """
+        Duration of every file in `paths` in one pass, saving the index once
+        at the end. Missing or unreadable files get `default_duration`.
+        """
+        durations = []
+        for path in paths:
+            duration = default_duration
+            if path and os.path.exists(path):
+                try:
+                    duration = self.duration(path)
+                except Exception as e:
+                    print(f"⚠️ Could not read the duration of {path}: {e}")
+            durations.append(duration)
+        self.save()
+        return durations
+
+    def save(self) -> None:
+        """
+        Writes the index if anything was probed since it was loaded, merged
+        with whatever other runs saved meanwhile (the index is shared). The
+        index is only a cache, so a failed write is reported, not raised.
+        """
+        with self._lock:
+            if not self._dirty:
+                return
+            directory = os.path.dirname(self.index_path) or "."
+            tmp_path = None
+            try:
+                self._entries = {**self._read(), **self._entries}
+                os.makedirs(directory, exist_ok=True)
+                fd, tmp_path = tempfile.mkstemp(
+                    dir=directory,
+                    prefix=os.path.basename(self.index_path),
+                    suffix=".tmp",
+                )
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump({"version": INDEX_VERSION, "entries": self._entries}, f)
+                os.replace(tmp_path, self.index_path)
+                self._dirty = False
+            except Exception as e:
+                print(f"⚠️ Could not save the audio index {self.index_path}: {e}")
+                if tmp_path and os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+
+
+_default_index: Optional[AudioMetadataIndex] = None
+_default_index_lock = threading.Lock()
+
+
+def get_audio_index() -> AudioMetadataIndex:
+    """Process-wide index in DEFAULT_INDEX_PATH, unless set_audio_index replaced it."""
+    global _default_index
+    with _default_index_lock:
+        if _default_index is None:
+            _default_index = AudioMetadataIndex()
+    return _default_index
+
+
+def set_audio_index(index: Optional[AudioMetadataIndex]) -> Optional[AudioMetadataIndex]:
+    """
+    Replaces the process-wide index (None goes back to DEFAULT_INDEX_PATH),
+    e.g. to benchmark without earlier probes. Returns the previous one.
+    """
+    global _default_index
+    with _default_index_lock:
+        previous, _default_index = _default_index, index
+    return previous
@@ -0,0 +1,89 @@
+import multiprocessing
+from contextlib import contextmanager
+from multiprocessing import shared_memory
+from typing import Iterator, Optional, Tuple
+
+import numpy as np
+
+
+class FrameRing:
+    """
+    Preallocated shared-memory frame slots that carry frames from render
+    worker processes to a single consumer (e.g. the encoder pipe) in order,
+    without pickling or copying them through a queue.
+
+    Frame k always lives in slot k % slots. Each slot has a `free` and a
+    `filled` semaphore: a producer waits until the slot is free, renders
+    frame k into it in place and marks it filled; the consumer waits until
+    it is filled, reads it in place and frees it. Only semaphore counts
+    cross processes, so producers may finish frames out of order and the
+    consumer still sees 0, 1, 2, ...
+
+    That order only holds if each slot is written by a single producer:
+    with frame k rendered by worker k % workers, `slots` must be a multiple
+    of `workers`, otherwise two workers race for the same free slot.
+
+    Workers must be forked from the process that created the ring (they
+    inherit the mapping); `multiprocessing.get_context("fork")` does that.
+    The creator calls `close()` to release the shared memory.
+    """
+
+    def __init__(
+        self,
+        shape: Tuple[int, ...],
+        slots: int,
+        workers: int = 1,
+        dtype=np.uint8,
+        ctx: Optional[multiprocessing.context.BaseContext] = None,
+    ) -> None:
+        if slots < 1 or workers < 1 or slots % workers:
+            raise ValueError(
+                f"FrameRing needs a positive multiple of {workers} slots, got {slots}"
+            )
+        ctx = ctx or multiprocessing.get_context("fork")
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.slots = slots
+        frame_bytes = int(np.prod(self.shape)) * self.dtype.itemsize
+        self._shm = shared_memory.SharedMemory(create=True, size=frame_bytes * slots)
+        self._frames = np.ndarray(
+            (slots, *self.shape), dtype=self.dtype, buffer=self._shm.buf
+        )
+        self._free = [ctx.Semaphore(1) for _ in range(slots)]
+        self._filled = [ctx.Semaphore(0) for _ in range(slots)]
+
+    def slot(self, index: int) -> np.ndarray:
+        """Frame `index`'s slot, as an array view into the shared memory."""
+        return self._frames[index % self.slots]
+
+    def acquire_write(self, index: int, timeout: Optional[float] = None) -> bool:
+        """Waits until frame `index`'s slot has been consumed; False on timeout."""
+        return self._free[index % self.slots].acquire(timeout=timeout)
+
+    def commit(self, index: int) -> None:
+        """Hands frame `index` to the consumer."""
+        self._filled[index % self.slots].release()
+
+    def acquire_read(self, index: int, timeout: Optional[float] = None) -> bool:
+        """Waits until frame `index` has been committed; False on timeout."""
+        return self._filled[index % self.slots].acquire(timeout=timeout)
+
+    def release(self, index: int) -> None:
+        """Returns frame `index`'s slot to the producers."""
+        self._free[index % self.slots].release()
+
+    @contextmanager
+    def writing(
+        self, index: int, timeout: Optional[float] = None
+    ) -> Iterator[np.ndarray]:
+        """Slot to render frame `index` into; committed on exit."""
+        if not self.acquire_write(index, timeout=timeout):
+            raise TimeoutError(f"Frame {index}'s ring slot was not freed in {timeout}s")
+        yield self.slot(index)
+        self.commit(index)
+
+    def close(self) -> None:
+        """Releases the shared memory (creator only, once every worker is done)."""
+        self._frames = None
+        self._shm.close()
+        self._shm.unlink()
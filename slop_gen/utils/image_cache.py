@@ -0,0 +1,190 @@
+import os
+import tempfile
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+from slop_gen.utils.asset_cache import file_hash, is_cached, mark_cached
+
+DEFAULT_CACHE_DIR = "assets/cache/image_pyramids"
+
+# Largest frame height a render uses, and the largest scale the story effects
+# apply to the image covering it (the 4/3 diagonal pans; zooms reach
+# S_BASE + S_DELTA = 1.3). Ingest keeps images at most this tall.
+RENDER_MAX_HEIGHT = 1080
+RENDER_MAX_SCALE = 4 / 3
+# Render-ready copy of a generated image, stored next to it.
+NORMALIZED_SUFFIX = ".render.npy"
+
+
+def _open_rgb(path: str) -> Image.Image:
+    src = Image.open(path)
+    if src.mode not in ("RGB", "RGBA"):
+        src = src.convert("RGBA" if "A" in src.getbands() else "RGB")
+    return src
+
+
+def normalized_path(path: str) -> str:
+    return path + NORMALIZED_SUFFIX
+
+
+def _save_npy(target: str, array: np.ndarray) -> None:
+    """
+    Writes `array` to `target` through a uniquely named temporary file, so
+    concurrent writers (threads or processes) never share a partial file.
+    """
+    fd, tmp_path = tempfile.mkstemp(
+        dir=os.path.dirname(target) or ".",
+        prefix=os.path.basename(target),
+        suffix=".tmp",
+    )
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.save(f, array)
+        os.replace(tmp_path, target)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def normalize_image(
+    path: str,
+    max_height: int = int(np.ceil(RENDER_MAX_HEIGHT * RENDER_MAX_SCALE)),
+    content_hash: Optional[str] = None,
+) -> str:
+    """
+    Writes the render-ready copy of the image at `path`: decoded to a raw
+    uint8 .npy array (memory-mappable, no PNG inflate on read) and, if taller
+    than `max_height`, downscaled to it once. Its sidecar key is the
+    original's content hash, so a regenerated image invalidates it.
+    """
+    target = normalized_path(path)
+    content_hash = content_hash or file_hash(path)
+    if is_cached(target, content_hash):  # e.g. written by a concurrent run
+        return target
+    with _open_rgb(path) as src:
+        if src.height > max_height:
+            src = src.resize(
+                (max(1, round(src.width * max_height / src.height)), max_height),
+                Image.LANCZOS,
+            )
+        pixels = np.asarray(src, dtype=np.uint8)
+    _save_npy(target, pixels)
+    mark_cached(target, content_hash)
+    return target
+
+
+def scaled_size(src_size: Tuple[int, int], height: int, scale: float) -> Tuple[int, int]:
+    """
+    (width, height) of `src_size` resized to `height` and then by `scale`,
+    truncated the same way moviepy's resize(height=...) / resize(scale) are.
+    """
+    src_w, src_h = src_size
+    base_w, base_h = src_w * height / src_h, height
+    if scale == 1.0:
+        return int(base_w), int(base_h)
+    return int(int(base_w) * scale), int(base_h * scale)
+
+
+class ImagePyramidCache:
+    """
+    Decoded, pre-scaled copies of source images, stored as raw .npy arrays.
+
+    Each level is the source image resized to a target frame height times a
+    scale factor (1.0 is "cover the frame height"), resampled once from the
+    original pixels. Levels live under
+    ``<cache_dir>/<content hash>_<height>/x<scale>.npy`` and are opened
+    memory-mapped, so rerenders and renders at other resolutions skip PNG
+    decoding and the initial resample, and untouched pixels are never read.
+    Missing levels are built from the render-ready copy written at ingest
+    (see normalize_image) when there is one.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR) -> None:
+        self.cache_dir = cache_dir
+        # (path, mtime, size) -> content hash, so a render hashes each file once.
+        self._hashes: Dict[Tuple[str, float, int], str] = {}
+        self.hits = 0
+        self.misses = 0
+        self.normalized_hits = 0
+
+    def content_hash(self, path: str) -> str:
+        """Content hash of `path`, memoized per (path, mtime, size)."""
+        stat = os.stat(path)
+        memo_key = (os.path.abspath(path), stat.st_mtime, stat.st_size)
+        if memo_key not in self._hashes:
+            self._hashes[memo_key] = file_hash(path)
+        return self._hashes[memo_key]
+
+    def _open_source(self, path: str, height: int, scale: float) -> Image.Image:
+        """
+        The pixels a level is resampled from: the render-ready copy written at
+        ingest when it is current and not smaller than the level needs, else
+        the original file.
+        """
+        copy_path = normalized_path(path)
+        if is_cached(copy_path, self.content_hash(path)):
+            pixels = np.load(copy_path, mmap_mode="r")
+            src_h = pixels.shape[0]
+            with Image.open(path) as original:
+                original_size = original.size  # reads the header only
+            # Usable unless ingest downscaled it below what this level needs.
+            needed_h = scaled_size(original_size, height, scale)[1]
+            if src_h == original_size[1] or needed_h <= src_h:
+                self.normalized_hits += 1
+                return Image.fromarray(np.ascontiguousarray(pixels))
+        return _open_rgb(path)
+
+    def level_path(self, path: str, height: int, scale: float = 1.0) -> str:
+        return os.path.join(
+            self.cache_dir,
+            f"{self.content_hash(path)}_{height}",
+            f"x{scale:.4f}.npy",
+        )
+
+    def get(self, path: str, height: int, scale: float = 1.0) -> np.ndarray:
+        """The image at `path` resized to `height` * `scale`, as a read-only uint8 array."""
+        level_path = self.level_path(path, height, scale)
+        if os.path.exists(level_path):
+            self.hits += 1
+            return np.load(level_path, mmap_mode="r")
+        self.misses += 1
+        with self._open_source(path, height, scale) as src:
+            resized = src.resize(scaled_size(src.size, height, scale), Image.LANCZOS)
+            level = np.asarray(resized, dtype=np.uint8)
+        if os.path.exists(level_path):
+            # Another render finished the same level meanwhile: keep it.
+            return np.load(level_path, mmap_mode="r")
+        os.makedirs(os.path.dirname(level_path), exist_ok=True)
+        # Write then rename so a concurrent or interrupted render never sees a partial level.
+        _save_npy(level_path, level)
+        return level
+
+    def warm(self, path: str, height: int, scales: Iterable[float]) -> None:
+        """Builds any missing levels for `path` at `height`."""
+        for scale in scales:
+            self.get(path, height, scale)
+
+
+_default_cache: Optional[ImagePyramidCache] = None
+
+
+def get_image_cache() -> ImagePyramidCache:
+    """Process-wide cache in DEFAULT_CACHE_DIR, unless set_image_cache replaced it."""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = ImagePyramidCache()
+    return _default_cache
+
+
+def set_image_cache(cache: Optional[ImagePyramidCache]) -> Optional[ImagePyramidCache]:
+    """
+    Replaces the process-wide cache (None goes back to DEFAULT_CACHE_DIR) for
+    renders that don't pass their own, e.g. to benchmark from a cold cache.
+    Returns the previous one, so it can be restored.
+    """
+    global _default_cache
+    previous, _default_cache = _default_cache, cache
+    return previous
@@ -0,0 +1,196 @@
+"""
+Streaming ingest of image-generation responses straight to disk.
+
+The proxy answers /images/generations with JSON whose "b64_json" values are
+multi-megabyte base64 strings, or with short-lived "url"s. Loading the body
+with response.json(), decoding into a BytesIO and calling getvalue() keeps
+three to four copies of every image alive at once. Here the JSON body is
+read in chunks and each b64_json value is decoded piecewise into its own
+file as it arrives, so only the small rest of the JSON is ever parsed; URL
+downloads are streamed in chunks too. Files are written under a temporary
+name and renamed into place once complete.
+"""
+
+import binascii
+import json
+import os
+import re
+from typing import Callable, Dict, Iterable, List, Tuple
+
+import requests
+
+CHUNK_SIZE = 64 * 1024
+
+_B64_KEY = b'"b64_json"'
+_VALUE_START = re.compile(rb'\s*:\s*"')
+_NULL_VALUE = re.compile(rb"\s*:\s*null")
+_VALUE_STOP = re.compile(rb'["\\]')
+
+
+class _Base64FileWriter:
+    """Decodes base64 text, written in pieces of any length, into a file."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.tmp_path = f"{path}.{os.getpid()}.part"
+        self._file = open(self.tmp_path, "wb")
+        self._pending = b""
+
+    def write(self, text: bytes) -> None:
+        if not text:
+            return
+        data = self._pending + text
+        cut = len(data) - len(data) % 4
+        if cut:
+            self._file.write(binascii.a2b_base64(data[:cut]))
+        self._pending = data[cut:]
+
+    def close(self) -> None:
+        if self._pending:
+            self.abort()
+            raise ValueError(f"Truncated base64 image data for {self.path}")
+        self._file.close()
+        os.replace(self.tmp_path, self.path)
+
+    def abort(self) -> None:
+        self._file.close()
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+
+def ingest_json_images(
+    chunks: Iterable[bytes], path_for: Callable[[int], str]
+) -> Tuple[Dict, List[str]]:
+    """
+    Parses an images/generations JSON body arriving as `chunks`, decoding the
+    n-th "b64_json" value straight into the file `path_for(n)`.
+
+    Returns the parsed response, with every b64_json value replaced by the
+    path it was written to, and the list of written paths.
+    """
+    skeleton = bytearray()
+    paths: List[str] = []
+    writer = None
+    buf = b""
+    try:
+        for chunk in chunks:
+            buf += chunk
+            while buf:
+                if writer is None:
+                    idx = buf.find(_B64_KEY)
+                    if idx < 0:
+                        # Keep a tail that might be the start of a split key.
+                        keep = len(_B64_KEY) - 1
+                        skeleton += buf[:-keep]
+                        buf = buf[-keep:]
+                        break
+                    match = _VALUE_START.match(buf, idx + len(_B64_KEY))
+                    null = _NULL_VALUE.match(buf, idx + len(_B64_KEY))
+                    if null is not None:
+                        skeleton += buf[: null.end()]
+                        buf = buf[null.end() :]
+                        continue
+                    if match is None:
+                        if len(buf) - idx > len(_B64_KEY) + 64:
+                            raise ValueError("Malformed b64_json value in image response")
+                        skeleton += buf[:idx]
+                        buf = buf[idx:]
+                        break  # the opening quote hasn't arrived yet
+                    path = path_for(len(paths))
+                    paths.append(path)
+                    writer = _Base64FileWriter(path)
+                    skeleton += buf[:idx] + _B64_KEY + b": " + json.dumps(path).encode()
+                    buf = buf[match.end() :]
+                else:
+                    stop = _VALUE_STOP.search(buf)
+                    if stop is None:
+                        writer.write(buf)
+                        buf = b""
+                        break
+                    writer.write(buf[: stop.start()])
+                    if buf[stop.start()] == ord('"'):
+                        writer.close()
+                        writer = None
+                        buf = buf[stop.start() + 1 :]
+                        continue
+                    if stop.start() + 1 >= len(buf):
+                        buf = buf[stop.start() :]
+                        break  # the escaped character hasn't arrived yet
+                    # Base64 only needs "\/"; other escapes (line breaks) carry no data.
+                    if buf[stop.start() + 1 : stop.start() + 2] == b"/":
+                        writer.write(b"/")
+                    buf = buf[stop.start() + 2 :]
+        if writer is not None:
+            raise ValueError("Image response ended inside a b64_json value")
+        skeleton += buf
+        return json.loads(bytes(skeleton)), paths
+    except Exception:
+        if writer is not None:
+            writer.abort()
+        for path in paths:
+            if os.path.exists(path):
+                os.remove(path)
+        raise
+
+
+def download_to_file(url: str, path: str, chunk_size: int = CHUNK_SIZE) -> int:
+    """Streams `url` into `path` in chunks; returns the number of bytes written."""
+    tmp_path = f"{path}.{os.getpid()}.part"
+    written = 0
+    try:
+        with requests.get(url, stream=True) as response:
+            response.raise_for_status()
+            with open(tmp_path, "wb") as f:
+                for chunk in response.iter_content(chunk_size):
+                    f.write(chunk)
+                    written += len(chunk)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return written
+
+
+class _CountingChunks:
+    """Iterates a response's body in chunks, counting the bytes read."""
+
+    def __init__(self, response: requests.Response, chunk_size: int = CHUNK_SIZE):
+        self._chunks = response.iter_content(chunk_size)
+        self.bytes_read = 0
+
+    def __iter__(self):
+        for chunk in self._chunks:
+            self.bytes_read += len(chunk)
+            yield chunk
+
+
+def ingest_image_response(
+    response: requests.Response, path_for: Callable[[int], str]
+) -> Tuple[List[str], int]:
+    """
+    Writes every image in a streamed (stream=True) images/generations
+    response to `path_for(n)`, in response order, whether it came as b64_json
+    or as a url. Returns the paths and the number of bytes received.
+    """
+    chunks = _CountingChunks(response)
+    body, b64_paths = ingest_json_images(chunks, path_for)
+    received = chunks.bytes_read
+    written = set(b64_paths)
+    paths: List[str] = []
+    try:
+        for n, item in enumerate(body.get("data") or []):
+            if item.get("b64_json") in written:
+                paths.append(item["b64_json"])
+            elif item.get("url"):
+                path = path_for(len(b64_paths) + n)
+                received += download_to_file(item["url"], path)
+                paths.append(path)
+            else:
+                raise RuntimeError("No image data returned for prompt.")
+    except Exception:
+        for path in set(paths) | written:
+            if os.path.exists(path):
+                os.remove(path)
+        raise
+    return paths, received
@@ -0,0 +1,49 @@
+import io
+from typing import List, Optional, Union
+
+import numpy as np
+from PIL import Image
+
+# Candidates are scored on a thumbnail; the ranking barely depends on size.
+SCORE_SIZE = 256
+# Luminance standard deviation (0-255) below which an image is blank or a solid fill.
+MIN_CONTRAST = 8.0
+
+
+def score_image(source: Union[bytes, str, io.BytesIO]) -> Optional[float]:
+    """
+    Quality score of an encoded image (bytes or a file path): local
+    sharpness (mean absolute Laplacian of the luminance) times global
+    contrast (luminance standard deviation). Higher is better; None if the
+    image can't be decoded or is nearly blank.
+    """
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+    try:
+        with Image.open(source) as img:
+            img.draft("L", (SCORE_SIZE, SCORE_SIZE))  # cheap JPEG downscale on decode
+            gray = img.convert("L")
+        gray.thumbnail((SCORE_SIZE, SCORE_SIZE))
+        pixels = np.asarray(gray, dtype=np.float32)
+    except Exception:
+        return None
+    if pixels.ndim != 2 or min(pixels.shape) < 3:
+        return None
+    contrast = float(pixels.std())
+    if contrast < MIN_CONTRAST:
+        return None
+    laplacian = (
+        4 * pixels[1:-1, 1:-1]
+        - pixels[:-2, 1:-1]
+        - pixels[2:, 1:-1]
+        - pixels[1:-1, :-2]
+        - pixels[1:-1, 2:]
+    )
+    return float(np.abs(laplacian).mean()) * contrast
+
+
+def rank_candidates(candidates: List[Union[bytes, str]]) -> List[int]:
+    """Indices of the usable candidates (bytes or file paths), best first."""
+    scores = [score_image(candidate) for candidate in candidates]
+    usable = [i for i, score in enumerate(scores) if score is not None]
+    return sorted(usable, key=lambda i: scores[i], reverse=True)
@@ -0,0 +1,189 @@
+import contextvars
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+# Counters every span understands. Anything else passed to `record` is still
+# kept, these are just the ones the console summary always shows.
+STANDARD_COUNTERS = (
+    "bytes_in",
+    "bytes_out",
+    "tokens_in",
+    "tokens_out",
+    "retries",
+    "cache_hits",
+)
+
+
+class Span:
+    """A single timed unit of work (a stage, or one per-scene call inside a stage)."""
+
+    def __init__(
+        self, name: str, parent_id: Optional[str], attrs: Dict[str, Any]
+    ) -> None:
+        self.id = uuid.uuid4().hex[:12]
+        self.name = name
+        self.parent_id = parent_id
+        self.attrs: Dict[str, Any] = dict(attrs)
+        self.counters: Dict[str, float] = {}
+        self.start = time.time()
+        self._t0 = time.perf_counter()
+        self.duration_s: Optional[float] = None
+        self.error: Optional[str] = None
+
+    def add(self, **counters: float) -> None:
+        for key, value in counters.items():
+            if value:
+                self.counters[key] = self.counters.get(key, 0) + value
+
+    def set(self, **attrs: Any) -> None:
+        self.attrs.update(attrs)
+
+    def finish(self) -> None:
+        self.duration_s = time.perf_counter() - self._t0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": self.start,
+            "duration_s": self.duration_s,
+            "attrs": self.attrs,
+            "counters": self.counters,
+            "error": self.error,
+        }
+
+
+def new_run_id() -> str:
+    """Sortable, collision-resistant ID for a pipeline run: <date>-<time>-<random>."""
+    return time.strftime("%Y%m%d-%H%M%S-") + uuid.uuid4().hex[:6]
+
+
+class Tracer:
+    """
+    Collects spans for one pipeline run and writes them out as a JSON trace.
+
+    Spans nest through a context variable, so asyncio tasks and
+    `asyncio.to_thread` workers attach to whichever span was open when they
+    were started.
+    """
+
+    def __init__(self, run_id: Optional[str] = None) -> None:
+        self.run_id = run_id or new_run_id()
+        self.started_at = time.time()
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name: str, **attrs: Any) -> Iterator[Span]:
+        parent = _current_span.get()
+        span = Span(name, parent.id if parent else None, attrs)
+        with self._lock:
+            self.spans.append(span)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            span.finish()
+            _current_span.reset(token)
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            spans = [s.to_dict() for s in self.spans]
+        return {
+            "run_id": self.run_id,
+            "started_at": self.started_at,
+            "spans": spans,
+        }
+
+    def write_json(self, path: str) -> str:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2, default=str)
+        return path
+
+    def aggregate(self) -> Dict[str, Dict[str, float]]:
+        """Totals per span name: call count, wall time, errors and summed counters."""
+        totals: Dict[str, Dict[str, float]] = {}
+        with self._lock:
+            spans = list(self.spans)
+        for span in spans:
+            entry = totals.setdefault(
+                span.name, {"count": 0, "wall_s": 0.0, "errors": 0}
+            )
+            entry["count"] += 1
+            entry["wall_s"] += span.duration_s or 0.0
+            if span.error:
+                entry["errors"] += 1
+            for key, value in span.counters.items():
+                entry[key] = entry.get(key, 0) + value
+        return totals
+
+    def summary(self) -> str:
+        """A console table of `aggregate()`, slowest stages first."""
+        totals = self.aggregate()
+        header = f"{'span':<22}{'calls':>7}{'wall s':>10}{'errors':>8}" + "".join(
+            f"{c:>12}" for c in STANDARD_COUNTERS
+        )
+        lines = [f"Run {self.run_id}", header, "-" * len(header)]
+        for name, entry in sorted(
+            totals.items(), key=lambda item: item[1]["wall_s"], reverse=True
+        ):
+            lines.append(
+                f"{name:<22}{int(entry['count']):>7}{entry['wall_s']:>10.2f}{int(entry['errors']):>8}"
+                + "".join(f"{int(entry.get(c, 0)):>12}" for c in STANDARD_COUNTERS)
+            )
+        return "\n".join(lines)
+
+
+_current_tracer: contextvars.ContextVar[Optional[Tracer]] = contextvars.ContextVar(
+    "slop_gen_tracer", default=None
+)
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar(
+    "slop_gen_span", default=None
+)
+
+
+def start_run(run_id: Optional[str] = None) -> Tracer:
+    """Creates a tracer and makes it the active one for the current context."""
+    tracer = Tracer(run_id)
+    _current_tracer.set(tracer)
+    _current_span.set(None)
+    return tracer
+
+
+def get_tracer() -> Optional[Tracer]:
+    return _current_tracer.get()
+
+
+@contextmanager
+def span(name: str, **attrs: Any) -> Iterator[Span]:
+    """
+    Opens a span on the active tracer. When no run has been started the span
+    is still handed out (so callers can `record` into it) but is not kept.
+    """
+    tracer = _current_tracer.get()
+    if tracer is None:
+        detached = Span(name, None, attrs)
+        try:
+            yield detached
+        finally:
+            detached.finish()
+        return
+    with tracer.span(name, **attrs) as s:
+        yield s
+
+
+def record(**counters: float) -> None:
+    """Adds counters (bytes_in, tokens_out, cache_hits, ...) to the innermost open span."""
+    current = _current_span.get()
+    if current is not None:
+        current.add(**counters)
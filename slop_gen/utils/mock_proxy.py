@@ -0,0 +1,366 @@
+"""
+Local stand-in for the Cornell proxy, for offline end-to-end runs and load tests.
+
+Implements the three endpoints the pipeline uses:
+
+    POST /v1/images/generations   canned PNGs (b64_json or url responses)
+    POST /v1/audio/speech         canned MP3s, or synthesized silent WAV for fmt="wav"
+    POST /v1/chat/completions     a canned plan, or structured SceneList JSON
+                                  cut from the story in the prompt
+
+with configurable latency, random 5xx errors and 429 rate limiting, plus
+GET /v1/_stats for request counts and peak concurrency.
+
+Run it and point the pipeline at it:
+
+    python -m slop_gen.utils.mock_proxy --port 8765 --latency 0.5 --rate-limit-rate 0.1
+    OPENAI_BASE_URL=http://127.0.0.1:8765/v1 OPENAI_API_KEY=mock python video_generator.py
+"""
+
+import argparse
+import base64
+import glob
+import io
+import json
+import random
+import re
+import threading
+import time
+import uuid
+import wave
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+DEFAULT_IMAGE_GLOB = "assets/generated_images/*.png"
+DEFAULT_AUDIO_GLOB = "assets/generated_audio/*.mp3"
+TTS_CHARS_PER_SECOND = 15  # used to size synthesized WAV narration
+
+CANNED_PLAN = """# Visual Style
+Muted oil painting with heavy shadows.
+# Visual Flow
+Slow pushes in on each story beat.
+# Major Scenes Breakdown
+One image per narration line.
+# Character Design
+A lone traveller in a grey cloak."""
+
+
+class MockProxyServer(ThreadingHTTPServer):
+    """HTTP server holding the mock's configuration, canned assets and stats."""
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address: Tuple[str, int],
+        latency: float = 0.0,
+        image_latency: Optional[float] = None,
+        tts_latency: Optional[float] = None,
+        chat_latency: Optional[float] = None,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        retry_after: float = 1.0,
+        seed: Optional[int] = None,
+        image_glob: str = DEFAULT_IMAGE_GLOB,
+        audio_glob: str = DEFAULT_AUDIO_GLOB,
+    ) -> None:
+        super().__init__(address, MockProxyHandler)
+        self.latency = {
+            "images": latency if image_latency is None else image_latency,
+            "speech": latency if tts_latency is None else tts_latency,
+            "chat": latency if chat_latency is None else chat_latency,
+        }
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.rng = random.Random(seed)
+        self.images = [open(p, "rb").read() for p in sorted(glob.glob(image_glob))]
+        self.audio = [open(p, "rb").read() for p in sorted(glob.glob(audio_glob))]
+        if not self.images or not self.audio:
+            raise FileNotFoundError(
+                f"No canned assets found for '{image_glob}' / '{audio_glob}'."
+            )
+        self.files: Dict[str, bytes] = {}  # served at /v1/files/<name> for url responses
+        self.lock = threading.Lock()
+        self.counter = 0
+        self.in_flight = 0
+        self.stats: Dict[str, Any] = {
+            "requests": {},
+            "errors": 0,
+            "rate_limited": 0,
+            "max_in_flight": 0,
+        }
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def next_index(self) -> int:
+        with self.lock:
+            self.counter += 1
+            return self.counter
+
+
+class MockProxyHandler(BaseHTTPRequestHandler):
+    server: MockProxyServer
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format: str, *args: Any) -> None:  # keep test output quiet
+        pass
+
+    # --- plumbing ---
+
+    def _send(
+        self,
+        status: int,
+        body: bytes,
+        content_type: str = "application/json",
+        headers: Optional[Dict[str, str]] = None,
+    ) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, status: int, payload: Any, headers=None) -> None:
+        self._send(status, json.dumps(payload).encode(), headers=headers)
+
+    def _route(self) -> str:
+        path = self.path.split("?", 1)[0].rstrip("/")
+        return path[len("/v1") :] if path.startswith("/v1") else path
+
+    def _inject_faults(self, endpoint: str) -> bool:
+        """Sleeps for the endpoint latency, then maybe answers 429/500. True if it answered."""
+        server = self.server
+        delay = server.latency[endpoint]
+        if delay > 0 or server.jitter > 0:
+            time.sleep(max(0.0, delay + server.rng.uniform(-server.jitter, server.jitter)))
+        roll = server.rng.random()
+        if roll < server.rate_limit_rate:
+            with server.lock:
+                server.stats["rate_limited"] += 1
+            self._send_json(
+                429,
+                {"error": {"message": "Rate limit exceeded", "type": "rate_limit_error"}},
+                headers={"Retry-After": f"{server.retry_after:g}"},
+            )
+            return True
+        if roll < server.rate_limit_rate + server.error_rate:
+            with server.lock:
+                server.stats["errors"] += 1
+            self._send_json(
+                500, {"error": {"message": "Injected failure", "type": "server_error"}}
+            )
+            return True
+        return False
+
+    # --- HTTP verbs ---
+
+    def do_GET(self) -> None:
+        route = self._route()
+        if route == "/_stats":
+            with self.server.lock:
+                self._send_json(200, self.server.stats)
+            return
+        if route.startswith("/files/"):
+            with self.server.lock:  # each url is fetched once, so drop it when served
+                data = self.server.files.pop(route[len("/files/") :], None)
+            if data is None:
+                self._send_json(404, {"error": {"message": "Not found"}})
+            else:
+                self._send(200, data, content_type="image/png")
+            return
+        self._send_json(404, {"error": {"message": f"Unknown route {route}"}})
+
+    def do_POST(self) -> None:
+        route = self._route()
+        handlers = {
+            "/images/generations": ("images", self._images),
+            "/audio/speech": ("speech", self._speech),
+            "/chat/completions": ("chat", self._chat),
+        }
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        if route not in handlers:
+            self._send_json(404, {"error": {"message": f"Unknown route {route}"}})
+            return
+        endpoint, handler = handlers[route]
+
+        server = self.server
+        with server.lock:
+            server.in_flight += 1
+            server.stats["max_in_flight"] = max(
+                server.stats["max_in_flight"], server.in_flight
+            )
+            server.stats["requests"][endpoint] = (
+                server.stats["requests"].get(endpoint, 0) + 1
+            )
+        try:
+            try:
+                body = json.loads(raw or b"{}")
+            except json.JSONDecodeError:
+                self._send_json(400, {"error": {"message": "Invalid JSON body"}})
+                return
+            if not self._inject_faults(endpoint):
+                handler(body)
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+    # --- endpoints ---
+
+    def _images(self, body: Dict[str, Any]) -> None:
+        server = self.server
+        count = int(body.get("n") or body.get("num_images") or 1)
+        response_format = body.get("response_format", "b64_json")
+        data = []
+        for _ in range(count):
+            png = server.images[server.next_index() % len(server.images)]
+            if response_format == "url":
+                name = f"{uuid.uuid4().hex}.png"
+                with server.lock:
+                    server.files[name] = png
+                data.append({"url": f"{server.base_url}/files/{name}"})
+            else:
+                data.append({"b64_json": base64.b64encode(png).decode("ascii")})
+        self._send_json(200, {"created": int(time.time()), "data": data})
+
+    def _speech(self, body: Dict[str, Any]) -> None:
+        fmt = body.get("response_format") or body.get("format") or "mp3"
+        if fmt == "wav":
+            text = body.get("input", "")
+            self._send(200, _silent_wav(len(text) / TTS_CHARS_PER_SECOND), "audio/wav")
+            return
+        audio = self.server.audio[self.server.next_index() % len(self.server.audio)]
+        self._send(200, audio, "audio/mpeg")
+
+    def _chat(self, body: Dict[str, Any]) -> None:
+        messages = body.get("messages") or []
+        prompt = "\n".join(str(m.get("content", "")) for m in messages)
+        response_format = body.get("response_format") or {}
+        if response_format.get("type") == "json_schema":
+            content = json.dumps({"scenes": _next_scenes(prompt)})
+        else:
+            content = CANNED_PLAN
+        prompt_tokens = len(prompt.split())
+        completion_tokens = len(content.split())
+        self._send_json(
+            200,
+            {
+                "id": f"chatcmpl-mock-{uuid.uuid4().hex[:12]}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body.get("model", "mock"),
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {
+                            "role": "assistant",
+                            "content": content,
+                            "refusal": None,
+                        },
+                        "finish_reason": "stop",
+                    }
+                ],
+                "usage": {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens,
+                    "total_tokens": prompt_tokens + completion_tokens,
+                },
+            },
+        )
+
+
+def _silent_wav(seconds: float, sample_rate: int = 24000) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(b"\x00\x00" * int(max(0.5, seconds) * sample_rate))
+    return buffer.getvalue()
+
+
+def _story_beats(prompt: str) -> List[str]:
+    """Splits the 'Full Story:' section of a scene-generation prompt into beats."""
+    match = re.search(r"Full Story:\n(.*?)\n---", prompt, flags=re.DOTALL)
+    story = match.group(1) if match else ""
+    beats = [p.strip() for p in re.split(r"\n\s*\n", story) if p.strip()]
+    if len(beats) <= 1:
+        beats = [s.strip() for s in re.split(r"(?<=[.!?])\s+", story) if s.strip()]
+    return beats or ["The story begins and ends."]
+
+
+def _next_scenes(prompt: str) -> List[Dict[str, str]]:
+    """The next batch of SceneList scenes, continuing after any existing ones."""
+    beats = _story_beats(prompt)
+    existing = len(re.findall(r"^\s*Scene \d+ Text:", prompt, flags=re.MULTILINE))
+    batch_match = re.search(r"generate up to (\d+) new scenes", prompt)
+    batch = int(batch_match.group(1)) if batch_match else 3
+    end = min(len(beats), existing + batch)
+    scenes = [
+        {
+            "text": beats[k],
+            "description": f"Oil painting, muted palette, depicting: {beats[k][:200]}",
+        }
+        for k in range(existing, end)
+    ]
+    if end >= len(beats):
+        scenes.append({"text": "DONE", "description": "DONE"})
+    return scenes
+
+
+def start_mock_proxy(
+    host: str = "127.0.0.1", port: int = 0, **config: Any
+) -> MockProxyServer:
+    """Starts the mock in a daemon thread (port 0 picks a free port); see `server.base_url`."""
+    server = MockProxyServer((host, port), **config)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the local mock proxy.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--image-latency", type=float, default=None)
+    parser.add_argument("--tts-latency", type=float, default=None)
+    parser.add_argument("--chat-latency", type=float, default=None)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    server = MockProxyServer(
+        (args.host, args.port),
+        latency=args.latency,
+        image_latency=args.image_latency,
+        tts_latency=args.tts_latency,
+        chat_latency=args.chat_latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        retry_after=args.retry_after,
+        seed=args.seed,
+    )
+    print(f"🧪 Mock proxy listening on {server.base_url}")
+    print(f"   export OPENAI_BASE_URL={server.base_url} OPENAI_API_KEY=mock")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
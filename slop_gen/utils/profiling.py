@@ -0,0 +1,148 @@
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+
+Path = Tuple[str, ...]
+
+
+class RenderProfiler:
+    """
+    Hierarchical timer for the render hot path.
+
+    Segment-level work is timed with `section(...)`; per-frame work is timed by
+    wrapping frame functions with `wrap_frame_fn(...)` (or `wrap_clip(...)` for
+    moviepy clips). Nested sections/wrappers build a call path such as
+    ``encode;frame;composite;effect``, so the result can be read as a flame
+    graph. Nothing here is moviepy specific apart from `wrap_clip`, so a
+    renderer that produces frames itself only needs `section` and
+    `wrap_frame_fn`.
+
+    With ``sample_every=N`` only every Nth frame has its sub-steps timed; those
+    timings are scaled by N so totals stay comparable. The frame itself is
+    always timed, which keeps the encoder's self time exact.
+
+    A disabled profiler is a no-op, so callers never need to branch on it.
+    """
+
+    def __init__(self, sample_every: int = 1, enabled: bool = True) -> None:
+        self.enabled = enabled
+        self.sample_every = max(1, int(sample_every))
+        self.inclusive: Dict[Path, float] = {}
+        self.calls: Dict[Path, int] = {}
+        self.frames = 0
+        self._stack: List[str] = []
+        self._in_skipped_frame = False
+        self._weight = 1
+
+    def _record(self, path: Path, seconds: float) -> None:
+        self.inclusive[path] = self.inclusive.get(path, 0.0) + seconds
+        self.calls[path] = self.calls.get(path, 0) + 1
+
+    @contextmanager
+    def section(self, name: str) -> Iterator[None]:
+        """Times the enclosed block as a child of whatever section is currently open."""
+        if not self.enabled or self._in_skipped_frame:
+            yield
+            return
+        self._stack.append(name)
+        path = tuple(self._stack)
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._record(path, (time.perf_counter() - t0) * self._weight)
+            self._stack.pop()
+
+    def wrap_frame_fn(
+        self, fn: Callable[..., Any], name: str, frame_root: bool = False
+    ) -> Callable[..., Any]:
+        """
+        Returns `fn` timed under `name` each time it is called.
+
+        The outermost per-frame function should be wrapped with
+        ``frame_root=True``; it counts frames and decides which ones are sampled.
+        """
+        if not self.enabled:
+            return fn
+
+        if not frame_root:
+
+            def timed(*args, **kwargs):
+                with self.section(name):
+                    return fn(*args, **kwargs)
+
+            return timed
+
+        def timed_frame(*args, **kwargs):
+            # The frame's own wall time is always recorded; its sub-steps only
+            # on sampled frames, scaled up to stand in for the skipped ones.
+            if self.frames % self.sample_every == 0:
+                self._weight = self.sample_every
+            else:
+                self._in_skipped_frame = True
+            self.frames += 1
+            self._stack.append(name)
+            path = tuple(self._stack)
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self._weight = 1
+                self._in_skipped_frame = False
+                self._record(path, time.perf_counter() - t0)
+                self._stack.pop()
+
+        return timed_frame
+
+    def wrap_clip(self, clip, name: str, frame_root: bool = False):
+        """Shallow-copies a moviepy clip with its `make_frame` timed under `name`."""
+        if not self.enabled:
+            return clip
+        wrapped = clip.copy()
+        wrapped.make_frame = self.wrap_frame_fn(clip.make_frame, name, frame_root)
+        return wrapped
+
+    def self_times(self) -> Dict[Path, float]:
+        """Inclusive time of each path minus the inclusive time of its direct children."""
+        own = dict(self.inclusive)
+        for path, seconds in self.inclusive.items():
+            if len(path) > 1 and path[:-1] in own:
+                own[path[:-1]] -= seconds
+        return {path: max(0.0, seconds) for path, seconds in own.items()}
+
+    def folded(self) -> List[str]:
+        """Folded stacks (``a;b;c <microseconds>``), the input format of flamegraph.pl/speedscope."""
+        return [
+            f"{';'.join(path)} {int(seconds * 1e6)}"
+            for path, seconds in sorted(self.self_times().items())
+            if seconds > 0
+        ]
+
+    def write_folded(self, path: str) -> str:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("\n".join(self.folded()) + "\n")
+        return path
+
+    def report(self) -> str:
+        """Indented tree of total/self time per step, children sorted by total time."""
+        own = self.self_times()
+        roots_total = sum(s for p, s in self.inclusive.items() if len(p) == 1) or 1e-9
+        lines = [
+            f"Render profile: {self.frames} frames, sub-steps sampled every {self.sample_every} frame(s)",
+            f"{'total s':>9}{'self s':>9}{'%':>7}{'calls':>8}  step",
+        ]
+
+        def emit(prefix: Path, depth: int) -> None:
+            children = [
+                p for p in self.inclusive if len(p) == depth + 1 and p[:depth] == prefix
+            ]
+            for path in sorted(children, key=lambda p: self.inclusive[p], reverse=True):
+                total = self.inclusive[path]
+                lines.append(
+                    f"{total:>9.2f}{own[path]:>9.2f}{100 * total / roots_total:>6.1f}%"
+                    f"{self.calls[path]:>8}  {'  ' * depth}{path[-1]}"
+                )
+                emit(path, depth + 1)
+
+        emit((), 0)
+        return "\n".join(lines)
@@ -0,0 +1,74 @@
+import os
+import threading
+import uuid
+from typing import Dict, Optional, Tuple
+
+from slop_gen.utils.instrumentation import get_tracer, new_run_id
+
+DEFAULT_RUNS_DIR = "assets/runs"
+
+
+class RunWorkspace:
+    """
+    Directories one pipeline run writes its assets to:
+
+        <root>/<run_id>/images/   generated scene images
+        <root>/<run_id>/audio/    narration
+        <root>/<run_id>/output/   rendered videos
+
+    Each run gets its own, so concurrent runs on one host never overwrite
+    each other's files. The content-keyed caches under assets/cache (image
+    pyramids, audio metadata, rendered segments) stay shared between runs.
+
+    `run_id` defaults to a fresh ID, prefixed with the active tracer's run
+    ID if there is one so a run's trace and workspaces are easy to match up;
+    every workspace created without an ID is a new directory. Passing an
+    existing ID reuses that workspace, e.g. to re-render it from its assets.
+    """
+
+    def __init__(
+        self, run_id: Optional[str] = None, root: str = DEFAULT_RUNS_DIR
+    ) -> None:
+        if run_id is None:
+            tracer = get_tracer()
+            run_id = (
+                f"{tracer.run_id}-{uuid.uuid4().hex[:6]}" if tracer else new_run_id()
+            )
+        self.run_id = run_id
+        self.path = os.path.join(root, run_id)
+        self.images_dir = os.path.join(self.path, "images")
+        self.audio_dir = os.path.join(self.path, "audio")
+        self.output_dir = os.path.join(self.path, "output")
+        for directory in (self.images_dir, self.audio_dir, self.output_dir):
+            os.makedirs(directory, exist_ok=True)
+
+    def output(self, name: str) -> str:
+        """Path of output file `name` in this run."""
+        return os.path.join(self.output_dir, name)
+
+
+_process_run_id: Optional[str] = None
+_current_workspaces: Dict[Tuple[str, str], RunWorkspace] = {}
+_current_lock = threading.Lock()
+
+
+def current_workspace(root: str = DEFAULT_RUNS_DIR) -> RunWorkspace:
+    """
+    The workspace of the current run, shared by every helper called without
+    one, so e.g. a story's images and narration land side by side. It is
+    named after the active tracer's run ID, or is one per process when no
+    run was started. Stories generated concurrently in one run should each
+    pass their own RunWorkspace instead.
+    """
+    global _process_run_id
+    tracer = get_tracer()
+    with _current_lock:
+        if tracer is not None:
+            run_id = tracer.run_id
+        else:
+            _process_run_id = _process_run_id or new_run_id()
+            run_id = _process_run_id
+        key = (root, run_id)
+        if key not in _current_workspaces:
+            _current_workspaces[key] = RunWorkspace(run_id, root=root)
+        return _current_workspaces[key]
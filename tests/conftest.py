@@ -0,0 +1,4 @@
+import os
+
+# api_utils builds its OpenAI client at import time; no test talks to the API.
+os.environ.setdefault("OPENAI_API_KEY", "test")
@@ -0,0 +1,16 @@
+import pytest
+
+from slop_gen.utils import api_utils
+
+
+@pytest.mark.parametrize(
+    "generate",
+    [
+        api_utils.generate_images_with_imagen_to_files,
+        api_utils.generate_openai_images_via_proxy_to_files,
+    ],
+)
+def test_empty_image_response_raises(monkeypatch, generate):
+    monkeypatch.setattr(api_utils, "_post_images_to_files", lambda *a, **k: [])
+    with pytest.raises(RuntimeError, match="No image data returned"):
+        generate("a castle", lambda n: f"/nonexistent/{n}.png")
@@ -0,0 +1,106 @@
+import io
+import struct
+import wave
+
+import pytest
+
+from slop_gen.utils.audio_probe import (
+    DEFAULT_INDEX_PATH,
+    AudioMetadataIndex,
+    get_audio_index,
+    probe_mp3,
+    probe_wav,
+    set_audio_index,
+)
+
+# MPEG-1 layer III, 128 kbit/s, 44.1 kHz, joint stereo: 417-byte frames of 1152 samples.
+MP3_HEADER = b"\xff\xfb\x90\x44"
+MP3_FRAME_LENGTH = 417
+MP3_FRAME_SAMPLES = 1152
+
+
+def _mp3_frame(payload: bytes = b"") -> bytes:
+    body = MP3_HEADER + payload
+    return body + b"\x00" * (MP3_FRAME_LENGTH - len(body))
+
+
+def _xing_frame(frames: int) -> bytes:
+    # Stereo MPEG-1: the Xing tag follows 32 bytes of side info.
+    return _mp3_frame(b"\x00" * 32 + b"Xing" + struct.pack(">II", 1, frames))
+
+
+def _id3v2(size: int) -> bytes:
+    syncsafe = bytes((size >> shift) & 0x7F for shift in (21, 14, 7, 0))
+    # Tag data full of stray sync bytes, as embedded artwork often is.
+    tag_data = (b"\xff\xfb\x90" * size)[:size]
+    return b"ID3\x03\x00\x00" + syncsafe + tag_data
+
+
+def _wav(frames: int, rate: int = 44100, channels: int = 1) -> bytes:
+    out = io.BytesIO()
+    with wave.open(out, "wb") as w:
+        w.setnchannels(channels)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes(b"\x00\x00" * channels * frames)
+    return out.getvalue()
+
+
+def test_wav_duration_from_the_data_chunk():
+    info = probe_wav(_wav(22050, rate=44100, channels=2))
+    assert info == {
+        "duration": 0.5,
+        "sample_rate": 44100,
+        "channels": 2,
+        "format": "wav",
+    }
+
+
+@pytest.mark.parametrize("size", [0, 0xFFFFFFFF])
+def test_streamed_wav_size_uses_the_rest_of_the_file(size):
+    data = bytearray(_wav(24000, rate=24000))
+    data[40:44] = struct.pack("<I", size)  # the data chunk's size field
+    assert probe_wav(bytes(data))["duration"] == pytest.approx(1.0)
+
+
+def test_non_wav_is_not_probed_as_wav():
+    assert probe_wav(_mp3_frame() * 3) is None
+    assert probe_wav(b"RIFF") is None
+
+
+def test_cbr_mp3_adds_up_its_frames():
+    info = probe_mp3(_mp3_frame() * 10)
+    assert info["duration"] == pytest.approx(10 * MP3_FRAME_SAMPLES / 44100)
+    assert (info["sample_rate"], info["channels"], info["format"]) == (44100, 2, "mp3")
+
+
+def test_vbr_header_gives_the_frame_count():
+    # The header claims 100 frames; only 3 are present, so the count must come from it.
+    info = probe_mp3(_xing_frame(100) + _mp3_frame() * 3)
+    assert info["duration"] == pytest.approx(100 * MP3_FRAME_SAMPLES / 44100)
+
+
+def test_id3_tags_are_skipped():
+    data = _id3v2(999) + _mp3_frame() * 4 + b"TAG" + b"\x00" * 125
+    info = probe_mp3(data)
+    assert info["duration"] == pytest.approx(4 * MP3_FRAME_SAMPLES / 44100)
+
+
+def test_stray_sync_bytes_are_not_frames():
+    junk = b"\x00\xff\xfb\x90\x44junk\xff\xe0" + b"\x01" * 50
+    info = probe_mp3(junk + _mp3_frame() * 5)
+    assert info["duration"] == pytest.approx(5 * MP3_FRAME_SAMPLES / 44100)
+
+
+def test_data_without_frames_is_not_mp3():
+    assert probe_mp3(b"\x00" * 2000) is None
+    assert probe_mp3(_wav(100)) is None
+
+
+def test_process_wide_index_can_be_replaced(tmp_path):
+    previous = set_audio_index(AudioMetadataIndex(str(tmp_path / "index.json")))
+    try:
+        assert get_audio_index().index_path == str(tmp_path / "index.json")
+    finally:
+        set_audio_index(previous)
+    assert get_audio_index().index_path == DEFAULT_INDEX_PATH
@@ -0,0 +1,58 @@
+from slop_gen.generators.story_gen.effect_plan import MIN_ZOOM_DURATION, plan_effects
+
+EFFECTS = ["zoom_in", "zoom_out", "pan_left", "pan_right"]
+ZOOMS = {"zoom_in", "zoom_out"}
+
+
+def test_same_seed_gives_same_plan():
+    durations = [3.0, 4.0, 2.5, 5.0, 3.5]
+    assert plan_effects(durations, 7, EFFECTS) == plan_effects(durations, 7, EFFECTS)
+
+
+def test_different_seeds_give_different_plans():
+    durations = [3.0] * 10
+    assert plan_effects(durations, 1, EFFECTS) != plan_effects(durations, 2, EFFECTS)
+
+
+def test_segments_are_seeded_by_index():
+    # A segment's plan depends on the seed and its index, not on what comes after it.
+    durations = [3.0, 4.0, 2.5, 5.0, 3.5, 4.5]
+    full = plan_effects(durations, 11, EFFECTS)
+    prefix = plan_effects(durations[:3], 11, EFFECTS)
+    assert full.segments[:3] == prefix.segments
+
+
+def test_no_effect_repeats_back_to_back():
+    for seed in range(20):
+        effects = [s.effect for s in plan_effects([3.0] * 30, seed, EFFECTS).segments]
+        assert all(a != b for a, b in zip(effects, effects[1:]))
+
+
+def test_short_segments_get_no_zoom():
+    durations = [MIN_ZOOM_DURATION / 2] * 20
+    for seed in range(10):
+        plan = plan_effects(durations, seed, EFFECTS, zoom_effect_names=ZOOMS)
+        assert not any(s.effect in ZOOMS for s in plan.segments)
+
+
+def test_short_segments_keep_zooms_when_nothing_else_is_allowed():
+    plan = plan_effects([0.5, 0.5], 0, ["zoom_in"], zoom_effect_names=ZOOMS)
+    assert [s.effect for s in plan.segments] == ["zoom_in", "zoom_in"]
+
+
+def test_single_effect_may_repeat():
+    plan = plan_effects([3.0] * 4, 0, ["pan_left"])
+    assert [s.effect for s in plan.segments] == ["pan_left"] * 4
+
+
+def test_no_effects_plans_static_views():
+    plan = plan_effects([3.0] * 3, 5, [])
+    assert [s.effect for s in plan.segments] == [None, None, None]
+
+
+def test_offsets_are_fractions():
+    plan = plan_effects([3.0] * 50, 3, EFFECTS)
+    assert plan.seed == 3
+    for segment in plan.segments:
+        assert -1.0 <= segment.offset_x <= 1.0
+        assert -1.0 <= segment.offset_y <= 1.0
@@ -0,0 +1,84 @@
+import multiprocessing
+import os
+import time
+
+import numpy as np
+import pytest
+
+from slop_gen.utils.frame_ring import FrameRing
+
+pytestmark = pytest.mark.skipif(
+    not hasattr(os, "fork"), reason="FrameRing workers are forked"
+)
+
+SHAPE = (4, 6, 3)
+
+
+def _produce(ring: FrameRing, frames: int, worker: int, workers: int) -> None:
+    for k in range(worker, frames, workers):
+        # Later workers finish their frames first, so frames arrive out of order.
+        time.sleep(0.002 * (workers - worker))
+        with ring.writing(k, timeout=10) as slot:
+            slot[...] = k % 256
+
+
+@pytest.mark.parametrize("workers", [1, 2, 3])
+def test_frames_are_read_in_order(workers):
+    frames = 40
+    ring = FrameRing(SHAPE, slots=2 * workers, workers=workers)
+    ctx = multiprocessing.get_context("fork")
+    procs = [
+        ctx.Process(target=_produce, args=(ring, frames, w, workers))
+        for w in range(workers)
+    ]
+    for proc in procs:
+        proc.start()
+    try:
+        seen = []
+        for k in range(frames):
+            assert ring.acquire_read(k, timeout=10)
+            seen.append(int(ring.slot(k)[0, 0, 0]))
+            assert (ring.slot(k) == k % 256).all()
+            ring.release(k)
+        assert seen == list(range(frames))
+        for proc in procs:
+            proc.join(timeout=10)
+            assert proc.exitcode == 0
+    finally:
+        ring.close()
+
+
+def test_slots_must_be_a_multiple_of_workers():
+    with pytest.raises(ValueError):
+        FrameRing(SHAPE, slots=3, workers=2)
+    with pytest.raises(ValueError):
+        FrameRing(SHAPE, slots=0)
+
+
+def test_writing_times_out_on_an_unconsumed_slot():
+    ring = FrameRing(SHAPE, slots=1)
+    try:
+        with ring.writing(0) as slot:
+            slot[...] = 1
+        # Frame 1 shares frame 0's slot, which nobody has read yet.
+        with pytest.raises(TimeoutError):
+            with ring.writing(1, timeout=0.05):
+                pass
+        assert ring.acquire_read(0, timeout=1)
+        ring.release(0)
+        with ring.writing(1, timeout=1) as slot:
+            slot[...] = 2
+        assert ring.acquire_read(1, timeout=1)
+        assert (ring.slot(1) == 2).all()
+    finally:
+        ring.close()
+
+
+def test_slots_are_shared_memory_views():
+    ring = FrameRing(SHAPE, slots=2)
+    try:
+        assert ring.slot(0).shape == SHAPE
+        assert ring.slot(2).ctypes.data == ring.slot(0).ctypes.data
+        assert not np.shares_memory(ring.slot(0), ring.slot(1))
+    finally:
+        ring.close()
@@ -0,0 +1,58 @@
+import base64
+import json
+import os
+
+import pytest
+
+from slop_gen.utils.image_ingest import ingest_json_images
+
+IMAGES = [os.urandom(3000), os.urandom(1001)]
+
+
+def _body(images=IMAGES, escape_slashes=False) -> bytes:
+    data = [{"b64_json": base64.b64encode(image).decode()} for image in images]
+    body = json.dumps({"created": 1, "data": data}).encode()
+    return body.replace(b"/", b"\\/") if escape_slashes else body
+
+
+def _chunks(body: bytes, size: int):
+    return [body[k : k + size] for k in range(0, len(body), size)]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 7, 64, 1 << 20])
+def test_images_are_decoded_into_files_whatever_the_chunking(tmp_path, chunk_size):
+    path_for = lambda n: str(tmp_path / f"image_{n}.png")
+    body, paths = ingest_json_images(_chunks(_body(), chunk_size), path_for)
+    assert paths == [path_for(0), path_for(1)]
+    for path, image in zip(paths, IMAGES):
+        with open(path, "rb") as f:
+            assert f.read() == image
+    # The rest of the JSON is parsed, with each value replaced by its file.
+    assert body["created"] == 1
+    assert [item["b64_json"] for item in body["data"]] == paths
+    assert sorted(os.listdir(tmp_path)) == ["image_0.png", "image_1.png"]
+
+
+def test_escaped_slashes_are_decoded(tmp_path):
+    image = b"\xff" * 300  # base64 "////..."
+    chunks = _chunks(_body([image], escape_slashes=True), 5)
+    _, paths = ingest_json_images(chunks, lambda n: str(tmp_path / f"{n}.png"))
+    with open(paths[0], "rb") as f:
+        assert f.read() == image
+
+
+def test_null_and_url_values_are_left_in_the_body(tmp_path):
+    body = b'{"data": [{"b64_json": null, "url": "http://x/1.png"}]}'
+    parsed, paths = ingest_json_images(_chunks(body, 4), lambda n: str(tmp_path / "x"))
+    assert paths == []
+    assert parsed["data"][0] == {"b64_json": None, "url": "http://x/1.png"}
+
+
+def test_truncated_body_raises_and_removes_files(tmp_path):
+    body = _body()
+    with pytest.raises(ValueError):
+        ingest_json_images(
+            _chunks(body[: len(body) - 500], 100),
+            lambda n: str(tmp_path / f"image_{n}.png"),
+        )
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,128 @@
+import asyncio
+import os
+
+import numpy as np
+import pytest
+import requests
+from PIL import Image
+
+from slop_gen.generators.story_gen import images
+
+
+def _http_error(status: int, text: str = "error") -> requests.HTTPError:
+    response = requests.Response()
+    response.status_code = status
+    response._content = text.encode()
+    return requests.HTTPError(f"{status} {text}", response=response)
+
+
+class FakeGenerator:
+    """
+    Stands in for the image backend: `outcomes(prompt, call)` returns an
+    exception to raise, or None to return a noisy (usable) image per request.
+    """
+
+    def __init__(self, outcomes):
+        self.outcomes = outcomes
+        self.prompts = []
+
+    async def __call__(self, prompt, path_for, count, size):
+        self.prompts.append(prompt)
+        error = self.outcomes(prompt, self.prompts.count(prompt))
+        if error is not None:
+            raise error
+        rng = np.random.default_rng(len(self.prompts))
+        paths = []
+        for n in range(count):
+            pixels = rng.integers(0, 256, (32, 18, 3), dtype=np.uint8)
+            Image.fromarray(pixels).save(path_for(n))
+            paths.append(path_for(n))
+        return paths
+
+
+@pytest.fixture
+def fake(monkeypatch):
+    def install(outcomes):
+        generator = FakeGenerator(outcomes)
+        monkeypatch.setattr(images, "_request_candidates", generator)
+        return generator
+
+    monkeypatch.setattr(images, "IMAGE_RETRY_BACKOFF", 0.001)
+    monkeypatch.setattr(images, "_rejected_sizes", set())
+    # Keeps the render-ready copies out of the shared image cache.
+    monkeypatch.setattr(images, "_normalize_for_render", lambda path: None)
+    return install
+
+
+def _generate(scenes, output_dir, **kwargs):
+    return asyncio.run(
+        images.generate_images_for_scenes(
+            [{"description": scene} for scene in scenes], str(output_dir), **kwargs
+        )
+    )
+
+
+def _read(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def test_transient_error_is_retried(tmp_path, fake):
+    generator = fake(lambda prompt, call: _http_error(503) if call == 1 else None)
+    paths = _generate(["a castle at night"], tmp_path)
+    assert paths == [str(tmp_path / "scene_0.png")]
+    assert generator.prompts == ["a castle at night"] * 2
+
+
+@pytest.mark.parametrize(
+    "error",
+    [_http_error(401, "unauthorized"), _http_error(403), _http_error(404, "no model")],
+)
+def test_permanent_error_is_not_retried(tmp_path, fake, error):
+    generator = fake(lambda prompt, call: error)
+    assert _generate(["a castle at night"], tmp_path) == []
+    assert len(generator.prompts) == 1
+
+
+def test_refused_prompt_is_not_resent_unchanged(tmp_path, fake):
+    refusal = _http_error(400, "rejected by the content policy")
+    generator = fake(lambda prompt, call: refusal)
+    _generate(["a quiet lake"], tmp_path, simplify_refused_prompts=False)
+    assert generator.prompts == ["a quiet lake"]
+
+
+def test_deadline_stops_the_retries(tmp_path, fake):
+    generator = fake(lambda prompt, call: _http_error(503))
+    assert _generate(["a castle at night"], tmp_path, recovery_deadline=0.0) == []
+    assert len(generator.prompts) == 1
+
+
+def test_retries_stop_after_the_attempt_limit(tmp_path, fake):
+    generator = fake(lambda prompt, call: _http_error(503))
+    _generate(["a castle at night"], tmp_path)
+    assert len(generator.prompts) == 1 + images.IMAGE_RETRY_ATTEMPTS
+
+
+def test_failing_scene_reuses_a_neighbours_image(tmp_path, fake):
+    fake(lambda prompt, call: _http_error(503) if prompt == "broken" else None)
+    paths = _generate(["first", "broken", "third"], tmp_path)
+    assert len(paths) == 3
+    assert _read(paths[1]) == _read(paths[0])
+    # A hardlink, not a copy.
+    assert os.stat(paths[1]).st_ino == os.stat(paths[0]).st_ino
+
+
+def test_failing_first_scene_reuses_the_next_image(tmp_path, fake):
+    fake(lambda prompt, call: _http_error(503) if prompt == "broken" else None)
+    paths = _generate(["broken", "second"], tmp_path)
+    assert _read(paths[0]) == _read(paths[1])
+
+
+def test_refused_scene_without_neighbours_retries_a_simplified_prompt(tmp_path, fake):
+    prompt = "A bloody knife on the table. The killer waits outside."
+    refusal = _http_error(400, "rejected by the safety system")
+    generator = fake(lambda p, call: refusal if p == prompt else None)
+    paths = _generate([prompt], tmp_path)
+    assert paths == [str(tmp_path / "scene_0.png")]
+    assert generator.prompts == [prompt, images.simplify_prompt(prompt)]
+    assert generator.prompts[1] == "A on the table."
@@ -0,0 +1,38 @@
+from slop_gen.generators.story_gen.image_sizing import (
+    image_request_sizes,
+    required_image_height,
+)
+from slop_gen.utils.image_cache import RENDER_MAX_SCALE
+
+
+def _values(sizes):
+    return [size["value"] for size in sizes]
+
+
+def test_required_height_covers_the_largest_effect_scale():
+    assert required_image_height(1080) == 1440
+    assert required_image_height(480) >= 480 * RENDER_MAX_SCALE
+
+
+def test_openai_full_render_asks_for_the_smallest_covering_size_first():
+    sizes = image_request_sizes("gpt-image-1", 1080)
+    assert _values(sizes) == ["1024x1536", "1024x1024"]
+    assert {size["quality"] for size in sizes} == {"medium"}
+
+
+def test_openai_preview_asks_for_a_square_low_quality_image():
+    sizes = image_request_sizes("gpt-image-1", 480)
+    assert _values(sizes) == ["1024x1024", "1024x1536"]
+    assert {size["quality"] for size in sizes} == {"low"}
+
+
+def test_imagen_falls_back_tallest_first_when_nothing_covers():
+    sizes = image_request_sizes("google.imagen-3.0-generate", 1080)
+    assert _values(sizes) == ["9:16", "3:4", "1:1"]
+    assert {size["quality"] for size in sizes} == {None}
+
+
+def test_imagen_preview_asks_for_the_smallest_covering_size_first():
+    sizes = image_request_sizes("google.imagen-3.0-generate", 720)
+    assert _values(sizes) == ["1:1", "9:16", "3:4"]
+    assert [size["height"] for size in sizes] == [1024, 1408, 1280]
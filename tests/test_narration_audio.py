@@ -0,0 +1,30 @@
+import io
+import wave
+
+import pytest
+
+from slop_gen.generators.story_gen import audio
+
+
+@pytest.mark.parametrize(
+    "convert",
+    [
+        lambda data: audio.to_narration_wav(data, speed=1.2),
+        lambda data: audio.change_speed_ffmpeg(data, 1.2, "mp3", "mp3"),
+    ],
+)
+def test_helpers_use_moviepys_ffmpeg_binary(monkeypatch, convert):
+    monkeypatch.setattr(audio, "get_setting", lambda name: "/nonexistent/ffmpeg")
+    with pytest.raises(RuntimeError, match="/nonexistent/ffmpeg"):
+        convert(b"not audio")
+
+
+def test_narration_wav_is_passed_through(monkeypatch):
+    monkeypatch.setattr(audio, "get_setting", lambda name: "/nonexistent/ffmpeg")
+    out = io.BytesIO()
+    with wave.open(out, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(audio.NARRATION_SAMPLE_RATE)
+        w.writeframes(b"\x00\x00" * 100)
+    assert audio.to_narration_wav(out.getvalue()) == out.getvalue()
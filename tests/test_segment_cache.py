@@ -0,0 +1,144 @@
+import os
+import time
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from slop_gen.generators.story_gen.effect_plan import SegmentEffect, plan_effects
+from slop_gen.generators.story_gen.video import (
+    create_video_from_assets,
+    prune_segment_cache,
+    segment_chunk_key,
+)
+from slop_gen.utils.image_cache import ImagePyramidCache
+
+BASE = dict(
+    image_hash="img",
+    audio_hash="wav",
+    caption=("A caption", 30),
+    planned=SegmentEffect(effect="zoom_in_effect", offset_x=0.2, offset_y=-0.1),
+    size=(608, 1080),
+    fps=24,
+    preset="medium",
+    frames=72,
+)
+
+
+def test_unchanged_segment_has_the_same_key():
+    assert segment_chunk_key(**BASE) == segment_chunk_key(**dict(BASE))
+
+
+@pytest.mark.parametrize(
+    "change",
+    [
+        {"image_hash": "other image"},
+        {"audio_hash": None},
+        {"caption": ("Another caption", 30)},
+        {"caption": ("A caption", 20)},
+        {"caption": None},
+        {"planned": SegmentEffect(effect="pan_left_effect", offset_x=0.2, offset_y=-0.1)},
+        {"planned": SegmentEffect(effect="zoom_in_effect", offset_x=0.3, offset_y=-0.1)},
+        {"size": (720, 1280)},
+        {"fps": 30},
+        {"preset": "ultrafast"},
+        {"frames": 73},
+    ],
+)
+def test_changed_input_gets_a_new_key(change):
+    assert segment_chunk_key(**{**BASE, **change}) != segment_chunk_key(**BASE)
+
+
+def _touch(path, size: int, age: float) -> None:
+    with open(path, "wb") as f:
+        f.write(b"x" * size)
+    when = time.time() - age
+    os.utime(path, (when, when))
+
+
+def test_prune_removes_least_recently_used_chunks(tmp_path):
+    for name, age in [("old", 3000), ("older", 4000), ("oldest", 5000), ("new", 10)]:
+        _touch(tmp_path / f"{name}.mp4", 100, age)
+    freed = prune_segment_cache(str(tmp_path), max_bytes=250, min_age_s=60)
+    assert freed == 200
+    assert sorted(os.listdir(tmp_path)) == ["new.mp4", "old.mp4"]
+
+
+def test_prune_keeps_recent_chunks_and_a_cache_under_the_cap(tmp_path):
+    for name in ["a", "b", "c"]:
+        _touch(tmp_path / f"{name}.mp4", 100, 10)
+    assert prune_segment_cache(str(tmp_path), max_bytes=0, min_age_s=60) == 0
+    assert prune_segment_cache(str(tmp_path), max_bytes=300, min_age_s=0) == 0
+    assert len(os.listdir(tmp_path)) == 3
+
+
+def test_prune_removes_stale_temporary_files(tmp_path):
+    _touch(tmp_path / "key.mp4.123.abcd1234.tmp.mp4", 50, 7200)
+    _touch(tmp_path / "key.mp4.456.abcd1234.tmp.mp4", 50, 1)  # still being written
+    _touch(tmp_path / "key.mp4", 100, 7200)
+    assert prune_segment_cache(str(tmp_path), max_bytes=1000, min_age_s=3600) == 50
+    assert sorted(os.listdir(tmp_path)) == ["key.mp4", "key.mp4.456.abcd1234.tmp.mp4"]
+
+
+def _render(image_paths, cache_dir, output_path, durations=(0.5, 0.5)):
+    create_video_from_assets(
+        image_paths,
+        [None] * len(image_paths),
+        [""] * len(image_paths),
+        output_path=output_path,
+        fps=8,
+        height=64,
+        default_segment_duration=durations[0],
+        post_processing_effects=[],
+        image_cache=ImagePyramidCache(os.path.join(os.path.dirname(cache_dir), "px")),
+        streaming=True,
+        segment_cache_dir=cache_dir,
+        effect_plan=plan_effects(list(durations), 0, []),
+    )
+    return sorted(os.listdir(cache_dir))
+
+
+def test_streaming_render_reuses_unchanged_chunks(tmp_path):
+    rng = np.random.default_rng(0)
+    image_paths = []
+    for k in range(2):
+        path = str(tmp_path / f"scene_{k}.png")
+        Image.fromarray(rng.integers(0, 256, (96, 54, 3), dtype=np.uint8)).save(path)
+        image_paths.append(path)
+    cache_dir = str(tmp_path / "segments")
+
+    first = _render(image_paths, cache_dir, str(tmp_path / "a.mp4"))
+    assert len(first) == 2
+    mtimes = {name: os.stat(os.path.join(cache_dir, name)).st_mtime_ns for name in first}
+
+    # Same inputs: both chunks are reused, nothing new is encoded.
+    assert _render(image_paths, cache_dir, str(tmp_path / "b.mp4")) == first
+
+    # A changed image only re-encodes its own segment.
+    Image.fromarray(rng.integers(0, 256, (96, 54, 3), dtype=np.uint8)).save(
+        image_paths[1]
+    )
+    third = _render(image_paths, cache_dir, str(tmp_path / "c.mp4"))
+    assert len(third) == 3 and set(first) < set(third)
+    for name in first:
+        assert os.stat(os.path.join(cache_dir, name)).st_mtime_ns >= mtimes[name]
+
+
+def test_cache_is_ignored_without_streaming(tmp_path):
+    path = str(tmp_path / "scene.png")
+    Image.fromarray(np.full((96, 54, 3), 128, dtype=np.uint8)).save(path)
+    cache_dir = str(tmp_path / "segments")
+    create_video_from_assets(
+        [path],
+        [None],
+        [""],
+        output_path=str(tmp_path / "out.mp4"),
+        fps=8,
+        height=64,
+        default_segment_duration=0.5,
+        post_processing_effects=[],
+        image_cache=ImagePyramidCache(str(tmp_path / "px")),
+        segment_cache_dir=cache_dir,
+    )
+    assert os.path.exists(tmp_path / "out.mp4")
+    assert not os.path.exists(cache_dir)
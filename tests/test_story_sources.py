@@ -0,0 +1,30 @@
+import os
+
+import pytest
+
+from slop_gen.generators.pipeline import STORY_SOURCES, StorySource
+
+
+def test_story_source_is_abstract():
+    with pytest.raises(TypeError):
+        StorySource()
+
+
+def test_every_source_implements_scenes():
+    for cls in STORY_SOURCES.values():
+        assert not getattr(cls, "__abstractmethods__", None), cls
+
+
+def test_lines_source_scenes():
+    source = StorySource.create("lines", lines=["One.", "Two."], style="Ink")
+    assert source.scenes() == [
+        {"text": "One.", "description": "Ink One."},
+        {"text": "Two.", "description": "Ink Two."},
+    ]
+
+
+@pytest.mark.parametrize("name", sorted(STORY_SOURCES))
+def test_default_music_exists(name):
+    music_path = STORY_SOURCES[name].render_defaults.get("music_path")
+    repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    assert music_path is None or os.path.exists(os.path.join(repo_root, music_path))
@@ -0,0 +1,73 @@
+import numpy as np
+
+from slop_gen.generators.story_gen.effect_plan import (
+    EffectPlan,
+    SegmentEffect,
+    plan_effects,
+)
+from slop_gen.generators.story_gen.streaming import AUDIO_FPS
+from slop_gen.generators.story_gen.timeline import build_timeline
+
+
+def _static_plan(n: int) -> EffectPlan:
+    return plan_effects([1.0] * n, 0, [])
+
+
+def test_frames_are_cut_on_a_running_timeline():
+    # Each 0.26 s segment alone rounds to 3 frames at 10 fps; ten of them are
+    # 26 frames, not 30, because the cuts are rounded from the running total.
+    durations = [0.26] * 10
+    timeline = build_timeline(durations, 10, _static_plan(10))
+    assert timeline.n_frames == 26
+    assert list(timeline.end_frame) == [round(0.26 * (i + 1) * 10) for i in range(10)]
+    assert (timeline.start_frame[1:] == timeline.end_frame[:-1]).all()
+
+
+def test_shown_segments_get_at_least_one_frame():
+    timeline = build_timeline([0.01, 0.01, 1.0], 24, _static_plan(3))
+    assert [timeline.frames(i) for i in range(3)] == [1, 1, 22]
+
+
+def test_audio_stays_on_the_unquantized_timeline():
+    durations = [0.26] * 10
+    timeline = build_timeline(durations, 10, _static_plan(10))
+    assert timeline.audio_end[-1] == round(sum(durations) * AUDIO_FPS)
+    for i in range(10):
+        picture = timeline.start(i) + timeline.segment_duration(i)
+        narration = timeline.audio_end[i] / AUDIO_FPS
+        assert abs(picture - narration) <= 0.5 / timeline.fps
+
+
+def test_hidden_segments_take_no_time():
+    timeline = build_timeline(
+        [1.0, 2.0, 1.0], 10, _static_plan(3), shown=[True, False, True]
+    )
+    assert [timeline.frames(i) for i in range(3)] == [10, 0, 10]
+    assert timeline.audio_samples(1) == 0
+    assert not timeline.is_shown(1)
+    assert timeline.duration == 2.0
+
+
+def test_frames_map_back_to_their_segments():
+    timeline = build_timeline([0.5, 1.0, 0.5], 10, _static_plan(3))
+    assert list(timeline.frame_segment) == [0] * 5 + [1] * 10 + [2] * 5
+    assert timeline.segment_at(0.75) == 1
+    assert timeline.segment_at(99.0) == 2
+    assert list(timeline.segments_in(3, 7)) == [0, 1]
+
+
+def test_effects_round_trip_through_the_timeline():
+    plan = EffectPlan(
+        seed=0,
+        segments=[
+            SegmentEffect(effect="zoom_in", offset_x=0.5, offset_y=-0.5),
+            SegmentEffect(effect=None),
+            SegmentEffect(effect="zoom_in", offset_x=-1.0),
+        ],
+    )
+    timeline = build_timeline([1.0] * 3, 10, plan, captions=["a", None, "c"])
+    assert timeline.effect_names == ["zoom_in"]
+    assert list(timeline.effect) == [0, -1, 0]
+    assert [timeline.segment_effect(i) for i in range(3)] == plan.segments
+    assert timeline.captions == ["a", None, "c"]
+    assert timeline.offset_x.dtype == np.float64
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from slop_gen.generators.story_gen.transitions import (
+    Transition,
+    TransitionBlender,
+    transition_windows,
+)
+
+
+def test_windows_are_centered_on_the_cuts():
+    windows = transition_windows([2.0, 3.0, 4.0], 0.5)
+    assert windows == [(2.0, 1.75, 2.25), (5.0, 4.75, 5.25)]
+
+
+def test_windows_are_clamped_to_half_of_each_neighbour():
+    cut, start, end = transition_windows([0.4, 3.0], 1.0)[0]
+    assert (cut, start, end) == pytest.approx((0.4, 0.2, 0.6))
+    cut, start, end = transition_windows([3.0, 0.2], 1.0)[0]
+    assert (cut, start, end) == pytest.approx((3.0, 2.9, 3.1))
+
+
+def test_single_segment_has_no_windows():
+    assert transition_windows([3.0], 0.5) == []
+    assert transition_windows([], 0.5) == []
+
+
+def test_crossfade_midpoint_and_ends():
+    blender = TransitionBlender()
+    a = np.full((2, 4, 3), 200, dtype=np.uint8)
+    b = np.full((2, 4, 3), 100, dtype=np.uint8)
+    assert (blender.blend(Transition.CROSSFADE, a, b, 0.0) == 200).all()
+    assert (blender.blend(Transition.CROSSFADE, a, b, 0.5) == 150).all()
+    assert (blender.blend(Transition.CROSSFADE, a, b, 1.0) == 100).all()
+
+
+def test_dip_to_black_is_black_at_the_cut():
+    blender = TransitionBlender()
+    a = np.full((2, 4, 3), 200, dtype=np.uint8)
+    b = np.full((2, 4, 3), 100, dtype=np.uint8)
+    assert (blender.blend(Transition.DIP_TO_BLACK, a, b, 0.5) == 0).all()
+
+
+def test_slide_pushes_the_first_frame_left():
+    blender = TransitionBlender()
+    a = np.zeros((1, 4, 3), dtype=np.uint8)
+    b = np.full((1, 4, 3), 255, dtype=np.uint8)
+    out = blender.blend(Transition.SLIDE, a, b, 0.5)
+    assert (out[:, :2] == 0).all() and (out[:, 2:] == 255).all()
@@ -0,0 +1,69 @@
+import pytest
+import requests
+
+from slop_gen.generators.story_gen import audio
+from slop_gen.utils import api_utils
+from slop_gen.utils.mock_proxy import start_mock_proxy
+
+
+@pytest.fixture
+def proxy(monkeypatch):
+    """Starts a seeded local mock proxy and points the API helpers at it."""
+    servers = []
+
+    def start(**config):
+        server = start_mock_proxy(retry_after=0.01, seed=3, **config)
+        servers.append(server)
+        monkeypatch.setattr(api_utils, "OPENAI_BASE_URL", server.base_url)
+        return server
+
+    monkeypatch.setattr(audio, "TTS_RETRY_BACKOFF", 0.001)
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def _narrate(tmp_path, lines):
+    return audio.generate_audio_for_scenes(
+        [{"text": line} for line in lines],
+        output_dir=str(tmp_path),
+        fmt="mp3",
+        # One request at a time, so the seeded proxy fails the same calls every run.
+        max_concurrency=1,
+    )
+
+
+def test_rate_limited_narration_is_retried(tmp_path, proxy):
+    server = proxy(rate_limit_rate=0.3)
+    paths = _narrate(tmp_path, [f"line {k}" for k in range(8)])
+    assert server.stats["rate_limited"] > 0
+    assert all(path is not None for path in paths)
+
+
+def test_server_errors_are_retried(tmp_path, proxy):
+    server = proxy(error_rate=0.3)
+    paths = _narrate(tmp_path, [f"line {k}" for k in range(8)])
+    assert server.stats["errors"] > 0
+    assert all(path is not None for path in paths)
+
+
+def test_retries_stop_after_the_attempt_limit(tmp_path, proxy):
+    server = proxy(rate_limit_rate=1.0)
+    assert _narrate(tmp_path, ["only line"]) == [None]
+    assert server.stats["rate_limited"] == 1 + audio.TTS_RETRY_ATTEMPTS
+
+
+@pytest.mark.parametrize("status", [400, 401, 404])
+def test_permanent_errors_are_not_retried(tmp_path, monkeypatch, status):
+    calls = []
+
+    def rejected(**kwargs):
+        calls.append(kwargs)
+        response = requests.Response()
+        response.status_code = status
+        raise requests.HTTPError(f"{status} rejected", response=response)
+
+    monkeypatch.setattr(audio, "text_to_speech", rejected)
+    assert _narrate(tmp_path, ["only line"]) == [None]
+    assert len(calls) == 1
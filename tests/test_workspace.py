@@ -0,0 +1,61 @@
+import contextvars
+import os
+
+from slop_gen.generators import pipeline
+from slop_gen.utils.instrumentation import start_run
+from slop_gen.utils.workspace import RunWorkspace, current_workspace
+
+
+def _in_run(fn, run_id=None):
+    """Calls `fn` with a fresh tracer active, without leaking it to other tests."""
+
+    def run():
+        start_run(run_id)
+        return fn()
+
+    return contextvars.copy_context().run(run)
+
+
+def test_workspaces_without_an_id_are_distinct(tmp_path):
+    a, b = RunWorkspace(root=str(tmp_path)), RunWorkspace(root=str(tmp_path))
+    assert a.path != b.path
+    assert all(os.path.isdir(d) for d in (a.images_dir, a.audio_dir, a.output_dir))
+
+
+def test_current_workspace_is_shared_within_a_run(tmp_path):
+    root = str(tmp_path)
+    a, b = _in_run(lambda: (current_workspace(root), current_workspace(root)), "run-a")
+    assert a is b
+    assert a.run_id == "run-a"
+    other = _in_run(lambda: current_workspace(root), "run-b")
+    assert other.path != a.path
+
+
+def test_current_workspace_without_a_run_is_one_per_process(tmp_path):
+    root = str(tmp_path)
+    first = contextvars.Context().run(current_workspace, root)
+    assert contextvars.Context().run(current_workspace, root) is first
+
+
+def test_line_helpers_share_one_workspace(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    dirs = {}
+
+    async def fake_images(scenes, output_dir, **kwargs):
+        dirs["images"] = output_dir
+        return []
+
+    async def fake_audio(scenes, output_dir, **kwargs):
+        dirs["audio"] = output_dir
+        return [None] * len(scenes)
+
+    monkeypatch.setattr(pipeline, "generate_images_for_scenes", fake_images)
+    monkeypatch.setattr(pipeline, "generate_audio_for_scenes_async", fake_audio)
+
+    def story():
+        pipeline.generate_line_images(["one", "two"])
+        pipeline.generate_line_audio(["one", "two"])
+
+    _in_run(story)
+    assert os.path.dirname(dirs["images"]) == os.path.dirname(dirs["audio"])
+    assert dirs["images"].endswith("images") and dirs["audio"].endswith("audio")
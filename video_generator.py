@@ -10,20 +10,38 @@ from slop_gen.generators.story_gen.scene_gen import (
 )
 from slop_gen.generators.story_gen.images import generate_images_for_scenes
 from slop_gen.generators.story_gen.audio import generate_audio_for_scenes
-from slop_gen.generators.story_gen.video import create_video_from_assets
+from slop_gen.generators.story_gen.video import (
+    PREVIEW_MAX_HEIGHT,
+    create_video_from_assets,
+)
 from slop_gen.generators.story_gen.sample_stories import (
     conan_story,
     depression_story,
     short_horror_story,
 )
+from slop_gen.utils.asset_cache import content_key
+from slop_gen.utils.instrumentation import span, start_run
+from slop_gen.utils.workspace import RunWorkspace
+import json
 import os
+import tempfile
 from typing import List, Optional
 
 story: str = short_horror_story
 
-BASE_IMAGE_OUTPUT_DIR = "assets/generated_images"
-BASE_AUDIO_OUTPUT_DIR = "assets/generated_audio"
-VIDEO_OUTPUT_PATH = "assets/output/final_story_video.mp4"
+# Images, audio and videos go to a per-run RunWorkspace under assets/runs;
+# the caches below are keyed by content and shared by every run.
+VIDEO_OUTPUT_NAME = "final_story_video.mp4"
+PREVIEW_OUTPUT_NAME = "final_story_video_preview.mp4"
+# Plan and scenes of a run, kept in its workspace; previews of a story share
+# a workspace (see run_workspace), so they reuse them.
+SCENE_CACHE_NAME = "scene_cache.json"
+TRACE_OUTPUT_DIR = "assets/output/traces"
+# Streaming renders encode segment by segment, keeping each one as a chunk in
+# SEGMENT_CACHE_DIR so unchanged scenes are not re-encoded on the next run.
+# They use hard cuts, so leave this off to keep the default render mode.
+STREAMING_RENDER = False
+SEGMENT_CACHE_DIR = "assets/cache/segments"
 
 # alloy // deeper, serios female/high pitched male
 # ash // deep male voice
@@ -49,15 +67,72 @@ parameters: Parameters = {
     "scene_descriptions": None,
     "image_paths": None,
     "audio_voice": "echo",
+    "preview": False,
 }
 
 
-async def main():
+def plan_cache_key(params: Parameters) -> str:
+    """Everything the plan and scene list depend on."""
+    return content_key(
+        params["story"], params.get("director_prompt"), params.get("character_design")
+    )
+
+
+def load_cached_scenes(workspace: RunWorkspace, key: str) -> Optional[dict]:
+    path = os.path.join(workspace.path, SCENE_CACHE_NAME)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        cached = json.load(f)
+    return cached if cached.get("key") == key else None
+
+
+def save_cached_scenes(
+    workspace: RunWorkspace, key: str, high_level_plan: str, scenes: List[dict]
+) -> None:
+    path = os.path.join(workspace.path, SCENE_CACHE_NAME)
+    # Replaced in one step, so a concurrent preview never reads a half-written cache.
+    fd, tmp_path = tempfile.mkstemp(dir=workspace.path, suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(
+            {
+                "key": key,
+                "high_level_plan": high_level_plan,
+                "scene_descriptions": scenes,
+            },
+            f,
+            indent=2,
+        )
+    os.replace(tmp_path, path)
+
+
+def run_workspace(params: Parameters) -> RunWorkspace:
+    """
+    Workspace for this run. Previews of the same story share one, so they
+    can reuse its images and audio; full runs each get their own.
+    """
+    if params["preview"]:
+        return RunWorkspace(f"preview-{plan_cache_key(params)[:12]}")
+    return RunWorkspace()
+
+
+async def main(workspace: RunWorkspace):
     # High-level plan
     # generates a single string describing the video
     # visual style, visual flow, character design, what will be shown in major scenes, etc.
 
-    parameters["high_level_plan"] = generate_high_level_plan(parameters)
+    # Preview runs reuse the last plan/scenes for the same story and prompts.
+    scene_cache_key = plan_cache_key(parameters)
+    cached_scenes = (
+        load_cached_scenes(workspace, scene_cache_key) if parameters["preview"] else None
+    )
+    if cached_scenes:
+        print("♻️ Preview: reusing cached high-level plan and scenes.")
+        parameters["high_level_plan"] = cached_scenes["high_level_plan"]
+        parameters["scene_descriptions"] = cached_scenes["scene_descriptions"]
+    else:
+        with span("stage.plan"):
+            parameters["high_level_plan"] = generate_high_level_plan(parameters)
     print(f"High-Level Plan:\n{parameters['high_level_plan']}\n")
 
     # Scene-bot
@@ -69,18 +144,27 @@ async def main():
         15  # Define a maximum number of iterations for the wrapper function
     )
 
-    if parameters["high_level_plan"] is not None:
+    if cached_scenes:
+        pass
+    elif parameters["high_level_plan"] is not None:
         print(f"Generating all scenes for the story...")
         try:
-            all_generated_scenes_obj = generate_all_scenes(
-                story=parameters["story"],
-                high_level_plan=parameters["high_level_plan"],
-                num_scenes_per_iteration=NUM_SCENES_PER_ITERATION,
-                max_iterations=MAX_ITERATIONS,
-            )
+            with span("stage.scenes"):
+                all_generated_scenes_obj = generate_all_scenes(
+                    story=parameters["story"],
+                    high_level_plan=parameters["high_level_plan"],
+                    num_scenes_per_iteration=NUM_SCENES_PER_ITERATION,
+                    max_iterations=MAX_ITERATIONS,
+                )
             parameters["scene_descriptions"] = [
                 scene.model_dump() for scene in all_generated_scenes_obj
             ]  # Store as list of dicts
+            save_cached_scenes(
+                workspace,
+                scene_cache_key,
+                parameters["high_level_plan"],
+                parameters["scene_descriptions"],
+            )
 
             print("\nGenerated Scenes:")
             if parameters["scene_descriptions"]:
@@ -106,15 +190,13 @@ async def main():
         print(
             f"\nStarting image generation for {len(parameters['scene_descriptions'])} scenes..."
         )
-        # Ensure the base output directory exists
-        if not os.path.exists(BASE_IMAGE_OUTPUT_DIR):
-            os.makedirs(BASE_IMAGE_OUTPUT_DIR)
-            print(f"Created image output directory: {BASE_IMAGE_OUTPUT_DIR}")
-
-        parameters["image_paths"] = await generate_images_for_scenes(
-            scene_descriptions=parameters["scene_descriptions"],
-            base_output_dir=BASE_IMAGE_OUTPUT_DIR,
-        )
+        with span("stage.images", scenes=len(parameters["scene_descriptions"])):
+            parameters["image_paths"] = await generate_images_for_scenes(
+                scene_descriptions=parameters["scene_descriptions"],
+                base_output_dir=workspace.images_dir,
+                reuse_cached=parameters["preview"],
+                frame_height=PREVIEW_MAX_HEIGHT if parameters["preview"] else 1080,
+            )
         if parameters["image_paths"]:
             print(
                 f"\nSuccessfully processed {len(parameters['image_paths'])} images (original or fallback):"
@@ -134,11 +216,13 @@ async def main():
         print(
             f"\nStarting audio generation for {len(parameters['scene_descriptions'])} scenes..."
         )
-        audio_paths_generated = generate_audio_for_scenes(
-            scene_descriptions=parameters["scene_descriptions"],
-            output_dir=BASE_AUDIO_OUTPUT_DIR,
-            voice=parameters.get("audio_voice"),
-        )
+        with span("stage.audio", scenes=len(parameters["scene_descriptions"])):
+            audio_paths_generated = generate_audio_for_scenes(
+                scene_descriptions=parameters["scene_descriptions"],
+                output_dir=workspace.audio_dir,
+                voice=parameters.get("audio_voice"),
+                reuse_cached=parameters["preview"],
+            )
         if audio_paths_generated:
             print(
                 f"\nSuccessfully generated/skipped {len(audio_paths_generated)} audio files/placeholders:"
@@ -198,15 +282,21 @@ async def main():
             )
             music_to_use = None
 
-        create_video_from_assets(
-            image_paths=parameters["image_paths"],
-            audio_paths=final_audio_paths_for_video,
-            scene_texts=scene_texts,
-            output_path=VIDEO_OUTPUT_PATH,
-            music_path=music_to_use,
-            music_volume_param=parameters.get("music_volume"),
-            post_processing_effects=parameters.get("post_processing"),
-        )
+        with span("stage.render", scenes=num_scenes):
+            create_video_from_assets(
+                image_paths=parameters["image_paths"],
+                audio_paths=final_audio_paths_for_video,
+                scene_texts=scene_texts,
+                output_path=workspace.output(
+                    PREVIEW_OUTPUT_NAME if parameters["preview"] else VIDEO_OUTPUT_NAME
+                ),
+                music_path=music_to_use,
+                music_volume_param=parameters.get("music_volume"),
+                post_processing_effects=parameters.get("post_processing"),
+                preview=parameters["preview"],
+                streaming=STREAMING_RENDER,
+                segment_cache_dir=SEGMENT_CACHE_DIR if STREAMING_RENDER else None,
+            )
     else:
         print(
             "\nSkipping video creation as image paths or scene descriptions are missing."
@@ -214,4 +304,15 @@ async def main():
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    # One trace per run: every stage and per-scene call below records a span.
+    tracer = start_run()
+    workspace = run_workspace(parameters)
+    print(f"📁 Run {tracer.run_id}: assets in {workspace.path}")
+    try:
+        asyncio.run(main(workspace))
+    finally:
+        trace_path = tracer.write_json(
+            os.path.join(TRACE_OUTPUT_DIR, f"{tracer.run_id}.json")
+        )
+        print(f"\n{tracer.summary()}")
+        print(f"📈 Trace written to {trace_path}")